@@ -0,0 +1,509 @@
+"""
+Analysis passes for Particle Life states.
+
+The kernels work on the cell grid of Game.cell_index() (the same layout that
+regroup_particles_in_cells produces for the force calculation), so they only
+look at neighboring cells instead of all particle pairs.
+
+Usage (radial distribution functions of a headless run):
+    python -m p_life.analysis --n 5000 --steps 1000 --every 10 --out rdf.csv
+"""
+
+import argparse
+import csv
+
+import numpy as np
+from numba import get_num_threads, njit, prange
+from numba import types as nb_types
+
+try:
+    from .game import FLOAT_2D, INT_1D
+except ImportError:
+    from game import FLOAT_2D, INT_1D
+
+
+@njit(cache=True)
+def _find_root(parent, i):
+
+    """Root of i in the union-find forest, with path halving."""
+
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+@njit(cache=True)
+def label_clusters(sorted_pos, cell_starts, cell_counts, cols, rows, threshold, world_width, world_height):
+
+    """
+    Labels clusters of particles with a union-find pass over the cell grid.
+
+    Two particles belong to the same cluster if they are linked by a chain of
+    particles that are at most `threshold` apart (torus distance). Only the
+    3x3 neighborhood of each cell is searched, so threshold must not be larger
+    than the cell size.
+
+    Unlike the force and histogram kernels this pass is serial: unions from
+    different cells write to the same parent entries, so the cells cannot be
+    split across threads without atomics. It stays on one core even with more
+    threads, at ~2.5 ms for 20,000 particles (about a fifth of a step).
+
+    Arguments:
+        sorted_pos (np.ndarray): Particle positions sorted by cell ID, shape (N, 2)
+        cell_starts (np.ndarray): Start index of each cell in sorted arrays
+        cell_counts (np.ndarray): Number of particles in each cell
+        cols (int): Number of grid columns
+        rows (int): Number of grid rows
+        threshold (float): Linking distance
+        world_width (float): Width of the simulation world
+        world_height (float): Height of the simulation world
+
+    Returns:
+        tuple: (labels, n_clusters) with labels 0 .. n_clusters - 1 per
+            particle in sorted order, numbered by first occurrence
+    """
+
+    n = len(sorted_pos)
+    parent = np.arange(n)
+    threshold_sq = threshold * threshold
+    half_w = world_width * 0.5
+    half_h = world_height * 0.5
+
+    # Grids narrower than 3 cells would visit the same neighbor twice
+    span_x = min(3, cols)
+    span_y = min(3, rows)
+
+    for cell_id in range(cols * rows):
+        count_a = cell_counts[cell_id]
+        if count_a == 0:
+            continue
+
+        start_a = cell_starts[cell_id]
+        cell_x = cell_id % cols
+        cell_y = cell_id // cols
+
+        for oy in range(span_y):
+            neighbor_y = (cell_y + oy - 1) % rows if rows >= 3 else oy
+            for ox in range(span_x):
+                neighbor_x = (cell_x + ox - 1) % cols if cols >= 3 else ox
+                neighbor_id = neighbor_x + neighbor_y * cols
+
+                # Links are symmetric: visit every pair of cells only once
+                if neighbor_id < cell_id:
+                    continue
+
+                start_b = cell_starts[neighbor_id]
+                end_b = start_b + cell_counts[neighbor_id]
+
+                for idx_a in range(start_a, start_a + count_a):
+                    first_b = idx_a + 1 if neighbor_id == cell_id else start_b
+                    for idx_b in range(first_b, end_b):
+                        rel_x = sorted_pos[idx_b, 0] - sorted_pos[idx_a, 0]
+                        rel_y = sorted_pos[idx_b, 1] - sorted_pos[idx_a, 1]
+
+                        # For torus-world: Shortest distance considering wrap-around
+                        if rel_x > half_w:
+                            rel_x -= world_width
+                        elif rel_x < -half_w:
+                            rel_x += world_width
+                        if rel_y > half_h:
+                            rel_y -= world_height
+                        elif rel_y < -half_h:
+                            rel_y += world_height
+
+                        if rel_x * rel_x + rel_y * rel_y <= threshold_sq:
+                            root_a = _find_root(parent, idx_a)
+                            root_b = _find_root(parent, idx_b)
+                            if root_a < root_b:
+                                parent[root_b] = root_a
+                            elif root_b < root_a:
+                                parent[root_a] = root_b
+
+    # Compact labels 0 .. n_clusters - 1
+    labels = np.empty(n, dtype=np.int64)
+    root_label = np.full(n, -1, dtype=np.int64)
+    n_clusters = 0
+    for i in range(n):
+        root = _find_root(parent, i)
+        if root_label[root] < 0:
+            root_label[root] = n_clusters
+            n_clusters += 1
+        labels[i] = root_label[root]
+
+    return labels, n_clusters
+
+
+@njit(cache=True)
+def cluster_statistics(sorted_pos, sorted_types, labels, n_clusters, n_types, world_width, world_height):
+
+    """
+    Computes size, centroid and type composition of every cluster.
+
+    Centroids are circular means per axis, so clusters that wrap around the
+    torus edges get a centroid inside the cluster instead of the world center.
+
+    Arguments:
+        sorted_pos (np.ndarray): Particle positions, shape (N, 2)
+        sorted_types (np.ndarray): Particle types, shape (N,)
+        labels (np.ndarray): Cluster label of each particle (label_clusters)
+        n_clusters (int): Number of clusters
+        n_types (int): Number of particle types
+        world_width (float): Width of the simulation world
+        world_height (float): Height of the simulation world
+
+    Returns:
+        tuple: (sizes, centroids, composition) with shapes (K,), (K, 2) and
+            (K, n_types)
+    """
+
+    sizes = np.zeros(n_clusters, dtype=np.int64)
+    composition = np.zeros((n_clusters, n_types), dtype=np.int64)
+    angle_sums = np.zeros((n_clusters, 4))  # cos x, sin x, cos y, sin y
+
+    scale_x = 2.0 * np.pi / world_width
+    scale_y = 2.0 * np.pi / world_height
+
+    for i in range(len(labels)):
+        k = labels[i]
+        sizes[k] += 1
+        composition[k, sorted_types[i]] += 1
+        angle_x = sorted_pos[i, 0] * scale_x
+        angle_y = sorted_pos[i, 1] * scale_y
+        angle_sums[k, 0] += np.cos(angle_x)
+        angle_sums[k, 1] += np.sin(angle_x)
+        angle_sums[k, 2] += np.cos(angle_y)
+        angle_sums[k, 3] += np.sin(angle_y)
+
+    centroids = np.empty((n_clusters, 2))
+    for k in range(n_clusters):
+        centroids[k, 0] = (np.arctan2(angle_sums[k, 1], angle_sums[k, 0]) / scale_x) % world_width
+        centroids[k, 1] = (np.arctan2(angle_sums[k, 3], angle_sums[k, 2]) / scale_y) % world_height
+
+    return sizes, centroids, composition
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def accumulate_pair_distances(
+    sorted_pos,
+    sorted_types,
+    cell_starts,
+    cell_counts,
+    cols,
+    rows,
+    r_cut,
+    world_width,
+    world_height,
+    hist,
+    n_chunks,
+):
+
+    """
+    Adds the pair distances of one state to a per-type-pair histogram.
+
+    Uses the same neighbor traversal and torus minimum image as
+    calculate_forces. Every ordered pair (a, b) with distance below r_cut is
+    counted in hist[type_a, type_b, bin]. The cells are split into n_chunks
+    interleaved chunks (one per thread), each with its own partial histogram,
+    which are summed into hist at the end.
+
+    This is a second traversal of the neighbor cells on top of the one in the
+    force calculation, not a histogram output of the force kernels. Those
+    kernels are shared by all integrators, have fixed warm-up signatures and
+    run every step, while the RDF is sampled every few steps and is not limited
+    to r_max by the interaction (only by the cell size). A traversal costs about
+    as much as half a step (~7 ms for 20,000 particles against ~13 ms per step
+    on one thread), so sampling every 10th step adds ~5% to a run.
+
+    Arguments:
+        sorted_pos (np.ndarray): Particle positions sorted by cell ID, shape (N, 2)
+        sorted_types (np.ndarray): Particle types sorted by cell ID, shape (N,)
+        cell_starts (np.ndarray): Start index of each cell in sorted arrays
+        cell_counts (np.ndarray): Number of particles in each cell
+        cols (int): Number of grid columns
+        rows (int): Number of grid rows
+        r_cut (float): Largest distance of the histogram, at most the cell size
+        world_width (float): Width of the simulation world
+        world_height (float): Height of the simulation world
+        hist (np.ndarray): Histogram, shape (T, T, bins), updated in place
+        n_chunks (int): Number of chunks, usually numba.get_num_threads()
+    """
+
+    n_types = hist.shape[0]
+    bins = hist.shape[2]
+    total_cells = cols * rows
+
+    r_cut_sq = r_cut * r_cut
+    inv_bin_width = bins / r_cut
+    half_w = world_width * 0.5
+    half_h = world_height * 0.5
+
+    # Grids narrower than 3 cells would visit the same neighbor twice
+    span_x = min(3, cols)
+    span_y = min(3, rows)
+
+    n_chunks = max(1, min(n_chunks, total_cells))
+    partial = np.zeros((n_chunks, n_types, n_types, bins), dtype=np.int64)
+
+    for chunk in prange(n_chunks):
+        for cell_id in range(chunk, total_cells, n_chunks):
+            count_a = cell_counts[cell_id]
+            if count_a == 0:
+                continue
+
+            start_a = cell_starts[cell_id]
+            cell_x = cell_id % cols
+            cell_y = cell_id // cols
+
+            for oy in range(span_y):
+                neighbor_y = (cell_y + oy - 1) % rows if rows >= 3 else oy
+                for ox in range(span_x):
+                    neighbor_x = (cell_x + ox - 1) % cols if cols >= 3 else ox
+                    neighbor_id = neighbor_x + neighbor_y * cols
+
+                    start_b = cell_starts[neighbor_id]
+                    end_b = start_b + cell_counts[neighbor_id]
+
+                    for idx_a in range(start_a, start_a + count_a):
+                        type_a = sorted_types[idx_a]
+                        for idx_b in range(start_b, end_b):
+                            if idx_a == idx_b:
+                                continue
+
+                            rel_x = sorted_pos[idx_b, 0] - sorted_pos[idx_a, 0]
+                            rel_y = sorted_pos[idx_b, 1] - sorted_pos[idx_a, 1]
+
+                            # For torus-world: Shortest distance considering wrap-around
+                            if rel_x > half_w:
+                                rel_x -= world_width
+                            elif rel_x < -half_w:
+                                rel_x += world_width
+                            if rel_y > half_h:
+                                rel_y -= world_height
+                            elif rel_y < -half_h:
+                                rel_y += world_height
+
+                            dist_sq = rel_x * rel_x + rel_y * rel_y
+                            if dist_sq < r_cut_sq:
+                                bin_id = min(int(np.sqrt(dist_sq) * inv_bin_width), bins - 1)
+                                partial[chunk, type_a, sorted_types[idx_b], bin_id] += 1
+
+    for chunk in range(n_chunks):
+        hist += partial[chunk]
+
+
+# Explicit signatures of all kernels in this module, compiled ahead of the
+# first use by p_life.jit.warmup
+KERNEL_SIGNATURES = [
+    (
+        label_clusters,
+        (FLOAT_2D, INT_1D, INT_1D, nb_types.int64, nb_types.int64,
+         nb_types.float64, nb_types.float64, nb_types.float64),
+    ),
+    (
+        cluster_statistics,
+        (FLOAT_2D, INT_1D, nb_types.int64[::1], nb_types.int64, nb_types.int64,
+         nb_types.float64, nb_types.float64),
+    ),
+    (
+        accumulate_pair_distances,
+        (FLOAT_2D, INT_1D, INT_1D, INT_1D, nb_types.int64, nb_types.int64,
+         nb_types.float64, nb_types.float64, nb_types.float64, nb_types.int64[:, :, ::1],
+         nb_types.int64),
+    ),
+]
+
+
+def find_clusters(game, threshold):
+
+    """
+    Detects the clusters of the current state of a game.
+
+    Reuses the cached cell grid of game.cell_index(), so calling this every
+    few steps costs one linear pass over the neighbor cells.
+
+    Args:
+        game (Game): Simulation to analyze
+        threshold (float): Linking distance, at most game.r_max
+
+    Returns:
+        dict: Contains the following keys:
+            - "labels" (np.ndarray): Cluster label per particle, aligned with game.pos
+            - "n_clusters" (int): Number of clusters (isolated particles count as size 1)
+            - "sizes" (np.ndarray): Particles per cluster, shape (K,)
+            - "centroids" (np.ndarray): Torus-aware cluster centers, shape (K, 2)
+            - "composition" (np.ndarray): Particles per type, shape (K, n_types)
+    """
+
+    index = game.cell_index()
+    if threshold > index["cell_size"]:
+        raise ValueError(f"threshold {threshold} is larger than the cell size {index['cell_size']}")
+
+    w, h = float(game.w), float(game.h)
+    sorted_labels, n_clusters = label_clusters(
+        index["pos"],
+        index["cell_starts"],
+        index["cell_counts"],
+        index["cols"],
+        index["rows"],
+        float(threshold),
+        w,
+        h,
+    )
+    sizes, centroids, composition = cluster_statistics(
+        index["pos"], index["types"], sorted_labels, n_clusters, game.matrix.shape[0], w, h
+    )
+
+    labels = np.empty_like(sorted_labels)
+    labels[index["order"]] = sorted_labels
+
+    return {
+        "labels": labels,
+        "n_clusters": n_clusters,
+        "sizes": sizes,
+        "centroids": centroids,
+        "composition": composition,
+    }
+
+
+class RadialDistribution:
+
+    """
+    Radial distribution functions g(r) for every pair of particle types.
+
+    Pair distances are histogrammed into preallocated bins with
+    accumulate_pair_distances and summed over any number of states, so the
+    memory use does not grow with the number of steps. Every add is one extra
+    neighbor traversal (about half a step), so sample every few steps rather
+    than every step. g_ab(r) is the number
+    of b particles at distance r from an a particle relative to an ideal gas
+    of the same density (1.0 = uncorrelated).
+
+    Attributes:
+        r_cut (float): Largest distance of the histogram
+        bins (int): Number of distance bins
+        hist (np.ndarray): Accumulated pair counts, shape (T, T, bins)
+        pair_density (np.ndarray): Accumulated N_a * (N_b - delta_ab) / area, shape (T, T)
+        frames (int): Number of accumulated states
+    """
+
+    def __init__(self, r_cut, bins=50, n_types=4):
+
+        """
+        Creates an empty accumulator.
+
+        Args:
+            r_cut (float): Largest distance, at most the cell size (r_max) of the
+                games that are added and at most half the world size
+            bins (int): Number of distance bins. Default is 50.
+            n_types (int): Number of particle types. Default is 4.
+        """
+
+        self.r_cut = float(r_cut)
+        self.bins = int(bins)
+        self.hist = np.zeros((n_types, n_types, self.bins), dtype=np.int64)
+        self.pair_density = np.zeros((n_types, n_types))
+        self.frames = 0
+
+    def add(self, game):
+
+        """
+        Accumulates the pair distances of the current state of a game.
+
+        Args:
+            game (Game): Simulation to sample, reusing game.cell_index()
+        """
+
+        index = game.cell_index()
+        if self.r_cut > index["cell_size"]:
+            raise ValueError(f"r_cut {self.r_cut} is larger than the cell size {index['cell_size']}")
+
+        accumulate_pair_distances(
+            index["pos"],
+            index["types"],
+            index["cell_starts"],
+            index["cell_counts"],
+            index["cols"],
+            index["rows"],
+            self.r_cut,
+            float(game.w),
+            float(game.h),
+            self.hist,
+            get_num_threads(),
+        )
+
+        counts = np.bincount(index["types"], minlength=self.hist.shape[0]).astype(float)
+        pairs = np.outer(counts, counts) - np.diag(counts)
+        self.pair_density += pairs / (game.w * game.h)
+        self.frames += 1
+
+    def result(self):
+
+        """
+        Normalizes the accumulated histogram.
+
+        Returns:
+            tuple: (r, g) with the bin centers r, shape (bins,), and g(r) per
+                type pair, shape (T, T, bins); pairs without particles are 0
+        """
+
+        edges = np.linspace(0.0, self.r_cut, self.bins + 1)
+        r = 0.5 * (edges[1:] + edges[:-1])
+        shell_area = np.pi * (edges[1:] ** 2 - edges[:-1] ** 2)
+
+        expected = self.pair_density[:, :, None] * shell_area[None, None, :]
+        g = np.divide(self.hist, expected, out=np.zeros(self.hist.shape), where=expected > 0)
+        return r, g
+
+    def save(self, path):
+
+        """
+        Writes g(r) as a CSV table with one column per type pair (g_a_b).
+
+        Args:
+            path (str): Output file
+        """
+
+        r, g = self.result()
+        n_types = g.shape[0]
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["r"] + [f"g_{a}_{b}" for a in range(n_types) for b in range(n_types)])
+            for i in range(len(r)):
+                writer.writerow([f"{r[i]:.6g}"] + [f"{g[a, b, i]:.6g}" for a in range(n_types) for b in range(n_types)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Radial distribution functions of a headless run")
+    parser.add_argument("--n", type=int, default=5000)
+    parser.add_argument("--world", type=float, default=100.0, help="world width and height")
+    parser.add_argument("--r-max", type=float, default=10.0)
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--every", type=int, default=10, help="sample every k steps")
+    parser.add_argument("--burn-in", type=int, default=200, help="steps before sampling starts")
+    parser.add_argument("--bins", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the state and random matrix")
+    parser.add_argument("--out", default="rdf.csv")
+    args = parser.parse_args()
+
+    try:
+        from .game import Game
+    except ImportError:
+        from game import Game
+
+    np.random.seed(args.seed)
+    game = Game(n=args.n, world_width=args.world, world_height=args.world, r_max=args.r_max)
+    game.matrix[:] = np.random.uniform(-1.0, 1.0, size=game.matrix.shape)
+
+    rdf = RadialDistribution(args.r_max, bins=args.bins, n_types=game.matrix.shape[0])
+    for step in range(args.burn_in + args.steps):
+        game.step()
+        if step >= args.burn_in and (step - args.burn_in) % args.every == 0:
+            rdf.add(game)
+
+    rdf.save(args.out)
+    print(f"g(r) from {rdf.frames} states written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Autotuner for the engine configuration of a Game.
+
+The fastest force kernel, cell order, cell size and thread count depend on
+the number of particles, their density and the machine. tune() times every
+candidate configuration for a few steps on copies of a game and returns the
+fastest; autotune() does this once per scene bucket and machine, stores the
+decision in a JSON file and applies it to the game. With game.autotune = True
+Game.step calls it automatically.
+
+Only kernels that compute the same forces are candidates (FORCE_KERNELS and
+the space-filling-curve orders); p_life_old_version is not, because its
+stencil differs on narrow grids.
+
+The cache lives in ~/.cache/p_life/autotune.json (P_LIFE_AUTOTUNE_CACHE
+overrides the path) and maps "machine key" -> "scene key" -> configuration.
+
+Tune a scene and print the timings:
+    python -m p_life.autotune --n 20000 --width 100 --height 100
+"""
+
+import argparse
+import copy
+import json
+import math
+import os
+import platform
+import tempfile
+import time
+
+import numba
+
+try:
+    from .game import CELL_ORDERS, FORCE_KERNELS
+except ImportError:
+    from game import CELL_ORDERS, FORCE_KERNELS
+
+
+CELL_SCALES = (1.0, 1.5, 2.0)  # candidate cell sizes as multiples of r_max
+
+
+def default_cache_path():
+    return os.environ.get(
+        "P_LIFE_AUTOTUNE_CACHE",
+        os.path.join(os.path.expanduser("~"), ".cache", "p_life", "autotune.json"),
+    )
+
+
+def machine_key():
+
+    """CPU model, core count and Numba thread pool size, e.g. "AMD EPYC 7B13|8|8"."""
+
+    model = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith("model name"):
+                    model = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    return f"{model}|{os.cpu_count()}|{numba.config.NUMBA_NUM_THREADS}"
+
+
+def scene_key(game):
+
+    """
+    Bucket of a game's scene: the tuned configuration is reused for all games
+    in the same bucket.
+
+    Particle count and density (particles per r_max x r_max cell) are rounded
+    to powers of two; integrator and per-pair radii change the candidates.
+    """
+
+    n_bucket = int(math.log2(game.n)) if game.n > 0 else -1
+    density = game.n * game.r_max * game.r_max / (game.w * game.h)
+    density_bucket = int(math.floor(math.log2(density))) if density > 0 else -99
+    radii = "radii" if game.radii is not None else "rmax"
+    return f"n{n_bucket}|d{density_bucket}|{game.integrator}|{radii}"
+
+
+def thread_candidates():
+
+    """1, 2, 4, ... and the full Numba pool."""
+
+    counts = []
+    threads = 1
+    while threads < numba.config.NUMBA_NUM_THREADS:
+        counts.append(threads)
+        threads *= 2
+    counts.append(numba.config.NUMBA_NUM_THREADS)
+    return counts
+
+
+def candidates(game):
+
+    """
+    Configurations to try for a game.
+
+    Returns:
+        list[dict]: Dicts with "kernel", "cell_order", "cell_scale" and
+            "threads"; the kernel only matters for the row order (curve
+            orders have their own kernel), and per-pair radii or the respa
+            integrator only leave the row order
+    """
+
+    if game.radii is not None or game.integrator == "respa":
+        layouts = [("cells", "row")]
+    else:
+        layouts = [(kernel, "row") for kernel in FORCE_KERNELS]
+        layouts += [("cells", order) for order in CELL_ORDERS if order != "row"]
+    scales = (1.0,) if game.integrator == "respa" else CELL_SCALES
+
+    return [
+        {"kernel": kernel, "cell_order": order, "cell_scale": scale, "threads": threads}
+        for kernel, order in layouts
+        for scale in scales
+        for threads in thread_candidates()
+    ]
+
+
+def apply(game, config):
+
+    """Sets a configuration from candidates() on a game."""
+
+    game.kernel = config["kernel"]
+    game.cell_order = config["cell_order"]
+    game.cell_size = None if config["cell_scale"] == 1.0 else config["cell_scale"] * game.r_max
+    game.threads = config["threads"]
+
+
+def tune(game, configs=None, steps=3, dt=0.01):
+
+    """
+    Times configurations on copies of a game (the game itself is not stepped).
+
+    Args:
+        game (Game): Scene to tune for
+        configs (list[dict] or None): Default candidates(game)
+        steps (int): Timed steps per configuration, after one untimed step
+            (compilation, caches)
+        dt (float): Time step
+
+    Returns:
+        list[dict]: The configurations with "seconds" per step, fastest first
+    """
+
+    configs = candidates(game) if configs is None else configs
+    results = []
+    for config in configs:
+        trial = copy.deepcopy(game)
+        trial.autotune = False
+        trial.dt_controller = None
+        apply(trial, config)
+
+        trial.step(dt)
+        start = time.perf_counter()
+        for _ in range(steps):
+            trial.step(dt)
+        results.append(dict(config, seconds=(time.perf_counter() - start) / steps))
+
+    results.sort(key=lambda r: r["seconds"])
+    return results
+
+
+def load_cache(path=None):
+    path = path or default_cache_path()
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def store_cache(cache, path=None):
+
+    """Writes the cache atomically; an unwritable location is ignored."""
+
+    path = path or default_cache_path()
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def remember(game, best, cache_path=None):
+
+    """Stores the fastest tune() result for the game's machine and scene key; returns the entry."""
+
+    config = {key: best[key] for key in ("kernel", "cell_order", "cell_scale", "threads", "seconds")}
+    cache = load_cache(cache_path)  # another process may have added entries meanwhile
+    cache.setdefault(machine_key(), {})[scene_key(game)] = config
+    store_cache(cache, cache_path)
+    return config
+
+
+def autotune(game, cache_path=None, retune=False, steps=3):
+
+    """
+    Applies the best configuration for a game, measuring it on first use.
+
+    Args:
+        game (Game): Game to configure (modified in place, not stepped)
+        cache_path (str or None): JSON cache; default default_cache_path()
+        retune (bool): Measure again even if the cache has an entry
+        steps (int): Timed steps per candidate (see tune)
+
+    Returns:
+        dict: The applied configuration with "source": "cache" or "tuned"
+    """
+
+    config = load_cache(cache_path).get(machine_key(), {}).get(scene_key(game))
+
+    if config is None or retune:
+        config = remember(game, tune(game, steps=steps)[0], cache_path)
+        source = "tuned"
+    else:
+        source = "cache"
+
+    apply(game, config)
+    return dict(config, source=source)
+
+
+def format_results(results):
+
+    """Formats tune() results as a table, fastest first."""
+
+    lines = [f"{'kernel':<8} {'order':<8} {'cell':>5} {'threads':>7} {'ms/step':>9}"]
+    for r in results:
+        lines.append(
+            f"{r['kernel']:<8} {r['cell_order']:<8} {r['cell_scale']:>5.2f} {r['threads']:>7} "
+            f"{1000.0 * r['seconds']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the fastest engine configuration for a Particle Life scene")
+    parser.add_argument("--n", type=int, default=20000)
+    parser.add_argument("--width", type=float, default=100.0)
+    parser.add_argument("--height", type=float, default=100.0)
+    parser.add_argument("--r-max", type=float, default=10.0)
+    parser.add_argument("--integrator", default="euler")
+    parser.add_argument("--steps", type=int, default=3)
+    parser.add_argument("--cache", default=None, help="cache file (default ~/.cache/p_life/autotune.json)")
+    args = parser.parse_args()
+
+    try:
+        from .game import Game
+    except ImportError:
+        from game import Game
+
+    game = Game(n=args.n, world_width=args.width, world_height=args.height, r_max=args.r_max)
+    game.integrator = args.integrator
+
+    results = tune(game, steps=args.steps)
+    print(format_results(results))
+    remember(game, results[0], args.cache)
+    print(f"Stored for {machine_key()} / {scene_key(game)}")
+
+
+if __name__ == "__main__":
+    main()
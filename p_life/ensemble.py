@@ -0,0 +1,400 @@
+"""
+Ensemble engine for Particle Life.
+
+Packs many independent worlds (e.g. small Game instances with different
+matrices, friction and noise) into concatenated arrays and steps all of them
+with a fixed number of compiled calls, independent of the number of worlds.
+"""
+
+import numpy as np
+from numba import njit, prange
+from numba import types as nb_types
+
+
+@njit(cache=True)
+def sort_ensemble_into_cells(pos, world, widths, heights, r_maxs, cols, rows, cell_offsets):
+
+    """
+    Counting sort of all particles of all worlds by their global cell ID.
+
+    Every world k owns the global cells cell_offsets[k] .. cell_offsets[k + 1] - 1,
+    so sorting by global cell ID keeps the particles of a world inside the
+    world's particle range.
+
+    Arguments:
+        pos (np.ndarray): Concatenated particle positions, shape (N, 2)
+        world (np.ndarray): World index of each particle, shape (N,)
+        widths (np.ndarray): World width per world, shape (W,)
+        heights (np.ndarray): World height per world, shape (W,)
+        r_maxs (np.ndarray): Interaction radius (cell size) per world, shape (W,)
+        cols (np.ndarray): Number of grid columns per world, shape (W,)
+        rows (np.ndarray): Number of grid rows per world, shape (W,)
+        cell_offsets (np.ndarray): First global cell of each world, shape (W + 1,)
+
+    Returns:
+        tuple: (sort_indices, cell_starts, cell_counts) over all global cells
+    """
+
+    n = len(pos)
+    total_cells = cell_offsets[-1]
+
+    cell_ids = np.empty(n, dtype=np.int64)
+    cell_counts = np.zeros(total_cells, dtype=np.int64)
+
+    for i in range(n):
+        k = world[i]
+        grid_x = min(max(int(pos[i, 0] / r_maxs[k]), 0), cols[k] - 1)
+        grid_y = min(max(int(pos[i, 1] / r_maxs[k]), 0), rows[k] - 1)
+        cell_id = cell_offsets[k] + grid_x + grid_y * cols[k]
+        cell_ids[i] = cell_id
+        cell_counts[cell_id] += 1
+
+    cell_starts = np.empty(total_cells, dtype=np.int64)
+    running = 0
+    for cell_id in range(total_cells):
+        cell_starts[cell_id] = running
+        running += cell_counts[cell_id]
+
+    fill = cell_starts.copy()
+    sort_indices = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        cell_id = cell_ids[i]
+        sort_indices[fill[cell_id]] = i
+        fill[cell_id] += 1
+
+    return sort_indices, cell_starts, cell_counts
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def calculate_ensemble_forces(
+    sorted_pos,
+    sorted_types,
+    cell_starts,
+    cell_counts,
+    cell_world,
+    cell_offsets,
+    cols,
+    rows,
+    matrices,
+    r_maxs,
+    widths,
+    heights,
+):
+
+    """
+    Calculates the forces of all worlds in one parallel loop over all cells.
+
+    Same force law and torus handling as p_life.game.calculate_forces, but
+    the grid geometry, interaction matrix and radius are looked up per world.
+
+    Arguments:
+        sorted_pos (np.ndarray): Positions sorted by global cell ID, shape (N, 2)
+        sorted_types (np.ndarray): Types sorted by global cell ID, shape (N,)
+        cell_starts (np.ndarray): Start index of each global cell
+        cell_counts (np.ndarray): Number of particles in each global cell
+        cell_world (np.ndarray): World index of each global cell
+        cell_offsets (np.ndarray): First global cell of each world, shape (W + 1,)
+        cols (np.ndarray): Number of grid columns per world
+        rows (np.ndarray): Number of grid rows per world
+        matrices (np.ndarray): Interaction matrix per world, shape (W, T, T)
+        r_maxs (np.ndarray): Interaction radius per world
+        widths (np.ndarray): World width per world
+        heights (np.ndarray): World height per world
+
+    Returns:
+        np.ndarray: Array of force vectors, shape (N, 2)
+    """
+
+    total_forces = np.zeros((len(sorted_pos), 2), dtype=np.float32)
+    total_cells = len(cell_counts)
+
+    beta = np.float32(0.3)
+    inv_beta = np.float32(1.0 / beta)
+    inv_one_minus_beta = np.float32(1.0 / (1.0 - beta))
+    repulsion_strength = np.float32(2.0)
+    repulsion_threshold = np.float32(0.3)
+
+    # Parallel over the cells of all worlds at once
+    for cell_id in prange(total_cells):
+
+        count_a = cell_counts[cell_id]
+        if count_a == 0:
+            continue
+
+        k = cell_world[cell_id]
+        first_cell = cell_offsets[k]
+        world_cols = cols[k]
+        world_rows = rows[k]
+
+        r_max = np.float32(r_maxs[k])
+        inv_r_max = np.float32(1.0) / r_max
+        r_max_sq = r_max * r_max
+        w_width = np.float32(widths[k])
+        w_height = np.float32(heights[k])
+        half_w = w_width * np.float32(0.5)
+        half_h = w_height * np.float32(0.5)
+
+        local_id = cell_id - first_cell
+        cell_x = local_id % world_cols
+        cell_y = local_id // world_cols
+        start_a = cell_starts[cell_id]
+
+        for idx_a in range(start_a, start_a + count_a):
+            pos_a_x = sorted_pos[idx_a, 0]
+            pos_a_y = sorted_pos[idx_a, 1]
+            type_a = sorted_types[idx_a]
+
+            force_x_acc = np.float32(0.0)
+            force_y_acc = np.float32(0.0)
+
+            # Distinct neighbor offsets only (-1 and +1 coincide below three cells)
+            for dy in range(-1, min(3, world_rows) - 1):
+                for dx in range(-1, min(3, world_cols) - 1):
+                    neighbor_x = (cell_x + dx) % world_cols
+                    neighbor_y = (cell_y + dy) % world_rows
+                    neighbor_id = first_cell + neighbor_x + neighbor_y * world_cols
+
+                    start_b = cell_starts[neighbor_id]
+                    for idx_b in range(start_b, start_b + cell_counts[neighbor_id]):
+                        if idx_a == idx_b:
+                            continue
+
+                        rel_x = sorted_pos[idx_b, 0] - pos_a_x
+                        rel_y = sorted_pos[idx_b, 1] - pos_a_y
+
+                        # For torus-world: Shortest distance considering wrap-around
+                        if rel_x > half_w:
+                            rel_x -= w_width
+                        elif rel_x < -half_w:
+                            rel_x += w_width
+                        if rel_y > half_h:
+                            rel_y -= w_height
+                        elif rel_y < -half_h:
+                            rel_y += w_height
+
+                        dist_sq = rel_x * rel_x + rel_y * rel_y
+                        if dist_sq > 0 and dist_sq < r_max_sq:
+                            dist = np.sqrt(dist_sq)
+                            normalized_dist = dist * inv_r_max
+
+                            if normalized_dist < repulsion_threshold:
+                                force_factor = (normalized_dist * inv_beta - 1.0) * repulsion_strength
+                            else:
+                                pct = (normalized_dist - repulsion_threshold) * inv_one_minus_beta
+                                shape = 1.0 - abs(2.0 * pct - 1.0)
+                                force_factor = matrices[k, type_a, sorted_types[idx_b]] * shape
+
+                            force_x_acc += (rel_x / dist) * force_factor
+                            force_y_acc += (rel_y / dist) * force_factor
+
+            total_forces[idx_a, 0] = force_x_acc
+            total_forces[idx_a, 1] = force_y_acc
+
+    return total_forces
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def integrate_ensemble(pos, vel, forces, noise, world, dt, frictions, noise_strengths, widths, heights):
+
+    """
+    Applies forces, noise and friction and moves the particles of all worlds.
+
+    Updates pos and vel in place with the semi-implicit Euler step of
+    p_life.game.update_particles followed by the torus wrap of Game.step,
+    using the friction and noise strength of each particle's world.
+
+    Arguments:
+        pos (np.ndarray): Particle positions, shape (N, 2), updated in place
+        vel (np.ndarray): Particle velocities, shape (N, 2), updated in place
+        forces (np.ndarray): Forces from calculate_ensemble_forces, shape (N, 2)
+        noise (np.ndarray): Standard normal samples, shape (N, 2)
+        world (np.ndarray): World index of each particle, shape (N,)
+        dt (float): Time step for numerical integration
+        frictions (np.ndarray): Friction coefficient per world
+        noise_strengths (np.ndarray): Noise standard deviation per world
+        widths (np.ndarray): World width per world
+        heights (np.ndarray): World height per world
+    """
+
+    for i in prange(len(pos)):
+        k = world[i]
+        vel_x = (vel[i, 0] + forces[i, 0] * dt + noise[i, 0] * noise_strengths[k]) * frictions[k]
+        vel_y = (vel[i, 1] + forces[i, 1] * dt + noise[i, 1] * noise_strengths[k]) * frictions[k]
+        vel[i, 0] = vel_x
+        vel[i, 1] = vel_y
+        pos[i, 0] = (pos[i, 0] + vel_x * dt) % widths[k]
+        pos[i, 1] = (pos[i, 1] + vel_y * dt) % heights[k]
+
+
+_FLOAT_2D = nb_types.float32[:, ::1]
+_INT_1D = nb_types.int64[::1]
+_REAL_1D = nb_types.float64[::1]
+
+# Explicit signatures of all kernels in this module, compiled ahead of the
+# first step by p_life.jit.warmup
+KERNEL_SIGNATURES = [
+    (
+        sort_ensemble_into_cells,
+        (_FLOAT_2D, _INT_1D, _REAL_1D, _REAL_1D, _REAL_1D, _INT_1D, _INT_1D, _INT_1D),
+    ),
+    (
+        calculate_ensemble_forces,
+        (
+            _FLOAT_2D, _INT_1D, _INT_1D, _INT_1D, _INT_1D, _INT_1D, _INT_1D, _INT_1D,
+            nb_types.float32[:, :, ::1], _REAL_1D, _REAL_1D, _REAL_1D,
+        ),
+    ),
+    (
+        integrate_ensemble,
+        (
+            _FLOAT_2D, _FLOAT_2D, _FLOAT_2D, _FLOAT_2D, _INT_1D, nb_types.float64,
+            _REAL_1D, _REAL_1D, _REAL_1D, _REAL_1D,
+        ),
+    ),
+]
+
+
+class Ensemble:
+
+    """
+    Many independent Particle Life worlds stepped together.
+
+    The particles of W worlds are packed into concatenated arrays; world k
+    owns the particle range offsets[k] .. offsets[k + 1] - 1 and the global
+    cells cell_offsets[k] .. cell_offsets[k + 1] - 1. Each step sorts, computes
+    forces and integrates all worlds with one compiled call each, so the
+    Python overhead does not grow with the number of worlds.
+
+    Attributes:
+        pos (np.ndarray): Concatenated particle positions, shape (N, 2)
+        vel (np.ndarray): Concatenated particle velocities, shape (N, 2)
+        types (np.ndarray): Concatenated particle types, shape (N,)
+        world (np.ndarray): World index of each particle, shape (N,)
+        offsets (np.ndarray): First particle of each world, shape (W + 1,)
+        widths, heights, r_maxs (np.ndarray): World geometry per world
+        frictions, noise_strengths (np.ndarray): Physics parameters per world
+        matrices (np.ndarray): Interaction matrix per world, shape (W, T, T)
+    """
+
+    def __init__(self, games):
+
+        """
+        Packs the state and parameters of existing games into one ensemble.
+
+        Args:
+            games (list[Game]): Worlds to simulate. All interaction matrices
+                must have the same shape.
+        """
+
+        self.games = list(games)
+        if not self.games:
+            raise ValueError("An ensemble needs at least one game")
+
+        sizes = np.array([len(g.pos) for g in self.games], dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(sizes)))
+        self.world = np.repeat(np.arange(len(self.games), dtype=np.int64), sizes)
+
+        self.pos = np.concatenate([g.pos for g in self.games]).astype(np.float32)
+        self.vel = np.concatenate([g.vel for g in self.games]).astype(np.float32)
+        self.types = np.concatenate([g.types for g in self.games]).astype(np.int64)
+
+        self.widths = np.array([g.w for g in self.games], dtype=np.float64)
+        self.heights = np.array([g.h for g in self.games], dtype=np.float64)
+        self.r_maxs = np.array([g.r_max for g in self.games], dtype=np.float64)
+        self.frictions = np.array([g.friction for g in self.games], dtype=np.float64)
+        self.noise_strengths = np.array([g.noise_strength for g in self.games], dtype=np.float64)
+        self.matrices = np.stack([g.matrix for g in self.games]).astype(np.float32)
+
+        # Grid geometry, same rule as regroup_particles_in_cells
+        self.cols = np.maximum(1, (self.widths / self.r_maxs).astype(np.int64))
+        self.rows = np.maximum(1, (self.heights / self.r_maxs).astype(np.int64))
+        cells = self.cols * self.rows
+        self.cell_offsets = np.concatenate(([0], np.cumsum(cells)))
+        self.cell_world = np.repeat(np.arange(len(self.games), dtype=np.int64), cells)
+
+    def __len__(self):
+        return len(self.games)
+
+    def step(self, dt=0.01):
+
+        """
+        Advances every world by one time step.
+
+        Args:
+            dt (float): Time step size shared by all worlds. Default is 0.01.
+        """
+
+        sort_indices, cell_starts, cell_counts = sort_ensemble_into_cells(
+            self.pos,
+            self.world,
+            self.widths,
+            self.heights,
+            self.r_maxs,
+            self.cols,
+            self.rows,
+            self.cell_offsets,
+        )
+
+        # Sorting by global cell keeps every world in its own particle range,
+        # so self.world does not change.
+        self.pos = self.pos[sort_indices]
+        self.vel = self.vel[sort_indices]
+        self.types = self.types[sort_indices]
+
+        forces = calculate_ensemble_forces(
+            self.pos,
+            self.types,
+            cell_starts,
+            cell_counts,
+            self.cell_world,
+            self.cell_offsets,
+            self.cols,
+            self.rows,
+            self.matrices,
+            self.r_maxs,
+            self.widths,
+            self.heights,
+        )
+
+        noise = np.random.standard_normal(self.pos.shape).astype(np.float32)
+
+        integrate_ensemble(
+            self.pos,
+            self.vel,
+            forces,
+            noise,
+            self.world,
+            float(dt),
+            self.frictions,
+            self.noise_strengths,
+            self.widths,
+            self.heights,
+        )
+
+    def snapshot(self, k):
+
+        """
+        Returns the state of world k in the format of Game.step.
+
+        Args:
+            k (int): World index
+
+        Returns:
+            dict: {"pos": positions, "types": types} as views into the ensemble
+        """
+
+        start, end = self.offsets[k], self.offsets[k + 1]
+        return {"pos": self.pos[start:end], "types": self.types[start:end]}
+
+    def write_back(self):
+
+        """
+        Copies positions, velocities and types back into the packed games,
+        so they can be inspected or continue on their own.
+        """
+
+        for k, g in enumerate(self.games):
+            start, end = self.offsets[k], self.offsets[k + 1]
+            g.pos = self.pos[start:end].copy()
+            g.vel = self.vel[start:end].copy()
+            g.types = self.types[start:end].copy()
@@ -0,0 +1,325 @@
+"""
+Offscreen export of a simulation run as a PNG sequence or raw video.
+
+The main thread steps the Game and hands every frame's (immutable) snapshot
+to a thread pool that renders and encodes it. The CPU renderer is a nogil Numba
+kernel and zlib releases the GIL as well, so simulation, rendering and
+encoding of different frames overlap. At most a few frames are in flight
+(bounded memory), and frames are written strictly in order.
+
+PNG sequence:
+    python -m p_life.export --n 20000 --frames 600 --out frames/
+Raw RGB video piped into ffmpeg:
+    python -m p_life.export --frames 600 --size 1280x720 --raw - | \\
+        ffmpeg -f rawvideo -pix_fmt rgb24 -s 1280x720 -r 30 -i - run.mp4
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from numba import njit
+from numba import types as nb_types
+
+try:
+    from . import tracing
+    from .game import Game
+except ImportError:
+    import tracing
+    from game import Game
+
+
+# RGB colors for particle types 0..3, same as the VisPy frontend
+COLORS = np.array(
+    [
+        [41, 41, 204],  # blue
+        [204, 204, 41],  # yellow
+        [41, 204, 41],  # green
+        [204, 41, 41],  # red
+    ],
+    dtype=np.uint8,
+)
+
+
+@njit(nogil=True, cache=True)
+def render_discs(pos, types, colors, world_width, world_height, res_x, res_y, radius):
+
+    """
+    Draws every particle as a filled disc on a black RGB image.
+
+    Arguments:
+        pos (np.ndarray): Particle positions, shape (N, 2)
+        types (np.ndarray): Particle types, shape (N,)
+        colors (np.ndarray): uint8 RGB palette, shape (K, 3)
+        world_width, world_height (float): World size mapped to the image
+        res_x, res_y (int): Image size in pixels
+        radius (float): Disc radius in pixels
+
+    Returns:
+        np.ndarray: uint8 image of shape (res_y, res_x, 3), row 0 at the top
+    """
+
+    image = np.zeros((res_y, res_x, 3), dtype=np.uint8)
+    scale_x = res_x / world_width
+    scale_y = res_y / world_height
+    reach = int(np.ceil(radius))
+    radius_sq = radius * radius
+    n_colors = len(colors)
+
+    for i in range(len(pos)):
+        center_x = pos[i, 0] * scale_x
+        center_y = (world_height - pos[i, 1]) * scale_y  # y axis points up
+        color = colors[types[i] % n_colors]
+
+        base_x = int(center_x)
+        base_y = int(center_y)
+        for py in range(max(base_y - reach, 0), min(base_y + reach + 1, res_y)):
+            dy = py + 0.5 - center_y
+            for px in range(max(base_x - reach, 0), min(base_x + reach + 1, res_x)):
+                dx = px + 0.5 - center_x
+                if dx * dx + dy * dy <= radius_sq:
+                    image[py, px, 0] = color[0]
+                    image[py, px, 1] = color[1]
+                    image[py, px, 2] = color[2]
+    return image
+
+
+# Explicit signatures of all kernels in this module, compiled ahead of the
+# first use by p_life.jit.warmup
+KERNEL_SIGNATURES = [
+    (render_discs, (nb_types.float32[:, ::1], nb_types.int64[::1], nb_types.uint8[:, ::1],
+                    nb_types.float64, nb_types.float64, nb_types.int64, nb_types.int64, nb_types.float64)),
+    # Read-only arrays of a Snapshot from Game.step
+    (render_discs, (nb_types.Array(nb_types.float32, 2, "C", readonly=True),
+                    nb_types.Array(nb_types.int64, 1, "C", readonly=True), nb_types.uint8[:, ::1],
+                    nb_types.float64, nb_types.float64, nb_types.int64, nb_types.int64, nb_types.float64)),
+]
+
+
+def encode_png(image, level=3):
+
+    """
+    Encodes an RGB image as PNG (no filtering, zlib compression).
+
+    Args:
+        image (np.ndarray): uint8 array of shape (height, width, 3)
+        level (int): zlib compression level; low levels are much faster
+
+    Returns:
+        bytes: PNG file contents
+    """
+
+    height, width, _ = image.shape
+    rows = np.empty((height, 1 + 3 * width), dtype=np.uint8)
+    rows[:, 0] = 0  # filter type "none"
+    rows[:, 1:] = image.reshape(height, -1)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)  # 8 bit RGB
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        chunk(b"IHDR", header),
+        chunk(b"IDAT", zlib.compress(rows.tobytes(), level)),
+        chunk(b"IEND", b""),
+    ))
+
+
+class PngSequenceWriter:
+
+    """Writes frames as frame_000000.png, frame_000001.png, ... into a directory."""
+
+    def __init__(self, directory, level=3):
+        self.directory = directory
+        self.level = level
+        self.frames = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def encode(self, image):
+        return encode_png(image, self.level)
+
+    def write(self, data):
+        path = os.path.join(self.directory, f"frame_{self.frames:06d}.png")
+        with open(path, "wb") as file:
+            file.write(data)
+        self.frames += 1
+
+    def close(self):
+        pass
+
+
+class RawVideoWriter:
+
+    """
+    Writes frames as raw rgb24 video to a binary stream, e.g. the stdin of
+    ffmpeg (-f rawvideo -pix_fmt rgb24).
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.frames = 0
+
+    def encode(self, image):
+        return image.tobytes()
+
+    def write(self, data):
+        self.stream.write(data)
+        self.frames += 1
+
+    def close(self):
+        self.stream.flush()
+
+
+def _make_vispy_renderer(game, size):
+
+    """Renders with an offscreen ParticleCanvas (needs an OpenGL context)."""
+
+    try:
+        from .frontend_vispy import ParticleCanvas
+    except ImportError:
+        from frontend_vispy import ParticleCanvas
+
+    canvas = ParticleCanvas(game, world_width=game.w, world_height=game.h, canvas_size=size, shadow_len=1)
+
+    def render(snap):
+        canvas.draw_snapshot(snap)
+        return np.ascontiguousarray(canvas.render(alpha=False)[:, :, :3])
+
+    return render
+
+
+def export(
+    game,
+    frames,
+    writer,
+    steps_per_frame=1,
+    dt=0.01,
+    size=(1280, 720),
+    radius=1.5,
+    renderer="cpu",
+    workers=None,
+):
+
+    """
+    Steps a game headlessly and writes every frame through a writer.
+
+    Args:
+        game (Game): Simulation to run (modified in place)
+        frames (int): Number of frames to write
+        writer: PngSequenceWriter, RawVideoWriter or any object with
+            encode(image) -> bytes, write(bytes) and close()
+        steps_per_frame (int): Simulation steps between two frames
+        dt (float): Time step
+        size (tuple): Image size (width, height) in pixels
+        radius (float): Particle radius in pixels (cpu renderer)
+        renderer (str): "cpu" (render_discs in the worker threads) or "vispy"
+            (offscreen ParticleCanvas; rendering stays on this thread)
+        workers (int or None): Render/encode threads; default os.cpu_count()
+
+    Returns:
+        dict: "frames", "seconds" and "fps" of the export
+    """
+
+    workers = workers or os.cpu_count() or 1
+    res_x, res_y = size
+
+    def render_cpu(snap):
+        return render_discs(snap["pos"], snap["types"], COLORS, game.w, game.h, res_x, res_y, radius)
+
+    if renderer == "cpu":
+        render_in_worker = True
+        render = render_cpu
+    elif renderer == "vispy":
+        render_in_worker = False
+        render = _make_vispy_renderer(game, size)
+    else:
+        raise ValueError(f"Unknown renderer {renderer!r}")
+
+    def work(item):
+        if render_in_worker:
+            with tracing.span("render", "export"):
+                item = render(item)
+        with tracing.span("encode", "export"):
+            return writer.encode(item)
+
+    def write(data):
+        with tracing.span("write", "io"):
+            writer.write(data)
+
+    start = time.perf_counter()
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for _ in range(frames):
+            for _ in range(steps_per_frame):
+                snap = game.step(dt)
+
+            # Snapshots are immutable, the worker can use them as they are
+            item = snap
+            if not render_in_worker:
+                item = render(item)
+            pending.append(pool.submit(work, item))
+
+            # Bounded number of frames in flight, written in order
+            while len(pending) > 2 * workers:
+                write(pending.popleft().result())
+
+        while pending:
+            write(pending.popleft().result())
+    writer.close()
+
+    seconds = time.perf_counter() - start
+    return {"frames": frames, "seconds": seconds, "fps": frames / seconds if seconds > 0 else 0.0}
+
+
+def _parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a Particle Life run as PNG frames or raw video")
+    parser.add_argument("--n", type=int, default=10000, help="number of particles")
+    parser.add_argument("--width", type=float, default=100.0, help="world width")
+    parser.add_argument("--height", type=float, default=100.0, help="world height")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--steps-per-frame", type=int, default=1)
+    parser.add_argument("--dt", type=float, default=0.01)
+    parser.add_argument("--size", type=_parse_size, default=(1280, 720), help="image size, e.g. 1280x720")
+    parser.add_argument("--radius", type=float, default=1.5, help="particle radius in pixels")
+    parser.add_argument("--renderer", choices=("cpu", "vispy"), default="cpu")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--out", help="directory for the PNG sequence")
+    output.add_argument("--raw", help="file for raw rgb24 video, '-' for stdout")
+    args = parser.parse_args()
+
+    np.random.seed(args.seed)
+    game = Game(n=args.n, world_width=args.width, world_height=args.height)
+    game.matrix[:] = np.random.uniform(-1.0, 1.0, size=game.matrix.shape)
+
+    if args.out:
+        writer = PngSequenceWriter(args.out)
+        stats = export(game, args.frames, writer, args.steps_per_frame, args.dt, args.size,
+                       args.radius, args.renderer, args.workers)
+    else:
+        stream = sys.stdout.buffer if args.raw == "-" else open(args.raw, "wb")
+        try:
+            stats = export(game, args.frames, RawVideoWriter(stream), args.steps_per_frame, args.dt,
+                           args.size, args.radius, args.renderer, args.workers)
+        finally:
+            if stream is not sys.stdout.buffer:
+                stream.close()
+
+    print(f"{stats['frames']} frames in {stats['seconds']:.1f} s ({stats['fps']:.1f} fps)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,25 @@
 """
 VisPy for Particle Life frontend.
 
-Renders particles as discs with a motion-afterimage
+Renders particles as discs with a motion-afterimage, or as a density image
+when there are more particles than pixels. The view can be zoomed (mouse
+wheel) and panned (drag) across the periodic world; only particles in grid
+cells overlapping the view are uploaded, so inspecting a small region of a
+large world costs little more than drawing that region.
 
 """
 
 from collections import deque
 
 import numpy as np
+from numba import njit
 from vispy import scene
+from vispy.visuals.transforms import STTransform
+
+try:
+    from . import tracing
+except ImportError:
+    import tracing
 
 # RGBA colors for particle types 0..3 (blue, yellow, green, red).
 
@@ -43,6 +54,154 @@ def types_to_colors(types: np.ndarray) -> np.ndarray:
     return COLOR_TYPE[types % len(COLOR_TYPE)]
 
 
+@njit(cache=True)
+def density_image(pos, types, colors, x0, y0, width, height, res_x, res_y):
+    """
+    Bin particles into a fixed-resolution RGBA density image.
+
+    Each pixel gets the mean color of the particle types that fall into it,
+    scaled by a logarithmic brightness of the particle count, so the cost of
+    drawing depends on the resolution instead of the number of particles.
+
+    Parameters
+    ----------
+    pos:
+        (n, 2) particle positions.
+    types:
+        (n,) integer type indices (wrapped around the palette).
+    colors:
+        (k, 4) RGBA palette, e.g. COLOR_TYPE.
+    x0, y0, width, height:
+        World rectangle covered by the image.
+    res_x, res_y:
+        Image resolution in pixels.
+
+    Returns
+    -------
+    np.ndarray
+        (res_y, res_x, 4) float32 RGBA image, row 0 at y0.
+    """
+    color_sum = np.zeros((res_y, res_x, 3), dtype=np.float32)
+    counts = np.zeros((res_y, res_x), dtype=np.float32)
+    scale_x = res_x / width
+    scale_y = res_y / height
+    n_colors = len(colors)
+
+    for i in range(len(pos)):
+        px = int(np.floor((pos[i, 0] - x0) * scale_x))
+        py = int(np.floor((pos[i, 1] - y0) * scale_y))
+        if px < 0 or px >= res_x or py < 0 or py >= res_y:
+            continue
+        color = colors[types[i] % n_colors]
+        color_sum[py, px, 0] += color[0]
+        color_sum[py, px, 1] += color[1]
+        color_sum[py, px, 2] += color[2]
+        counts[py, px] += 1.0
+
+    image = np.zeros((res_y, res_x, 4), dtype=np.float32)
+    max_count = counts.max()
+    if max_count == 0:
+        return image
+
+    inv_log_max = 1.0 / np.log1p(max_count)
+    for py in range(res_y):
+        for px in range(res_x):
+            count = counts[py, px]
+            if count > 0:
+                brightness = np.log1p(count) * inv_log_max / count
+                image[py, px, 0] = color_sum[py, px, 0] * brightness
+                image[py, px, 1] = color_sum[py, px, 1] * brightness
+                image[py, px, 2] = color_sum[py, px, 2] * brightness
+                image[py, px, 3] = 1.0
+    return image
+
+
+CULL_CELLS = 64  # cells per axis of the view culling grid
+
+
+@njit(cache=True)
+def _axis_shifts(v0, v1, extent, cells):
+    """
+    Per-cell offset that brings a cell of one periodic axis into [v0, v1).
+
+    NaN marks cells outside the view. A view that spans (almost) the whole
+    axis keeps every cell unshifted, so each particle is drawn once.
+    """
+    cell = extent / cells
+    shifts = np.full(cells, np.nan)
+    if v1 - v0 >= extent - cell:
+        shifts[:] = 0.0
+        return shifts
+
+    first = int(np.floor(v0 / extent)) - 1
+    last = int(np.floor(v1 / extent)) + 1
+    for c in range(cells):
+        a = c * cell
+        for k in range(first, last + 1):
+            offset = k * extent
+            if a + offset < v1 and a + cell + offset > v0:
+                shifts[c] = offset
+                break
+    return shifts
+
+
+@njit(cache=True)
+def cull_particles(pos, x0, y0, x1, y1, world_width, world_height, cells):
+    """
+    Select the particles in grid cells overlapping a view rectangle of the
+    periodic world.
+
+    The world is split into cells x cells; a cell is kept if it overlaps the
+    view directly or through the torus wrap, and its particles are moved by
+    a multiple of the world size into the view. The selection is by cell, so
+    a border of particles just outside the view is kept too.
+
+    Parameters
+    ----------
+    pos:
+        (n, 2) particle positions in [0, world_width) x [0, world_height).
+    x0, y0, x1, y1:
+        View rectangle in world coordinates (may reach outside the world).
+    world_width, world_height:
+        Size of the world.
+    cells:
+        Cells per axis of the culling grid.
+
+    Returns
+    -------
+    tuple
+        (m,) int64 indices of the kept particles and (m, 2) float32 positions
+        in view coordinates.
+    """
+    shift_x = _axis_shifts(x0, x1, world_width, cells)
+    shift_y = _axis_shifts(y0, y1, world_height, cells)
+    scale_x = cells / world_width
+    scale_y = cells / world_height
+
+    n = len(pos)
+    keep = np.zeros(n, dtype=np.bool_)
+    count = 0
+    for i in range(n):
+        cx = min(max(int(pos[i, 0] * scale_x), 0), cells - 1)
+        cy = min(max(int(pos[i, 1] * scale_y), 0), cells - 1)
+        if not np.isnan(shift_x[cx]) and not np.isnan(shift_y[cy]):
+            keep[i] = True
+            count += 1
+
+    index = np.empty(count, dtype=np.int64)
+    out = np.empty((count, 2), dtype=np.float32)
+    j = 0
+    for i in range(n):
+        if keep[i]:
+            cx = min(max(int(pos[i, 0] * scale_x), 0), cells - 1)
+            cy = min(max(int(pos[i, 1] * scale_y), 0), cells - 1)
+            index[j] = i
+            out[j, 0] = pos[i, 0] + shift_x[cx]
+            out[j, 1] = pos[i, 1] + shift_y[cy]
+            j += 1
+    return index, out
+
+
 class ParticleCanvas(scene.SceneCanvas):
     """
     VisPy canvas that draws particles from a Game snapshot.
@@ -58,6 +217,7 @@ class ParticleCanvas(scene.SceneCanvas):
         canvas_size: tuple[int, int] = (750, 500),
         dt: float = 1/60,
         shadow_len: int = 6,
+        lod_threshold: float = 1.0,
     ) -> None:
         """
         Initialize a render canvas for particle snapshots.
@@ -74,22 +234,36 @@ class ParticleCanvas(scene.SceneCanvas):
             Simulation timestep used by step_and_draw().
         shadow_len:
             Number of previous frames used for the motion shadow.
+        lod_threshold:
+            Particles per screen pixel above which the particles are drawn
+            as a density image instead of individual markers.
         """
         super().__init__(keys="interactive", bgcolor="black", size=canvas_size)
         self.unfreeze()  # set attributes on a frozen VisPy object
 
         self.game = game
         self.dt = float(dt)
+        self.world_width = float(world_width)
+        self.world_height = float(world_height)
+        self.lod_threshold = float(lod_threshold)
 
         # ----- Scene + camera -----
         self.view = self.central_widget.add_view()
         self.view.camera = scene.PanZoomCamera(aspect=None)
-        self.view.camera.interactive = False  # disable mouse zoom/pan
+        self.view.camera.interactive = True  # mouse wheel zooms, drag pans
         self.view.camera.rect = (0, 0, world_width, world_height)
 
         # ----- Motion shadow storage -----
-        # Array of a few previous positions for the afterimage creation.
-        self.history: deque[np.ndarray] = deque(maxlen=int(shadow_len))
+        # (positions, colors) of the visible particles in a few previous
+        # frames for the afterimage creation.
+        self.history: deque[tuple[np.ndarray, np.ndarray]] = deque(maxlen=int(shadow_len))
+
+        # Last drawn snapshot, redrawn when the camera moves while paused.
+        self._last_snap = None
+
+        # Number of particles uploaded as markers in the last frame (0 when
+        # the density image is drawn instead).
+        self.visible_count = 0
         
         # ----- Visuals -----
         # Shadow layer (draw first).
@@ -109,17 +283,34 @@ class ParticleCanvas(scene.SceneCanvas):
         )
         self.markers.set_gl_state(blend=False, depth_test=False)
 
+        # Density image for the level-of-detail mode (many particles per pixel).
+        self.density = scene.Image(
+            np.zeros((1, 1, 4), dtype=np.float32),
+            parent=self.view.scene,
+            interpolation="nearest",
+        )
+        self.density.visible = False
+        self.density.order = 2
+
         # Draw an initial frame. 
         snap = self.game.step(0.0)
         self.draw_snapshot(snap)
 
+        # Zooming or panning changes the culled set: drop the trail and redraw.
+        self.view.camera.transform.changed.connect(self._on_camera_changed)
+
         self.freeze()  # prevents accidental attribute creation later
 
+    def _on_camera_changed(self, event) -> None:
+        self.history.clear()
+        if self._last_snap is not None:
+            self.draw_snapshot(self._last_snap)
+
     def draw_snapshot(self, snap: dict) -> None:
         """
         Render a single snapshot from the simulation.
 
-        Expected snap format:
+        Expected snap format (e.g. a Snapshot from Game.step):
             {"pos": (n, 2) array-like, "types": (n,) array-like ints}
         """
         # Current particle positions (float32 for the GPU).
@@ -127,54 +318,145 @@ class ParticleCanvas(scene.SceneCanvas):
 
         # Current particle types (backend provides int 0..3).
         types = np.asarray(snap["types"], dtype=np.int32)
+        self._last_snap = snap
+
+        # ----- Level of detail: density image for very large N -----
+        if self.particles_per_pixel(len(pos)) > self.lod_threshold:
+            self.draw_density(pos, types)
+            self.visible_count = 0
+            return
 
-        # Per-particle RGBA colors.
-        colors = types_to_colors(types)
+        self.density.visible = False
+        self.markers.visible = True
+
+        # ----- View culling: only particles in cells on screen are uploaded -----
+        with tracing.span("cull", "render"):
+            index, pos = self.cull(pos)
+            colors = types_to_colors(types[index])
+            self.visible_count = len(index)
 
         # ----- Build / update motion shadow -----
-        self.history.append(pos.copy())
-        k = len(self.history)
-        n = len(pos)
-
-        if k < 2: 
-            # not enough history for a shadow
-            self.blur.visible = False
-        else:
-            self.blur.visible = True
-
-            # Combine all saved position frames (oldest -> newest) into one big array: (k*n, 2)
-            blur_pos = np.vstack(self.history).astype(np.float32, copy=False)
-
-            # Duplicate the current colors per-particle for each stored frame: (k*n, 4)
-            blur_col = np.tile(colors, (k, 1)).astype(np.float32, copy=False)
-
-            # Apply an alpha gradient so older frames for more transparency
-            alphas = np.linspace(0.02, 0.12, k, dtype=np.float32)
-            for i, a in enumerate(alphas):
-                blur_col[i * n:(i + 1) * n, 3] = a
-
-            # Slightly larger afterimage layer to create a soft motion shadow
-            self.blur.set_data(
-                pos=blur_pos,
-                face_color=blur_col,
-                size=10.0,
+        with tracing.span("history", "render"):
+            # The culled arrays are new per frame, no copy needed
+            self.history.append((pos, colors))
+            k = len(self.history)
+
+            if k >= 2:
+                # Combine all saved frames (oldest -> newest) into one big array
+                blur_pos = np.vstack([p for p, _ in self.history])
+                blur_col = np.vstack([c for _, c in self.history])
+
+                # Apply an alpha gradient so older frames for more transparency
+                alphas = np.linspace(0.02, 0.12, k, dtype=np.float32)
+                start = 0
+                for (p, _), a in zip(self.history, alphas):
+                    blur_col[start:start + len(p), 3] = a
+                    start += len(p)
+
+        with tracing.span("set_data", "render"):
+            if k < 2:
+                # not enough history for a shadow
+                self.blur.visible = False
+            else:
+                self.blur.visible = True
+
+                # Slightly larger afterimage layer to create a soft motion shadow
+                self.blur.set_data(
+                    pos=blur_pos,
+                    face_color=blur_col,
+                    size=10.0,
+                    symbol="disc",
+                )
+
+            # Draw the current particle positions on top 
+            self.markers.set_data(
+                pos=pos,
+                face_color=colors,
+                size=7.0,
                 symbol="disc",
+                edge_width=0.0,
             )
 
-        # Draw the current particle positions on top 
-        self.markers.set_data(
-            pos=pos,
-            face_color=colors,
-            size=7.0,
-            symbol="disc",
-            edge_width=0.0,
+    def visible_rect(self) -> tuple[float, float, float, float]:
+        """Part of the world covered by the camera as (x, y, width, height)."""
+        rect = self.view.camera.rect
+        x0 = max(rect.left, 0.0)
+        y0 = max(rect.bottom, 0.0)
+        x1 = min(rect.right, self.world_width)
+        y1 = min(rect.top, self.world_height)
+        return x0, y0, max(x1 - x0, 0.0), max(y1 - y0, 0.0)
+
+    def cull(self, pos: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Particles in the cells overlapping the camera rectangle, wrapped
+        into view across the world edges (see cull_particles).
+
+        The rectangle is widened by one afterimage marker (10 px), so discs
+        centered just outside the view are still drawn.
+
+        Returns
+        -------
+        tuple
+            (indices into pos, (m, 2) float32 positions in view coordinates).
+        """
+        rect = self.view.camera.rect
+        margin_x = 10.0 * rect.width / max(self.size[0], 1)
+        margin_y = 10.0 * rect.height / max(self.size[1], 1)
+        return cull_particles(
+            pos,
+            rect.left - margin_x,
+            rect.bottom - margin_y,
+            rect.right + margin_x,
+            rect.top + margin_y,
+            self.world_width,
+            self.world_height,
+            CULL_CELLS,
+        )
+
+    def particles_per_pixel(self, n: int) -> float:
+        """Estimated particles per screen pixel for n uniformly spread particles."""
+        _, _, width, height = self.visible_rect()
+        visible = n * width * height / (self.world_width * self.world_height)
+        pixels = max(self.size[0] * self.size[1], 1)
+        return visible / pixels
+
+    def draw_density(self, pos: np.ndarray, types: np.ndarray) -> None:
+        """
+        Render the particles as one density image of the visible world region.
+
+        The image has the resolution of the canvas, so the upload does not
+        grow with the number of particles.
+        """
+        x0, y0, width, height = self.visible_rect()
+        res_x, res_y = max(int(self.size[0]), 1), max(int(self.size[1]), 1)
+        if width <= 0.0 or height <= 0.0:
+            return
+
+        image = density_image(pos, types, COLOR_TYPE, x0, y0, width, height, res_x, res_y)
+        self.density.set_data(image)
+        self.density.transform = STTransform(
+            scale=(width / res_x, height / res_y),
+            translate=(x0, y0),
         )
 
+        # History of marker positions is meaningless in density mode.
+        self.history.clear()
+        self.density.visible = True
+        self.markers.visible = False
+        self.blur.visible = False
+
     def step_and_draw(self) -> None:
         """Step the simulation forward by dt, then render the new state.
 
         Intended to be called repeatedly to animate the system.
         """
-        snap = self.game.step(self.dt)
-        self.draw_snapshot(snap)
-        self.update()
+        with tracing.span("tick", "gui"):
+            snap = self.game.step(self.dt)
+            with tracing.span("draw_snapshot", "render"):
+                self.draw_snapshot(snap)
+            self.update()
+
+    def on_draw(self, event) -> None:
+        """Draw the scene (GPU upload and rendering), traced as "canvas.draw"."""
+        with tracing.span("canvas.draw", "render"):
+            super().on_draw(event)
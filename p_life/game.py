@@ -1,30 +1,154 @@
+import sys
+import time
+from collections.abc import Mapping
+from functools import lru_cache
+
 import numpy as np
-from numba import njit, prange
+from numba import config, from_dtype, get_num_threads, njit, prange, set_num_threads
+from numba import types as nb_types
+
+try:
+    from . import tracing
+    from .spatial import query_knn_cells, query_radius_batch_cells, query_radius_cells, query_rect_cells
+except ImportError:
+    import tracing
+    from spatial import query_knn_cells, query_radius_batch_cells, query_radius_cells, query_rect_cells
+
+
+# Canonical argument types of the kernels. update_particles and Game keep
+# their arrays in these dtypes, so every call hits the same compiled (and
+# cached) specialization instead of triggering a new compile.
+INT = from_dtype(np.dtype(int))
+FLOAT_2D = nb_types.float32[:, ::1]
+INT_1D = nb_types.Array(INT, 1, "C")
+FORCE_KERNEL_SIGNATURE = (
+    FLOAT_2D,  # sorted_pos
+    INT_1D,  # sorted_types
+    INT_1D,  # cell_starts
+    INT_1D,  # cell_counts
+    nb_types.int64,  # cols
+    nb_types.int64,  # rows
+    FLOAT_2D,  # interaction_matrix
+    nb_types.float64,  # r_max
+    nb_types.float64,  # world_width
+    nb_types.float64,  # world_height
+)
+
+
+# Orders of the cells along which the particles are sorted (see cell_layout)
+CELL_ORDERS = ("row", "morton", "hilbert")
+
+
+def _morton_codes(x, y):
+
+    """Z-order codes: the bits of x and y interleaved."""
+
+    codes = np.zeros(len(x), dtype=np.int64)
+    for bit in range(32):
+        codes |= ((x >> bit) & 1) << (2 * bit)
+        codes |= ((y >> bit) & 1) << (2 * bit + 1)
+    return codes
+
+
+def _hilbert_codes(x, y):
+
+    """Distances along the Hilbert curve of the power-of-two square that covers the grid."""
+
+    side = 1
+    while side < max(int(x.max()), int(y.max())) + 1:
+        side *= 2
+
+    x, y = x.copy(), y.copy()
+    codes = np.zeros(len(x), dtype=np.int64)
+    s = side // 2
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        codes += s * s * ((3 * rx) ^ ry)
+
+        # Rotate the quadrant so the curve stays continuous
+        flip = ~ry & rx
+        x = np.where(flip, side - 1 - x, x)
+        y = np.where(flip, side - 1 - y, y)
+        x, y = np.where(~ry, y, x), np.where(~ry, x, y)
+        s //= 2
+    return codes
 
 
-def regroup_particles_in_cells(pos, velocities, types, world_width, world_height, r_max):
+@lru_cache(maxsize=32)
+def cell_layout(cols, rows, order="morton"):
 
     """
-    Divides the world into a grid of cells for efficient neighbor search.
-    
-    This function partitions the simulation space into a regular grid where each cell
-    has dimensions approximately r_max x r_max. Particles are then sorted by their
-    cell assignment, which enables fast lookup of nearby particles during force
-    calculations.
-    
+    Position of every cell along a space-filling curve and its neighbor table.
+
+    Sorting the particles by the curve position of their cell (instead of the
+    row-major cell ID) keeps the cells of the 3x3 stencil close together in
+    memory, and consecutive cells (prange chunks) form compact blocks instead
+    of thin rows. Grids that are not power-of-two squares simply skip the
+    unused curve positions. The result is cached per grid.
+
+    Arguments:
+        cols (int): Number of grid columns
+        rows (int): Number of grid rows
+        order (str): "row" (row-major, the default of sort_into_cells),
+            "morton" (Z-order) or "hilbert"
+
+    Returns:
+        tuple: Contains the following (read-only) elements:
+            - rank (np.ndarray): Curve position of each row-major cell ID
+            - neighbors (np.ndarray): Curve positions of the distinct cells of
+              the 3x3 stencil of each curve position, ascending, shape
+              (cols * rows, k) with k <= 9
+    """
+
+    if order not in CELL_ORDERS:
+        raise ValueError(f"Unknown cell order {order!r}")
+
+    cell_ids = np.arange(cols * rows, dtype=np.int64)
+    cell_x = cell_ids % cols
+    cell_y = cell_ids // cols
+
+    if order == "row":
+        rank = cell_ids
+    else:
+        codes = _morton_codes(cell_x, cell_y) if order == "morton" else _hilbert_codes(cell_x, cell_y)
+        rank = np.empty_like(cell_ids)
+        rank[np.argsort(codes, kind="stable")] = cell_ids
+
+    # Same stencil as calculate_forces: -1..1 per axis, without the offsets
+    # that wrap onto the same cell on grids with fewer than three cells
+    offsets = [(dx, dy) for dy in range(-1, min(3, rows) - 1) for dx in range(-1, min(3, cols) - 1)]
+    stencil = np.stack(
+        [(cell_x + dx) % cols + ((cell_y + dy) % rows) * cols for dx, dy in offsets], axis=1
+    )
+    neighbors = np.empty_like(stencil)
+    neighbors[rank] = np.sort(rank[stencil], axis=1)
+
+    rank.setflags(write=False)
+    neighbors.setflags(write=False)
+    return rank, neighbors
+
+
+def sort_into_cells(pos, world_width, world_height, r_max, order="row"):
+
+    """
+    Computes the cell grid of the particle positions without moving any data.
+
+    The world is divided into cols x rows cells of at least r_max x r_max and
+    the particles are ordered by their (row-major) cell ID.
+
     Arguments:
         pos (np.ndarray): Particle positions, shape (N, 2) with [x, y] coordinates
-        velocities (np.ndarray): Particle velocities, shape (N, 2)
-        types (np.ndarray): Particle type indices, shape (N,)
         world_width (float): Width of the simulation world
         world_height (float): Height of the simulation world
         r_max (float): Maximum interaction radius (defines cell size)
-    
+        order (str): Cell order, see cell_layout. With an order other than
+            "row" the cells (and cell_starts, cell_counts) are numbered by
+            their curve position, for calculate_forces_ordered
+
     Returns:
         tuple: Contains the following elements:
-            - sorted_pos (np.ndarray): Positions sorted by cell ID
-            - sorted_vel (np.ndarray): Velocities sorted by cell ID
-            - sorted_types (np.ndarray): Types sorted by cell ID
+            - sort_indices (np.ndarray): Indices that sort the particles by cell ID
             - cell_starts (np.ndarray): Start index of each cell in sorted arrays
             - cell_counts (np.ndarray): Number of particles in each cell
             - cols (int): Number of grid columns
@@ -45,13 +169,10 @@ def regroup_particles_in_cells(pos, velocities, types, world_width, world_height
     grid_y = np.clip(grid_y, 0, rows - 1)
 
     cell_ids = grid_x + (grid_y * cols)  # 2D cell ID in 1D cell ID
+    if order != "row":
+        cell_ids = cell_layout(cols, rows, order)[0][cell_ids]  # position along the curve
 
     sort_indices = np.argsort(cell_ids)  # indices that sort
-
-    # Sort arrays with indices that put values in order
-    sorted_pos = pos[sort_indices]
-    sorted_vel = velocities[sort_indices]
-    sorted_types = types[sort_indices]
     sorted_cell_ids = cell_ids[sort_indices]
 
     total_cells = cols * rows  # calculate max cells
@@ -69,9 +190,160 @@ def regroup_particles_in_cells(pos, velocities, types, world_width, world_height
     cell_starts[unique_ids] = unique_starts
     cell_counts[unique_ids] = unique_counts
 
+    return sort_indices, cell_starts, cell_counts, cols, rows
+
+
+def regroup_particles_in_cells(pos, velocities, types, world_width, world_height, r_max, order="row"):
+
+    """
+    Divides the world into a grid of cells for efficient neighbor search.
+    
+    This function partitions the simulation space into a regular grid where each cell
+    has dimensions approximately r_max x r_max. Particles are then sorted by their
+    cell assignment, which enables fast lookup of nearby particles during force
+    calculations.
+    
+    Arguments:
+        pos (np.ndarray): Particle positions, shape (N, 2) with [x, y] coordinates
+        velocities (np.ndarray): Particle velocities, shape (N, 2)
+        types (np.ndarray): Particle type indices, shape (N,)
+        world_width (float): Width of the simulation world
+        world_height (float): Height of the simulation world
+        r_max (float): Maximum interaction radius (defines cell size)
+        order (str): Cell order, see sort_into_cells
+    
+    Returns:
+        tuple: Contains the following elements:
+            - sorted_pos (np.ndarray): Positions sorted by cell ID
+            - sorted_vel (np.ndarray): Velocities sorted by cell ID
+            - sorted_types (np.ndarray): Types sorted by cell ID
+            - cell_starts (np.ndarray): Start index of each cell in sorted arrays
+            - cell_counts (np.ndarray): Number of particles in each cell
+            - cols (int): Number of grid columns
+            - rows (int): Number of grid rows
+    """
+
+    sort_indices, cell_starts, cell_counts, cols, rows = sort_into_cells(
+        pos, world_width, world_height, r_max, order
+    )
+
+    # Sort arrays with indices that put values in order
+    sorted_pos = pos[sort_indices]
+    sorted_vel = velocities[sort_indices]
+    sorted_types = types[sort_indices]
+
     return sorted_pos, sorted_vel, sorted_types, cell_starts, cell_counts, cols, rows
 
 
+# Time step for which `friction` is the velocity factor per step and
+# `noise_strength` the noise per step (the default dt of Game.step)
+REFERENCE_DT = 0.01
+
+# Distance (as fraction of r_max) below which the force law is the stiff
+# repulsion; the multiple-timestep integrator splits the forces here
+RESPA_CUTOFF = 0.3
+
+
+def _kernel_inputs(pos, vel, types, matrix):
+
+    """
+    Converts the particle arrays to the canonical kernel dtypes
+    (see FORCE_KERNEL_SIGNATURE), without copying if they already match.
+    """
+
+    return (
+        np.asarray(pos, dtype=np.float32),
+        np.asarray(vel, dtype=np.float32),
+        np.asarray(types, dtype=int),
+        np.ascontiguousarray(matrix, dtype=np.float32),
+    )
+
+
+def friction_decay(friction, dt):
+
+    """
+    Velocity factor of an exact exponential decay over dt.
+
+    `friction` is the factor per REFERENCE_DT, so friction_decay(friction,
+    REFERENCE_DT) == friction and the damping per simulated second no longer
+    depends on the step size.
+
+    Arguments:
+        friction (float): Velocity factor per REFERENCE_DT (0-1)
+        dt (float): Time step
+
+    Returns:
+        float: Velocity factor for a step of size dt
+    """
+
+    return friction ** (dt / REFERENCE_DT)
+
+
+def _lap(stats, phase, start):
+
+    """
+    Adds the time since start to stats[phase] (if stats is given), records it
+    as a trace event (if tracing is on) and returns the current time.
+    """
+
+    now = time.perf_counter()
+    if stats is not None:
+        stats[phase] = stats.get(phase, 0.0) + (now - start)
+    tracing.complete(phase, "sim", start, now)
+    return now
+
+
+def _record_cells(stats, cell_counts):
+
+    """Stores the occupancy of a cell grid in stats (if given)."""
+
+    if stats is not None and len(cell_counts):
+        stats["cells"] = len(cell_counts)
+        stats["max_cell_occupancy"] = int(cell_counts.max())
+        stats["mean_cell_occupancy"] = float(cell_counts.mean())
+
+
+def _cell_forces(force_kernel, cell_order, sorted_pos, sorted_types, cell_starts, cell_counts, cols, rows,
+                 matrix, r_max, world_width, world_height):
+
+    """
+    Runs the force kernel for a grid from sort_into_cells; grids in a
+    space-filling-curve order use calculate_forces_ordered instead.
+    """
+
+    if cell_order == "row":
+        return force_kernel(
+            sorted_pos, sorted_types, cell_starts, cell_counts, cols, rows,
+            matrix, r_max, world_width, world_height,
+        )
+    return calculate_forces_ordered(
+        sorted_pos, sorted_types, cell_starts, cell_counts, cell_layout(cols, rows, cell_order)[1],
+        matrix, r_max, world_width, world_height,
+    )
+
+
+def _integrate(pos, vel, forces, noise, dt, friction, types, n_types, world_width, world_height, telemetry):
+
+    """Runs integrate_euler in place and fills the telemetry dict if one is given."""
+
+    stats = integrate_euler(
+        pos,
+        vel,
+        np.ascontiguousarray(forces, dtype=np.float32),
+        np.ascontiguousarray(noise, dtype=np.float64),
+        float(dt),
+        float(friction),
+        types,
+        n_types,
+        world_width,
+        world_height,
+        get_num_threads(),
+        telemetry is not None,
+    )
+    if telemetry is not None:
+        telemetry.update(telemetry_from_stats(stats, world_width, world_height))
+
+
 def update_particles(
     pos, 
     vel, 
@@ -83,6 +355,11 @@ def update_particles(
     friction, 
     noise_strength, 
     matrix,
+    force_kernel=None,
+    telemetry=None,
+    stats=None,
+    cell_order="row",
+    cell_size=None,
 ):
 
     """
@@ -103,18 +380,42 @@ def update_particles(
         friction (float): Friction coefficient (0-1), reduces velocity each step
         noise_strength (float): Standard deviation of random noise added to velocity
         matrix (np.ndarray): Interaction matrix defining forces between particle types
+        force_kernel (callable, optional): Force kernel with the signature of
+            calculate_forces (e.g. an entry of FORCE_KERNELS). Defaults to calculate_forces.
+        telemetry (dict, optional): Filled with the telemetry_from_stats
+            quantities of the new state, computed within the integration pass
+        stats (dict, optional): Seconds spent per phase ("binning", "forces",
+            "integrate") are added to it, and the cell occupancy of the grid
+            ("cells", "max_cell_occupancy", "mean_cell_occupancy") is stored
+        cell_order (str): Order of the cells and particles, see cell_layout;
+            other orders than "row" compute the forces with
+            calculate_forces_ordered instead of force_kernel
+        cell_size (float, optional): Cell size of the grid, at least r_max.
+            Defaults to r_max.
     
     Returns:
         tuple: Updated (positions, velocities, types) after one simulation step
     """
+
+    if force_kernel is None:
+        force_kernel = calculate_forces
+
+    pos, vel, types, matrix = _kernel_inputs(pos, vel, types, matrix)
+    world_width, world_height, r_max = float(world_width), float(world_height), float(r_max)
+    grid_size = r_max if cell_size is None else max(float(cell_size), r_max)
+    start = time.perf_counter()
     
     # Calculate grids
     sorted_pos, sorted_vel, sorted_types, cell_starts, cell_counts, cols, rows = (
-        regroup_particles_in_cells(pos, vel, types, world_width, world_height, r_max)
+        regroup_particles_in_cells(pos, vel, types, world_width, world_height, grid_size, cell_order)
     )
+    start = _lap(stats, "binning", start)
+    _record_cells(stats, cell_counts)
 
     # Calculate forces
-    forces = calculate_forces(
+    forces = _cell_forces(
+        force_kernel,
+        cell_order,
         sorted_pos, 
         sorted_types, 
         cell_starts, 
@@ -126,22 +427,370 @@ def update_particles(
         world_width, 
         world_height,
     )
+    start = _lap(stats, "forces", start)
 
     noise = np.random.normal(0.0, noise_strength, size=sorted_vel.shape)
 
-    # Calculate new velocity
-    sorted_vel += forces * dt
-    sorted_vel += noise
-    sorted_vel *= friction
-
-    # Update position
-    sorted_pos += sorted_vel * dt
+    # Calculate new velocity and update position in one pass
+    _integrate(sorted_pos, sorted_vel, forces, noise, dt, friction, sorted_types, len(matrix),
+               world_width, world_height, telemetry)
+    _lap(stats, "integrate", start)
 
     # Output containing: position, velocity and types
     return sorted_pos, sorted_vel, sorted_types
 
 
-@njit
+def update_particles_exp_euler(
+    pos,
+    vel,
+    types,
+    world_width,
+    world_height,
+    r_max,
+    dt,
+    friction,
+    noise_strength,
+    matrix,
+    force_kernel=None,
+    telemetry=None,
+    stats=None,
+    cell_order="row",
+    cell_size=None,
+):
+
+    """
+    Semi-implicit Euler step with friction as exact exponential decay.
+
+    Same update as update_particles, but friction and noise are rescaled to
+    the step size: the velocity decays by friction_decay(friction, dt) and
+    the noise has standard deviation noise_strength * sqrt(dt / REFERENCE_DT).
+    At dt == REFERENCE_DT both integrators are identical; for other step
+    sizes this one keeps the damping and diffusion per simulated second.
+
+    Arguments:
+        Same as update_particles.
+
+    Returns:
+        tuple: Updated (positions, velocities, types) after one simulation step
+    """
+
+    if force_kernel is None:
+        force_kernel = calculate_forces
+
+    pos, vel, types, matrix = _kernel_inputs(pos, vel, types, matrix)
+    world_width, world_height, r_max = float(world_width), float(world_height), float(r_max)
+    grid_size = r_max if cell_size is None else max(float(cell_size), r_max)
+    start = time.perf_counter()
+
+    sorted_pos, sorted_vel, sorted_types, cell_starts, cell_counts, cols, rows = (
+        regroup_particles_in_cells(pos, vel, types, world_width, world_height, grid_size, cell_order)
+    )
+    start = _lap(stats, "binning", start)
+    _record_cells(stats, cell_counts)
+
+    forces = _cell_forces(
+        force_kernel,
+        cell_order,
+        sorted_pos,
+        sorted_types,
+        cell_starts,
+        cell_counts,
+        cols,
+        rows,
+        matrix,
+        r_max,
+        world_width,
+        world_height,
+    )
+    start = _lap(stats, "forces", start)
+
+    noise_scale = noise_strength * np.sqrt(dt / REFERENCE_DT)
+    noise = np.random.normal(0.0, noise_scale, size=sorted_vel.shape)
+
+    _integrate(sorted_pos, sorted_vel, forces, noise, dt, friction_decay(friction, dt), sorted_types,
+               len(matrix), world_width, world_height, telemetry)
+    _lap(stats, "integrate", start)
+
+    return sorted_pos, sorted_vel, sorted_types
+
+
+def update_particles_verlet(
+    pos,
+    vel,
+    acc,
+    types,
+    world_width,
+    world_height,
+    r_max,
+    dt,
+    friction,
+    noise_strength,
+    matrix,
+    force_kernel=None,
+    telemetry=None,
+    stats=None,
+    cell_order="row",
+    cell_size=None,
+):
+
+    """
+    Velocity Verlet step with exponential friction and scaled noise.
+
+    Positions are advanced with the forces of the previous step
+    (x += v dt + a dt^2 / 2), the forces are evaluated once at the new
+    positions and the velocity is kicked with the mean of old and new forces.
+    Friction (friction_decay) and noise (scaled like in
+    update_particles_exp_euler) act on the velocity afterwards. The new forces
+    are returned so the next step does not have to recompute them.
+
+    Arguments:
+        pos (np.ndarray): Current particle positions, shape (N, 2)
+        vel (np.ndarray): Current particle velocities, shape (N, 2)
+        acc (np.ndarray or None): Forces at pos from the previous step, shape
+            (N, 2), or None to compute them first
+        types (np.ndarray): Particle type indices, shape (N,)
+        world_width, world_height, r_max, dt, friction, noise_strength, matrix,
+        force_kernel, telemetry, stats, cell_order, cell_size: Same as update_particles
+
+    Returns:
+        tuple: Updated (positions, velocities, forces, types), sorted by cell
+            and wrapped into the world
+    """
+
+    if force_kernel is None:
+        force_kernel = calculate_forces
+
+    pos, vel, types, matrix = _kernel_inputs(pos, vel, types, matrix)
+    world_width, world_height, r_max = float(world_width), float(world_height), float(r_max)
+    grid_size = r_max if cell_size is None else max(float(cell_size), r_max)
+    start = time.perf_counter()
+
+    if acc is None:
+        sort_indices, cell_starts, cell_counts, cols, rows = sort_into_cells(
+            pos, world_width, world_height, grid_size, cell_order
+        )
+        sorted_forces = _cell_forces(
+            force_kernel,
+            cell_order,
+            np.ascontiguousarray(pos[sort_indices]),
+            types[sort_indices],
+            cell_starts,
+            cell_counts,
+            cols,
+            rows,
+            matrix,
+            r_max,
+            world_width,
+            world_height,
+        )
+        acc = np.empty_like(sorted_forces)
+        acc[sort_indices] = sorted_forces
+        start = _lap(stats, "forces", start)
+
+    # Drift with the old forces; wrap before binning the new positions
+    new_pos = pos + vel * dt + acc * (0.5 * dt * dt)
+    new_pos[:, 0] = np.mod(new_pos[:, 0], world_width)
+    new_pos[:, 1] = np.mod(new_pos[:, 1], world_height)
+    start = _lap(stats, "integrate", start)
+
+    sort_indices, cell_starts, cell_counts, cols, rows = sort_into_cells(
+        new_pos, world_width, world_height, grid_size, cell_order
+    )
+    sorted_pos = new_pos[sort_indices]
+    sorted_vel = vel[sort_indices]
+    sorted_acc = acc[sort_indices]
+    sorted_types = types[sort_indices]
+    start = _lap(stats, "binning", start)
+    _record_cells(stats, cell_counts)
+
+    new_acc = _cell_forces(
+        force_kernel,
+        cell_order,
+        sorted_pos,
+        sorted_types,
+        cell_starts,
+        cell_counts,
+        cols,
+        rows,
+        matrix,
+        r_max,
+        world_width,
+        world_height,
+    )
+    start = _lap(stats, "forces", start)
+
+    # Kick with the mean of old and new forces, then friction and noise; the
+    # same pass collects the telemetry
+    noise = np.random.normal(0.0, noise_strength * np.sqrt(dt / REFERENCE_DT), size=sorted_vel.shape)
+    partials = kick_verlet(
+        sorted_pos,
+        sorted_vel,
+        np.ascontiguousarray(sorted_acc, dtype=np.float32),
+        np.ascontiguousarray(new_acc, dtype=np.float32),
+        noise,
+        float(dt),
+        float(friction_decay(friction, dt)),
+        sorted_types,
+        len(matrix),
+        world_width,
+        world_height,
+        get_num_threads(),
+        telemetry is not None,
+    )
+    if telemetry is not None:
+        telemetry.update(telemetry_from_stats(partials, world_width, world_height))
+    _lap(stats, "integrate", start)
+
+    return sorted_pos, sorted_vel, new_acc, sorted_types
+
+
+def update_particles_respa(
+    pos,
+    vel,
+    types,
+    world_width,
+    world_height,
+    r_max,
+    dt,
+    friction,
+    noise_strength,
+    matrix,
+    substeps=4,
+    telemetry=None,
+    stats=None,
+):
+
+    """
+    Multiple-timestep (r-RESPA style) step of size dt.
+
+    The smooth matrix force (calculate_matrix_forces, full r_max radius) is
+    evaluated once on the r_max grid and held constant over the step. The
+    stiff short-range repulsion (calculate_repulsion_forces) is sub-cycled
+    `substeps` times with dt / substeps on a finer grid with cells of
+    RESPA_CUTOFF * r_max, which is much cheaper to scan. Friction and noise
+    are applied per sub-step like in update_particles_exp_euler.
+
+    Arguments:
+        pos, vel, types, world_width, world_height, r_max, friction,
+        noise_strength, matrix, telemetry, stats: Same as update_particles
+            (the cell occupancy is the one of the r_max grid)
+        dt (float): Outer time step (one matrix force evaluation)
+        substeps (int): Number of repulsion sub-steps per outer step
+
+    Returns:
+        tuple: Updated (positions, velocities, types), sorted by the fine grid
+            and wrapped into the world
+    """
+
+    pos, vel, types, matrix = _kernel_inputs(pos, vel, types, matrix)
+    world_width, world_height, r_max = float(world_width), float(world_height), float(r_max)
+
+    start = time.perf_counter()
+
+    # Slow force: once per outer step on the full-radius grid
+    sort_indices, cell_starts, cell_counts, cols, rows = sort_into_cells(pos, world_width, world_height, r_max)
+    pos = pos[sort_indices]
+    vel = vel[sort_indices]
+    types = types[sort_indices]
+    start = _lap(stats, "binning", start)
+    _record_cells(stats, cell_counts)
+
+    slow_forces = calculate_matrix_forces(
+        pos, types, cell_starts, cell_counts, cols, rows, matrix, r_max, world_width, world_height
+    )
+    start = _lap(stats, "forces", start)
+
+    inner_dt = dt / substeps
+    decay = friction_decay(friction, inner_dt)
+    noise_scale = noise_strength * np.sqrt(inner_dt / REFERENCE_DT)
+    fine_cell = RESPA_CUTOFF * r_max
+
+    for substep in range(substeps):
+        # Fast force: every sub-step on the fine grid
+        sort_indices, cell_starts, cell_counts, cols, rows = sort_into_cells(
+            pos, world_width, world_height, fine_cell
+        )
+        pos = pos[sort_indices]
+        vel = vel[sort_indices]
+        types = types[sort_indices]
+        slow_forces = slow_forces[sort_indices]
+        start = _lap(stats, "binning", start)
+
+        fast_forces = calculate_repulsion_forces(
+            pos, types, cell_starts, cell_counts, cols, rows, matrix, r_max, world_width, world_height
+        )
+        start = _lap(stats, "forces", start)
+
+        # Same update as the Euler step; the last sub-step collects the telemetry
+        _integrate(
+            pos, vel, fast_forces + slow_forces, np.random.normal(0.0, noise_scale, size=vel.shape),
+            inner_dt, decay, types, len(matrix), world_width, world_height,
+            telemetry if substep == substeps - 1 else None,
+        )
+
+        # Wrap before the next binning
+        pos[:, 0] = np.mod(pos[:, 0], world_width)
+        pos[:, 1] = np.mod(pos[:, 1], world_height)
+        start = _lap(stats, "integrate", start)
+
+    return pos, vel, types
+
+
+class AdaptiveTimestep:
+
+    """
+    Step size controller based on the largest per-step displacement.
+
+    After every step the largest distance a particle moved is compared with
+    target * r_max: dt shrinks (at least by `shrink`) when particles moved
+    farther, and grows by `grow` while they stay below half of it, always
+    within [dt_min, dt_max]. A calm system therefore gets large steps and a
+    violent one small steps.
+
+    Attributes:
+        dt (float): Step size for the next step
+        dt_min, dt_max (float): Bounds of dt
+        target (float): Allowed displacement per step as fraction of r_max
+        grow (float): Growth factor per calm step
+        shrink (float): Smallest shrink factor per step
+        max_displacement (float): Largest displacement of the last step
+    """
+
+    def __init__(self, dt=REFERENCE_DT, dt_min=0.001, dt_max=0.05, target=0.02, grow=1.1, shrink=0.5):
+        self.dt = float(dt)
+        self.dt_min = float(dt_min)
+        self.dt_max = float(dt_max)
+        self.target = float(target)
+        self.grow = float(grow)
+        self.shrink = float(shrink)
+        self.max_displacement = 0.0
+
+    def update(self, max_displacement, r_max):
+
+        """
+        Adapts dt after a step.
+
+        Args:
+            max_displacement (float): Largest distance a particle moved in the step
+            r_max (float): Maximum interaction radius of the game
+
+        Returns:
+            float: Step size for the next step
+        """
+
+        self.max_displacement = float(max_displacement)
+        limit = self.target * r_max
+
+        if max_displacement > limit:
+            factor = max(self.shrink, limit / max_displacement)
+            self.dt = max(self.dt_min, self.dt * factor)
+        elif max_displacement < 0.5 * limit:
+            self.dt = min(self.dt_max, self.dt * self.grow)
+
+        return self.dt
+
+
+@njit(cache=True)
 def wrap_coordinate(value, max_value):
 
     """
@@ -212,6 +861,12 @@ def calculate_forces(
     half_h = w_height * 0.5
     r_max_sq = r_max * r_max
 
+    # Neighbor offsets per axis: -1..1, but with fewer than three cells in a
+    # row (r_max > world/3) -1 and +1 wrap onto the same cell, so only the
+    # distinct offsets are visited
+    span_x = min(3, cols)
+    span_y = min(3, rows)
+
     # Parallel computing
     # prange for parallel calculation of forces in each cell
     for cell_id in prange(total_cells):
@@ -228,8 +883,8 @@ def calculate_forces(
         cell_y = cell_id // cols
 
         # Loop through neighboring cells
-        for dy in range(-1, 2):
-            for dx in range(-1, 2):
+        for dy in range(-1, span_y - 1):
+            for dx in range(-1, span_x - 1):
                 
                 # Coordinates of the neighboring cell with wrap-around for torus-world
                 neighbor_x = wrap_coordinate(cell_x + dx, cols)
@@ -319,28 +974,1014 @@ def calculate_forces(
     return total_forces
 
 
-class Game:
+@njit(parallel=True, fastmath=True, cache=True)
+def calculate_forces_ordered(
+    sorted_pos,
+    sorted_types,
+    cell_starts,
+    cell_counts,
+    neighbors,
+    interaction_matrix,
+    r_max,
+    world_width,
+    world_height,
+):
 
     """
-    Main simulation class for the Particle Life system.
-    
-    This class manages the particle simulation, including initialization of particles,
-    their positions, velocities, types, and the interaction matrix that defines
-    how different particle types attract or repel each other.
-    
-    Attributes:
-        w (float): World width
-        h (float): World height
-        r_max (float): Maximum interaction radius between particles
-        pos (np.ndarray): Current particle positions, shape (N, 2)
-        vel (np.ndarray): Current particle velocities, shape (N, 2)
-        types (np.ndarray): Particle type indices, shape (N,)
-        friction (float): Friction coefficient applied to velocities each step
-        noise_strength (float): Standard deviation of random noise added each step
+    Same forces as calculate_forces for particles sorted along a space-filling
+    curve (sort_into_cells with order "morton" or "hilbert").
+
+    The cells are visited in curve order, so the cells of one prange chunk
+    form a compact block, and the stencil comes from the precomputed table of
+    cell_layout instead of row-major index arithmetic.
+
+    Arguments:
+        sorted_pos, sorted_types, cell_starts, cell_counts: As calculate_forces,
+            with the cells numbered by their curve position
+        neighbors (np.ndarray): Neighbor table of cell_layout, shape (cells, k)
+        interaction_matrix, r_max, world_width, world_height: As calculate_forces
+
+    Returns:
+        np.ndarray: Array of force vectors, shape (N, 2), with [fx, fy] for each particle
+    """
+
+    total_forces = np.zeros((len(sorted_pos), 2), dtype=np.float32)
+
+    inv_r_max = np.float32(1.0 / r_max)
+    beta = np.float32(0.3)
+    inv_beta = np.float32(1.0 / beta)
+    inv_one_minus_beta = np.float32(1.0 / (1.0 - beta))
+    repulsion_strength = np.float32(2.0)
+
+    w_width = np.float32(world_width)
+    w_height = np.float32(world_height)
+    half_w = w_width * 0.5
+    half_h = w_height * 0.5
+    r_max_sq = r_max * r_max
+    n_neighbors = neighbors.shape[1]
+
+    for cell_id in prange(len(cell_counts)):
+        count_in_my_cell = cell_counts[cell_id]
+        if count_in_my_cell == 0:
+            continue
+        start_i = cell_starts[cell_id]
+
+        for k in range(n_neighbors):
+            neighbor_id = neighbors[cell_id, k]
+            count_in_neighbor_cell = cell_counts[neighbor_id]
+            if count_in_neighbor_cell == 0:
+                continue
+            start_index_neighbor = cell_starts[neighbor_id]
+
+            for i_local in range(count_in_my_cell):
+                idx_a = start_i + i_local
+                pos_a = sorted_pos[idx_a]
+                type_a = sorted_types[idx_a]
+                force_x_acc = np.float32(0.0)
+                force_y_acc = np.float32(0.0)
+
+                for j_local in range(count_in_neighbor_cell):
+                    idx_b = start_index_neighbor + j_local
+                    if idx_a == idx_b:
+                        continue
+
+                    rel_x = sorted_pos[idx_b, 0] - pos_a[0]
+                    rel_y = sorted_pos[idx_b, 1] - pos_a[1]
+                    if rel_x > half_w:
+                        rel_x -= w_width
+                    elif rel_x < -half_w:
+                        rel_x += w_width
+                    if rel_y > half_h:
+                        rel_y -= w_height
+                    elif rel_y < -half_h:
+                        rel_y += w_height
+
+                    dist_sq = rel_x * rel_x + rel_y * rel_y
+                    if dist_sq > 0 and dist_sq < r_max_sq:
+                        dist = np.sqrt(dist_sq)
+                        normalized_dist = dist * inv_r_max
+
+                        if normalized_dist < beta:
+                            force_factor = (normalized_dist * inv_beta - 1.0) * repulsion_strength
+                        else:
+                            pct = (normalized_dist - beta) * inv_one_minus_beta
+                            force_factor = interaction_matrix[type_a, sorted_types[idx_b]] * (1.0 - abs(2.0 * pct - 1.0))
+
+                        force_x_acc += (rel_x / dist) * force_factor
+                        force_y_acc += (rel_y / dist) * force_factor
+
+                total_forces[idx_a, 0] += force_x_acc
+                total_forces[idx_a, 1] += force_y_acc
+
+    return total_forces
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def calculate_forces_pair_radii(
+    sorted_pos,
+    sorted_types,
+    cell_starts,
+    cell_counts,
+    cols,
+    rows,
+    interaction_matrix,
+    radii,
+    cell_size,
+    world_width,
+    world_height,
+):
+
+    """
+    Forces of calculate_forces with a cutoff radius per pair of types.
+
+    The force law of a pair (a, b) is the one of calculate_forces with
+    r_max = radii[type_a, type_b]. The grid is sized for the largest radius
+    (cell_size), every pair is rejected early against its own squared cutoff,
+    and a neighbor cell is only scanned if it is closer to particle a than the
+    largest radius of a's type, so short-range types visit fewer cells.
+
+    Arguments:
+        sorted_pos, sorted_types, cell_starts, cell_counts, cols, rows,
+        interaction_matrix, world_width, world_height: As calculate_forces
+        radii (np.ndarray): Cutoff per pair of types, shape (R, R)
+        cell_size (float): Cell size of the grid (r_max of sort_into_cells),
+            at least radii.max()
+
+    Returns:
+        np.ndarray: Array of force vectors, shape (N, 2), with [fx, fy] for each particle
+    """
+
+    total_forces = np.zeros((len(sorted_pos), 2), dtype=np.float32)
+    n_types = radii.shape[0]
+
+    radii_sq = np.empty((n_types, n_types), dtype=np.float32)
+    inv_radii = np.empty((n_types, n_types), dtype=np.float32)
+    reach = np.zeros(n_types, dtype=np.float32)  # largest radius of each type
+    for t in range(n_types):
+        for u in range(n_types):
+            radii_sq[t, u] = radii[t, u] * radii[t, u]
+            inv_radii[t, u] = 1.0 / radii[t, u] if radii[t, u] > 0 else 0.0
+            reach[t] = max(reach[t], radii[t, u])
+
+    beta = np.float32(0.3)
+    inv_beta = np.float32(1.0 / beta)
+    inv_one_minus_beta = np.float32(1.0 / (1.0 - beta))
+    repulsion_strength = np.float32(2.0)
+
+    w_width = np.float32(world_width)
+    w_height = np.float32(world_height)
+    half_w = w_width * 0.5
+    half_h = w_height * 0.5
+    cell = np.float32(cell_size)
+
+    span_x = min(3, cols)
+    span_y = min(3, rows)
+
+    for cell_id in prange(cols * rows):
+        count_in_my_cell = cell_counts[cell_id]
+        if count_in_my_cell == 0:
+            continue
+        start_i = cell_starts[cell_id]
+        cell_x = cell_id % cols
+        cell_y = cell_id // cols
+
+        # Cell bounds (the last cell of a row/column takes the remainder)
+        left = cell_x * cell
+        right = w_width if cell_x == cols - 1 else left + cell
+        bottom = cell_y * cell
+        top = w_height if cell_y == rows - 1 else bottom + cell
+
+        for i_local in range(count_in_my_cell):
+            idx_a = start_i + i_local
+            pos_a = sorted_pos[idx_a]
+            type_a = sorted_types[idx_a]
+            reach_a = reach[type_a]
+
+            # Distance from a to the neighbor cells on each side; with two
+            # cells per axis the other cell is on both sides, with one the
+            # only offset (-1) wraps onto a's own cell
+            gap_left = pos_a[0] - left
+            gap_right = right - pos_a[0]
+            gap_bottom = pos_a[1] - bottom
+            gap_top = top - pos_a[1]
+            if cols == 1:
+                gap_left = np.float32(0.0)
+            elif cols == 2:
+                gap_left = min(gap_left, gap_right)
+            if rows == 1:
+                gap_bottom = np.float32(0.0)
+            elif rows == 2:
+                gap_bottom = min(gap_bottom, gap_top)
+
+            force_x_acc = np.float32(0.0)
+            force_y_acc = np.float32(0.0)
+
+            for dy in range(-1, span_y - 1):
+                gap_y = gap_bottom if dy < 0 else (gap_top if dy > 0 else np.float32(0.0))
+                if gap_y >= reach_a:
+                    continue
+                for dx in range(-1, span_x - 1):
+                    gap_x = gap_left if dx < 0 else (gap_right if dx > 0 else np.float32(0.0))
+                    if gap_x * gap_x + gap_y * gap_y >= reach_a * reach_a:
+                        continue
+
+                    neighbor_id = wrap_coordinate(cell_x + dx, cols) + wrap_coordinate(cell_y + dy, rows) * cols
+                    start_index_neighbor = cell_starts[neighbor_id]
+
+                    for j_local in range(cell_counts[neighbor_id]):
+                        idx_b = start_index_neighbor + j_local
+                        if idx_a == idx_b:
+                            continue
+                        type_b = sorted_types[idx_b]
+
+                        rel_x = sorted_pos[idx_b, 0] - pos_a[0]
+                        rel_y = sorted_pos[idx_b, 1] - pos_a[1]
+                        if rel_x > half_w:
+                            rel_x -= w_width
+                        elif rel_x < -half_w:
+                            rel_x += w_width
+                        if rel_y > half_h:
+                            rel_y -= w_height
+                        elif rel_y < -half_h:
+                            rel_y += w_height
+
+                        dist_sq = rel_x * rel_x + rel_y * rel_y
+                        if dist_sq > 0 and dist_sq < radii_sq[type_a, type_b]:
+                            dist = np.sqrt(dist_sq)
+                            normalized_dist = dist * inv_radii[type_a, type_b]
+
+                            if normalized_dist < beta:
+                                force_factor = (normalized_dist * inv_beta - 1.0) * repulsion_strength
+                            else:
+                                pct = (normalized_dist - beta) * inv_one_minus_beta
+                                force_factor = interaction_matrix[type_a, type_b] * (1.0 - abs(2.0 * pct - 1.0))
+
+                            force_x_acc += (rel_x / dist) * force_factor
+                            force_y_acc += (rel_y / dist) * force_factor
+
+            total_forces[idx_a, 0] = force_x_acc
+            total_forces[idx_a, 1] = force_y_acc
+
+    return total_forces
+
+
+def pair_radii_kernel(radii):
+
+    """
+    Force kernel with per-pair cutoffs for update_particles (force_kernel).
+
+    Wraps calculate_forces_pair_radii into the calculate_forces call
+    signature; the r_max passed by update_particles is used as cell size and
+    must be at least radii.max().
+
+    Arguments:
+        radii (np.ndarray): Cutoff radius per pair of types, shape (R, R)
+
+    Returns:
+        callable: Kernel with the signature of calculate_forces
+    """
+
+    radii = np.ascontiguousarray(radii, dtype=np.float32)
+    largest = float(radii.max())
+
+    def kernel(sorted_pos, sorted_types, cell_starts, cell_counts, cols, rows,
+               interaction_matrix, r_max, world_width, world_height):
+        if r_max < largest * (1.0 - 1e-6):
+            raise ValueError(f"Cell size {r_max} is smaller than the largest pair radius {largest}")
+        return calculate_forces_pair_radii(
+            sorted_pos, sorted_types, cell_starts, cell_counts, cols, rows,
+            interaction_matrix, radii, r_max, world_width, world_height,
+        )
+
+    return kernel
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def calculate_forces_tiled(
+    sorted_pos,
+    sorted_types,
+    cell_starts,
+    cell_counts,
+    cols,
+    rows,
+    interaction_matrix,
+    r_max,
+    world_width,
+    world_height,
+):
+
+    """
+    Branch-free variant of calculate_forces that vectorizes well.
+
+    The sorted positions are split into contiguous float32 x/y blocks (and an
+    int32 type block), so the particles of one cell are adjacent in memory.
+    Each (cell, neighbor cell) pair is then evaluated as a tile whose inner
+    loop has no data-dependent branches: self-interaction, the cutoff and the
+    two regimes of the force law are handled with masks and selects instead
+    of `continue`/`if`. This lets LLVM emit SIMD code (AVX2/AVX-512) for the
+    inner loop.
+
+    Arguments:
+        Same as calculate_forces.
+
+    Returns:
+        np.ndarray: Array of force vectors, shape (N, 2), with [fx, fy] for each particle
+    """
+
+    n = len(sorted_pos)
+
+    # Structure of arrays: contiguous x, y and type blocks
+    xs = np.empty(n, dtype=np.float32)
+    ys = np.empty(n, dtype=np.float32)
+    ts = np.empty(n, dtype=np.int32)
+    for i in prange(n):
+        xs[i] = sorted_pos[i, 0]
+        ys[i] = sorted_pos[i, 1]
+        ts[i] = sorted_types[i]
+
+    total_forces = np.zeros((n, 2), dtype=np.float32)
+    total_cells = cols * rows
+
+    # Keep every constant in float32 so the vector lanes stay 32 bit wide
+    zero = np.float32(0.0)
+    one = np.float32(1.0)
+    two = np.float32(2.0)
+    half = np.float32(0.5)
+
+    r_max_32 = np.float32(r_max)
+    inv_r_max = np.float32(1.0 / r_max)
+    r_max_sq = r_max_32 * r_max_32
+
+    beta = np.float32(0.3)
+    inv_beta = np.float32(1.0 / beta)
+    inv_one_minus_beta = np.float32(1.0 / (1.0 - beta))
+    repulsion_strength = np.float32(2.0)
+    repulsion_threshold = np.float32(0.3)
+
+    w_width = np.float32(world_width)
+    w_height = np.float32(world_height)
+    inv_w = np.float32(1.0 / world_width)
+    inv_h = np.float32(1.0 / world_height)
+
+    span_x = min(3, cols)  # distinct neighbor offsets, see calculate_forces
+    span_y = min(3, rows)
+
+    for cell_id in prange(total_cells):
+
+        count_a = cell_counts[cell_id]
+        if count_a == 0:
+            continue
+
+        start_a = cell_starts[cell_id]
+        cell_x = cell_id % cols
+        cell_y = cell_id // cols
+
+        for dy in range(-1, span_y - 1):
+            for dx in range(-1, span_x - 1):
+
+                neighbor_x = wrap_coordinate(cell_x + dx, cols)
+                neighbor_y = wrap_coordinate(cell_y + dy, rows)
+                neighbor_id = neighbor_x + neighbor_y * cols
+
+                start_b = cell_starts[neighbor_id]
+                end_b = start_b + cell_counts[neighbor_id]
+
+                # Tile: every particle of cell a against the whole block of cell b
+                for idx_a in range(start_a, start_a + count_a):
+                    x_a = xs[idx_a]
+                    y_a = ys[idx_a]
+                    matrix_row = interaction_matrix[ts[idx_a]]
+
+                    force_x_acc = zero
+                    force_y_acc = zero
+
+                    for idx_b in range(start_b, end_b):
+                        rel_x = xs[idx_b] - x_a
+                        rel_y = ys[idx_b] - y_a
+
+                        # Minimum image convention without branches
+                        rel_x -= w_width * np.floor(rel_x * inv_w + half)
+                        rel_y -= w_height * np.floor(rel_y * inv_h + half)
+
+                        dist_sq = rel_x * rel_x + rel_y * rel_y
+
+                        # Mask for self-interaction (dist 0) and the cutoff
+                        inside = (dist_sq > zero) & (dist_sq < r_max_sq)
+                        safe_sq = dist_sq if inside else r_max_sq
+
+                        inv_dist = one / np.sqrt(safe_sq)
+                        normalized_dist = safe_sq * inv_dist * inv_r_max
+
+                        # Both regimes are evaluated, then one is selected
+                        repulsion = (normalized_dist * inv_beta - one) * repulsion_strength
+                        pct = (normalized_dist - repulsion_threshold) * inv_one_minus_beta
+                        bump = matrix_row[ts[idx_b]] * (one - abs(two * pct - one))
+
+                        force_factor = repulsion if normalized_dist < repulsion_threshold else bump
+                        force_factor = force_factor if inside else zero
+
+                        force_x_acc += rel_x * inv_dist * force_factor
+                        force_y_acc += rel_y * inv_dist * force_factor
+
+                    total_forces[idx_a, 0] += force_x_acc
+                    total_forces[idx_a, 1] += force_y_acc
+
+    return total_forces
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def calculate_repulsion_forces(
+    sorted_pos,
+    sorted_types,
+    cell_starts,
+    cell_counts,
+    cols,
+    rows,
+    interaction_matrix,
+    r_max,
+    world_width,
+    world_height,
+):
+
+    """
+    Calculates only the short-range repulsion of the force law.
+
+    Only pairs closer than RESPA_CUTOFF * r_max contribute, so the grid may
+    use cells of RESPA_CUTOFF * r_max instead of r_max. Together with
+    calculate_matrix_forces this gives exactly calculate_forces.
+
+    Arguments:
+        Same as calculate_forces (interaction_matrix is not used). The cells
+        must be at least RESPA_CUTOFF * r_max wide.
+
+    Returns:
+        np.ndarray: Array of force vectors, shape (N, 2), with [fx, fy] for each particle
+    """
+
+    total_forces = np.zeros((len(sorted_pos), 2), dtype=np.float32)
+    total_cells = cols * rows
+
+    inv_r_max = np.float32(1.0 / r_max)
+    inv_beta = np.float32(1.0 / RESPA_CUTOFF)
+    repulsion_strength = np.float32(2.0)
+    cutoff = np.float32(RESPA_CUTOFF * r_max)
+    cutoff_sq = cutoff * cutoff
+
+    w_width = np.float32(world_width)
+    w_height = np.float32(world_height)
+    half_w = w_width * 0.5
+    half_h = w_height * 0.5
+
+    span_x = min(3, cols)  # distinct neighbor offsets, see calculate_forces
+    span_y = min(3, rows)
+
+    for cell_id in prange(total_cells):
+
+        count_a = cell_counts[cell_id]
+        if count_a == 0:
+            continue
+
+        start_a = cell_starts[cell_id]
+        cell_x = cell_id % cols
+        cell_y = cell_id // cols
+
+        for idx_a in range(start_a, start_a + count_a):
+            force_x_acc = np.float32(0.0)
+            force_y_acc = np.float32(0.0)
+
+            for dy in range(-1, span_y - 1):
+                for dx in range(-1, span_x - 1):
+                    neighbor_id = wrap_coordinate(cell_x + dx, cols) + wrap_coordinate(cell_y + dy, rows) * cols
+                    start_b = cell_starts[neighbor_id]
+
+                    for idx_b in range(start_b, start_b + cell_counts[neighbor_id]):
+                        if idx_a == idx_b:
+                            continue
+
+                        rel_x = sorted_pos[idx_b, 0] - sorted_pos[idx_a, 0]
+                        rel_y = sorted_pos[idx_b, 1] - sorted_pos[idx_a, 1]
+
+                        # For torus-world: Shortest distance considering wrap-around
+                        if rel_x > half_w:
+                            rel_x -= w_width
+                        elif rel_x < -half_w:
+                            rel_x += w_width
+                        if rel_y > half_h:
+                            rel_y -= w_height
+                        elif rel_y < -half_h:
+                            rel_y += w_height
+
+                        dist_sq = rel_x * rel_x + rel_y * rel_y
+                        if dist_sq > 0 and dist_sq < cutoff_sq:
+                            dist = np.sqrt(dist_sq)
+                            force_factor = (dist * inv_r_max * inv_beta - 1.0) * repulsion_strength
+                            force_x_acc += (rel_x / dist) * force_factor
+                            force_y_acc += (rel_y / dist) * force_factor
+
+            total_forces[idx_a, 0] = force_x_acc
+            total_forces[idx_a, 1] = force_y_acc
+
+    return total_forces
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def calculate_matrix_forces(
+    sorted_pos,
+    sorted_types,
+    cell_starts,
+    cell_counts,
+    cols,
+    rows,
+    interaction_matrix,
+    r_max,
+    world_width,
+    world_height,
+):
+
+    """
+    Calculates only the matrix ("bump") part of the force law.
+
+    Only pairs between RESPA_CUTOFF * r_max and r_max contribute. Together
+    with calculate_repulsion_forces this gives exactly calculate_forces.
+
+    Arguments:
+        Same as calculate_forces.
+
+    Returns:
+        np.ndarray: Array of force vectors, shape (N, 2), with [fx, fy] for each particle
+    """
+
+    total_forces = np.zeros((len(sorted_pos), 2), dtype=np.float32)
+    total_cells = cols * rows
+
+    inv_r_max = np.float32(1.0 / r_max)
+    inv_one_minus_beta = np.float32(1.0 / (1.0 - RESPA_CUTOFF))
+    repulsion_threshold = np.float32(RESPA_CUTOFF)
+    cutoff = np.float32(RESPA_CUTOFF * r_max)
+    cutoff_sq = cutoff * cutoff
+    r_max_sq = np.float32(r_max) * np.float32(r_max)
+
+    w_width = np.float32(world_width)
+    w_height = np.float32(world_height)
+    half_w = w_width * 0.5
+    half_h = w_height * 0.5
+
+    span_x = min(3, cols)  # distinct neighbor offsets, see calculate_forces
+    span_y = min(3, rows)
+
+    for cell_id in prange(total_cells):
+
+        count_a = cell_counts[cell_id]
+        if count_a == 0:
+            continue
+
+        start_a = cell_starts[cell_id]
+        cell_x = cell_id % cols
+        cell_y = cell_id // cols
+
+        for idx_a in range(start_a, start_a + count_a):
+            type_a = sorted_types[idx_a]
+            force_x_acc = np.float32(0.0)
+            force_y_acc = np.float32(0.0)
+
+            for dy in range(-1, span_y - 1):
+                for dx in range(-1, span_x - 1):
+                    neighbor_id = wrap_coordinate(cell_x + dx, cols) + wrap_coordinate(cell_y + dy, rows) * cols
+                    start_b = cell_starts[neighbor_id]
+
+                    for idx_b in range(start_b, start_b + cell_counts[neighbor_id]):
+                        rel_x = sorted_pos[idx_b, 0] - sorted_pos[idx_a, 0]
+                        rel_y = sorted_pos[idx_b, 1] - sorted_pos[idx_a, 1]
+
+                        # For torus-world: Shortest distance considering wrap-around
+                        if rel_x > half_w:
+                            rel_x -= w_width
+                        elif rel_x < -half_w:
+                            rel_x += w_width
+                        if rel_y > half_h:
+                            rel_y -= w_height
+                        elif rel_y < -half_h:
+                            rel_y += w_height
+
+                        dist_sq = rel_x * rel_x + rel_y * rel_y
+                        if dist_sq >= cutoff_sq and dist_sq < r_max_sq:
+                            dist = np.sqrt(dist_sq)
+                            pct = (dist * inv_r_max - repulsion_threshold) * inv_one_minus_beta
+                            shape = 1.0 - abs(2.0 * pct - 1.0)
+                            force_factor = interaction_matrix[type_a, sorted_types[idx_b]] * shape
+                            force_x_acc += (rel_x / dist) * force_factor
+                            force_y_acc += (rel_y / dist) * force_factor
+
+            total_forces[idx_a, 0] = force_x_acc
+            total_forces[idx_a, 1] = force_y_acc
+
+    return total_forces
+
+
+# Layout of the telemetry partials: kinetic energy, speed sum, max speed, then
+# per type: count, sum of cos/sin of the x angle, sum of cos/sin of the y angle
+_STAT_KINETIC = 0
+_STAT_SPEED = 1
+_STAT_MAX_SPEED = 2
+_STAT_TYPES = 3
+_STAT_PER_TYPE = 5
+
+
+@njit(cache=True)
+def _accumulate_stats(partial, vel_x, vel_y, pos_x, pos_y, type_id, angle_x, angle_y):
+
+    """Adds one particle to a row of telemetry partials."""
+
+    speed_sq = vel_x * vel_x + vel_y * vel_y
+    speed = np.sqrt(speed_sq)
+    partial[_STAT_KINETIC] += 0.5 * speed_sq
+    partial[_STAT_SPEED] += speed
+    if speed > partial[_STAT_MAX_SPEED]:
+        partial[_STAT_MAX_SPEED] = speed
+
+    # Positions as angles on the torus, for circular means
+    base = _STAT_TYPES + _STAT_PER_TYPE * type_id
+    partial[base] += 1.0
+    partial[base + 1] += np.cos(pos_x * angle_x)
+    partial[base + 2] += np.sin(pos_x * angle_x)
+    partial[base + 3] += np.cos(pos_y * angle_y)
+    partial[base + 4] += np.sin(pos_y * angle_y)
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def integrate_euler(
+    pos,
+    vel,
+    forces,
+    noise,
+    dt,
+    friction,
+    types,
+    n_types,
+    world_width,
+    world_height,
+    n_chunks,
+    with_stats,
+):
+
+    """
+    Applies forces, noise and friction and moves the particles (in place).
+
+    One fused pass for the semi-implicit Euler step of update_particles:
+        vel = (vel + forces * dt + noise) * friction
+        pos = pos + vel * dt
+    With with_stats, the same pass collects the telemetry reductions. Each
+    of the n_chunks contiguous particle ranges has its own row of partials,
+    merged after the loop, so the threads never share an accumulator.
+
+    Arguments:
+        pos (np.ndarray): Particle positions, shape (N, 2), updated in place
+        vel (np.ndarray): Particle velocities, shape (N, 2), updated in place
+        forces (np.ndarray): Forces on the particles, shape (N, 2)
+        noise (np.ndarray): Velocity noise, shape (N, 2)
+        dt (float): Time step
+        friction (float): Velocity factor per step
+        types (np.ndarray): Particle types, shape (N,)
+        n_types (int): Number of particle types
+        world_width (float): Width of the simulation world
+        world_height (float): Height of the simulation world
+        n_chunks (int): Number of particle ranges, usually numba.get_num_threads()
+        with_stats (bool): Collect the telemetry reductions
+
+    Returns:
+        np.ndarray: Merged telemetry partials (see telemetry_from_stats); zeros
+            without with_stats
+    """
+
+    n = len(pos)
+    width = _STAT_TYPES + _STAT_PER_TYPE * n_types
+    n_chunks = max(1, min(n_chunks, n))
+    chunk_size = (n + n_chunks - 1) // n_chunks
+    partial = np.zeros((n_chunks, width), dtype=np.float64)
+    angle_x = 2.0 * np.pi / world_width
+    angle_y = 2.0 * np.pi / world_height
+
+    for chunk in prange(n_chunks):
+        for i in range(chunk * chunk_size, min((chunk + 1) * chunk_size, n)):
+            vel_x = (vel[i, 0] + forces[i, 0] * dt + noise[i, 0]) * friction
+            vel_y = (vel[i, 1] + forces[i, 1] * dt + noise[i, 1]) * friction
+            vel[i, 0] = vel_x
+            vel[i, 1] = vel_y
+            pos[i, 0] += vel_x * dt
+            pos[i, 1] += vel_y * dt
+
+            if with_stats:
+                _accumulate_stats(
+                    partial[chunk], vel_x, vel_y, pos[i, 0] % world_width, pos[i, 1] % world_height,
+                    types[i], angle_x, angle_y,
+                )
+
+    return _merge_stats(partial)
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def kick_verlet(
+    pos,
+    vel,
+    old_forces,
+    new_forces,
+    noise,
+    dt,
+    friction,
+    types,
+    n_types,
+    world_width,
+    world_height,
+    n_chunks,
+    with_stats,
+):
+
+    """
+    Closing kick of update_particles_verlet (velocities in place):
+        vel = (vel + (old_forces + new_forces) * dt / 2 + noise) * friction
+    With with_stats, the same pass collects the telemetry reductions at the
+    (already drifted) positions, in chunked partials like integrate_euler.
+
+    Returns:
+        np.ndarray: Merged telemetry partials (see telemetry_from_stats); zeros
+            without with_stats
+    """
+
+    n = len(pos)
+    width = _STAT_TYPES + _STAT_PER_TYPE * n_types
+    n_chunks = max(1, min(n_chunks, n))
+    chunk_size = (n + n_chunks - 1) // n_chunks
+    partial = np.zeros((n_chunks, width), dtype=np.float64)
+    angle_x = 2.0 * np.pi / world_width
+    angle_y = 2.0 * np.pi / world_height
+    half_dt = 0.5 * dt
+
+    for chunk in prange(n_chunks):
+        for i in range(chunk * chunk_size, min((chunk + 1) * chunk_size, n)):
+            vel_x = (vel[i, 0] + (old_forces[i, 0] + new_forces[i, 0]) * half_dt + noise[i, 0]) * friction
+            vel_y = (vel[i, 1] + (old_forces[i, 1] + new_forces[i, 1]) * half_dt + noise[i, 1]) * friction
+            vel[i, 0] = vel_x
+            vel[i, 1] = vel_y
+
+            if with_stats:
+                _accumulate_stats(
+                    partial[chunk], vel_x, vel_y, pos[i, 0] % world_width, pos[i, 1] % world_height,
+                    types[i], angle_x, angle_y,
+                )
+
+    return _merge_stats(partial)
+
+
+@njit(cache=True)
+def _merge_stats(partial):
+
+    """Sums the rows of telemetry partials (maximum for the max speed)."""
+
+    merged = np.zeros(partial.shape[1], dtype=np.float64)
+    for chunk in range(partial.shape[0]):
+        for k in range(partial.shape[1]):
+            if k == _STAT_MAX_SPEED:
+                merged[k] = max(merged[k], partial[chunk, k])
+            else:
+                merged[k] += partial[chunk, k]
+    return merged
+
+
+def telemetry_from_stats(stats, world_width, world_height):
+
+    """
+    Turns merged telemetry partials into named quantities.
+
+    Args:
+        stats (np.ndarray): Result of integrate_euler or kick_verlet
+        world_width, world_height (float): World size
+
+    Returns:
+        dict: Contains the following keys:
+            - "kinetic_energy" (float): Sum of 0.5 * |v|^2 (unit mass)
+            - "mean_speed", "max_speed" (float): Speed statistics
+            - "type_counts" (np.ndarray): Number of particles per type
+            - "type_centroids" (np.ndarray): Circular mean position per type
+              on the torus, shape (n_types, 2); NaN for absent types
+    """
+
+    per_type = stats[_STAT_TYPES:].reshape(-1, _STAT_PER_TYPE)
+    counts = per_type[:, 0]
+    n = counts.sum()
+
+    angles = np.arctan2(per_type[:, [2, 4]], per_type[:, [1, 3]]) % (2.0 * np.pi)
+    centroids = angles / (2.0 * np.pi) * np.array([world_width, world_height])
+    centroids[counts == 0] = np.nan
+
+    return {
+        "kinetic_energy": float(stats[_STAT_KINETIC]),
+        "mean_speed": float(stats[_STAT_SPEED] / n) if n else 0.0,
+        "max_speed": float(stats[_STAT_MAX_SPEED]),
+        "type_counts": counts.astype(np.int64),
+        "type_centroids": centroids,
+    }
+
+
+# Interchangeable force kernels, all with the signature of calculate_forces
+FORCE_KERNELS = {
+    "cells": calculate_forces,
+    "tiled": calculate_forces_tiled,
+}
+
+# Explicit signatures of all kernels in this module, compiled ahead of the
+# first step by p_life.jit.warmup
+KERNEL_SIGNATURES = [
+    (wrap_coordinate, (nb_types.int64, nb_types.int64)),
+    (calculate_forces, FORCE_KERNEL_SIGNATURE),
+    (calculate_forces_tiled, FORCE_KERNEL_SIGNATURE),
+    (calculate_forces_ordered, (
+        FLOAT_2D, INT_1D, INT_1D, INT_1D, nb_types.Array(nb_types.int64, 2, "C", readonly=True),
+        FLOAT_2D, nb_types.float64, nb_types.float64, nb_types.float64,
+    )),
+    (calculate_forces_pair_radii, FORCE_KERNEL_SIGNATURE[:7] + (FLOAT_2D,) + FORCE_KERNEL_SIGNATURE[7:]),
+    (calculate_repulsion_forces, FORCE_KERNEL_SIGNATURE),
+    (calculate_matrix_forces, FORCE_KERNEL_SIGNATURE),
+    (integrate_euler, (
+        FLOAT_2D, FLOAT_2D, FLOAT_2D, nb_types.float64[:, ::1], nb_types.float64, nb_types.float64,
+        INT_1D, nb_types.int64, nb_types.float64, nb_types.float64, nb_types.int64, nb_types.boolean,
+    )),
+    (kick_verlet, (
+        FLOAT_2D, FLOAT_2D, FLOAT_2D, FLOAT_2D, nb_types.float64[:, ::1], nb_types.float64, nb_types.float64,
+        INT_1D, nb_types.int64, nb_types.float64, nb_types.float64, nb_types.int64, nb_types.boolean,
+    )),
+]
+
+
+class Snapshot(Mapping):
+
+    """
+    Immutable state of a Game after one step, returned by Game.step.
+
+    A read-only mapping with the keys "pos", "types", "frame", "time" and,
+    with Game.telemetry, "telemetry". pos and types are read-only views into
+    a buffer of a SnapshotPool that is not reused while any view of it is
+    alive, so consumers may keep snapshots (or their arrays) without copying.
+
+    Attributes:
+        frame (int): Number of the step that produced the snapshot (1 for the first)
+        time (float): Simulated time after the step
+        pos (np.ndarray): Read-only particle positions, shape (N, 2)
+        types (np.ndarray): Read-only particle types, shape (N,)
+        telemetry (dict or None): See Game.telemetry
+    """
+
+    __slots__ = ("frame", "time", "pos", "types", "telemetry")
+
+    def __init__(self, frame, time, pos, types, telemetry=None):
+        self.frame = frame
+        self.time = time
+        self.pos = pos
+        self.types = types
+        self.telemetry = telemetry
+
+    def _keys(self):
+        if self.telemetry is None:
+            return ("pos", "types", "frame", "time")
+        return ("pos", "types", "frame", "time", "telemetry")
+
+    def __getitem__(self, key):
+        if key not in self._keys():
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self):
+        return f"Snapshot(frame={self.frame}, time={self.time:g}, n={len(self.pos)})"
+
+
+class SnapshotPool:
+
+    """
+    Recycles the buffers behind Snapshot arrays.
+
+    A buffer is free again once the pool holds the only reference to it, i.e.
+    every snapshot and every view of its arrays is gone. While consumers hold
+    on to more than max_buffers snapshots, new buffers are allocated and
+    dropped later instead of being pooled.
+
+    Attributes:
+        max_buffers (int): Number of buffers kept for reuse
+        allocated (int): Number of buffers allocated so far
+    """
+
+    def __init__(self, max_buffers=8):
+        self.max_buffers = max_buffers
+        self.allocated = 0
+        self._pos = []
+        self._types = []
+
+    def _free_slot(self):
+        for i in range(len(self._pos)):
+            # References: the pool list and the getrefcount argument
+            if sys.getrefcount(self._pos[i]) == 2 and sys.getrefcount(self._types[i]) == 2:
+                return i
+        return -1
+
+    def snapshot(self, pos, types, frame, time, telemetry=None, capacity=0):
+
+        """
+        Copies pos and types into a free buffer and wraps them in a Snapshot.
+
+        Args:
+            pos (np.ndarray): Particle positions, shape (N, 2)
+            types (np.ndarray): Particle types, shape (N,)
+            frame (int): Frame number
+            time (float): Simulated time
+            telemetry (dict or None): Telemetry of the step
+            capacity (int): Rows to allocate for a new buffer (at least N),
+                so a growing population does not reallocate every frame
+
+        Returns:
+            Snapshot: Snapshot with read-only views of the copies
+        """
+
+        n = len(pos)
+        slot = self._free_slot()
+        if slot >= 0 and len(self._pos[slot]) >= n:
+            pos_buf, types_buf = self._pos[slot], self._types[slot]
+        else:
+            rows = max(n, capacity)
+            pos_buf = np.empty((rows, 2), dtype=pos.dtype)
+            types_buf = np.empty(rows, dtype=types.dtype)
+            self.allocated += 1
+            if slot >= 0:
+                self._pos[slot], self._types[slot] = pos_buf, types_buf  # replaces a too small buffer
+            elif len(self._pos) < self.max_buffers:
+                self._pos.append(pos_buf)
+                self._types.append(types_buf)
+
+        pos_view = pos_buf[:n]
+        types_view = types_buf[:n]
+        pos_view[:] = pos
+        types_view[:] = types
+        pos_view.flags.writeable = False
+        types_view.flags.writeable = False
+        return Snapshot(frame, time, pos_view, types_view, telemetry)
+
+
+class Game:
+
+    """
+    Main simulation class for the Particle Life system.
+    
+    This class manages the particle simulation, including initialization of particles,
+    their positions, velocities, types, and the interaction matrix that defines
+    how different particle types attract or repel each other.
+    
+    Attributes:
+        w (float): World width
+        h (float): World height
+        r_max (float): Maximum interaction radius between particles
+        n (int): Number of active particles
+        capacity (int): Number of particles that fit without reallocation
+        pos (np.ndarray): Current particle positions, shape (N, 2)
+        vel (np.ndarray): Current particle velocities, shape (N, 2)
+        types (np.ndarray): Particle type indices, shape (N,)
+        friction (float): Friction coefficient applied to velocities each step
+        noise_strength (float): Standard deviation of random noise added each step
         matrix (np.ndarray): 4x4 interaction matrix defining forces between particle types
+        kernel (str): Name of the force kernel in FORCE_KERNELS used by step
+        integrator (str): "euler" (update_particles), "exp_euler"
+            (update_particles_exp_euler), "verlet" (update_particles_verlet)
+            or "respa" (update_particles_respa, kernel is not used)
+        respa_substeps (int): Repulsion sub-steps per step of the respa integrator
+        cell_order (str): "row", "morton" or "hilbert" order of the cells and
+            the sorted particles (see cell_layout); the respa integrator
+            always uses row-major grids
+        radii (np.ndarray or None): Interaction radius per pair of types
+            (shape of matrix) in place of r_max, see calculate_forces_pair_radii;
+            not supported by the respa integrator and curve cell orders
+        cell_size (float or None): Cell size of the interaction grid (at
+            least r_max); None uses r_max. Not used by the respa integrator
+        autotune (bool): Let p_life.autotune choose kernel, cell order, cell
+            size and threads for this machine and scene before stepping; the
+            choice is cached on disk and renewed when the scene changes much
+        dt_controller (AdaptiveTimestep or None): Chooses dt when step(None) is called
+        telemetry (bool): Add kinetic energy, speed and per-type statistics
+            (telemetry_from_stats) to the result of step; every integrator
+            collects them in its last velocity update (integrate_euler or
+            kick_verlet), without an extra pass over the particles
+        collect_stats (bool): Record phase timings and cell occupancy of every step
+        step_stats (dict or None): Stats of the last step with collect_stats:
+            seconds per phase ("binning", "forces", "integrate", "step" for the
+            whole step) and the cell occupancy keys of update_particles
+        threads (int or None): Numba threads used by step (clamped to
+            NUMBA_NUM_THREADS); None uses the current setting of the calling thread
+        time (float): Simulated time
+        frame (int): Number of steps taken (frame number of the last Snapshot)
     """
 
-    def __init__(self, n=2000, world_width=50.0, world_height=50.0, r_max=10.0):
+    def __init__(self, n=2000, world_width=50.0, world_height=50.0, r_max=10.0, threads=None):
 
         """
         Initializes a new Particle Life simulation.
@@ -351,14 +1992,41 @@ class Game:
             world_height (float): Height of the simulation world. Default is 50.0.
             r_max (float): Maximum interaction radius. Particles beyond this distance
                         don't interact. Default is 10.0.
+            threads (int or None): Numba threads for step. Default is None (all).
         """
         
         self.w = world_width
         self.h = world_height
         self.r_max = r_max
+
+        # Particle storage with spare capacity: pos, vel and types are views
+        # of the first self.n rows, so add/remove_particles only touch the
+        # changed rows (see _reserve)
+        self.n = 0
+        self._pos_buf = np.empty((0, 2), dtype=np.float32)
+        self._vel_buf = np.empty((0, 2), dtype=np.float32)
+        self._types_buf = np.empty(0, dtype=int)
         self.pos, self.vel, self.types = self.init_particles(n, self.w, self.h)
         self.friction = 0.85  # less friction = more movement
         self.noise_strength = 0.3  # more noise = more randommovement
+        self.kernel = "cells"  # key into FORCE_KERNELS
+        self.integrator = "euler"
+        self.respa_substeps = 4
+        self.cell_order = "row"
+        self.radii = None
+        self.cell_size = None
+        self.autotune = False
+        self._autotune_key = None  # scene key the current configuration was tuned for
+        self.acc = None  # forces of the last step, used by the verlet integrator
+        self.dt_controller = None  # AdaptiveTimestep for step(None)
+        self.telemetry = False
+        self.collect_stats = False
+        self.step_stats = None
+        self.threads = threads
+        self.time = 0.0
+        self.frame = 0
+        self._snapshots = SnapshotPool()
+        self._cell_index = None  # cached result of cell_index()
 
         # Adjusted matrix (normal values)
         self.matrix = np.array(
@@ -380,33 +2048,183 @@ class Game:
         that move beyond world boundaries reappear on the opposite side.
         
         Args:
-            dt (float): Time step size for numerical integration. Default is 0.01.
+            dt (float or None): Time step size for numerical integration. Default is 0.01.
                        Smaller values increase stability but require more computation.
+                       None uses (and afterwards adapts) self.dt_controller.dt.
         
         Returns:
-            dict: Snapshot of current simulation state with keys:
-                - "pos": Current particle positions (np.ndarray)
-                - "types": Current particle types (np.ndarray)
+            Snapshot: Immutable state after the step (read-only mapping) with keys:
+                - "pos": Particle positions (read-only np.ndarray)
+                - "types": Particle types (read-only np.ndarray)
+                - "frame", "time": Step number and simulated time
+                - "telemetry": Only with self.telemetry, see telemetry_from_stats
         """
 
-        self.pos, self.vel, self.types = update_particles(
-            self.pos, 
-            self.vel, 
-            self.types, 
+        if dt is None:
+            if self.dt_controller is None:
+                raise ValueError("step(None) needs a dt_controller")
+            dt = self.dt_controller.dt
+
+        if self.autotune:
+            self._apply_autotune()
+
+        force_kernel = FORCE_KERNELS[self.kernel]
+        r_max = self.r_max
+        cell_size = self.cell_size
+        if self.radii is not None:
+            if self.integrator == "respa" or self.cell_order != "row":
+                raise ValueError("Per-pair radii need a row-major grid and a non-respa integrator")
+            force_kernel = pair_radii_kernel(self.radii)
+            # The kernel gets the cell size as r_max; grid sized for the largest radius
+            r_max = max(float(np.max(self.radii)), cell_size or 0.0)
+            cell_size = None
+
+        args = (
             self.w, 
             self.h, 
-            self.r_max, 
+            r_max, 
             dt, 
             self.friction, 
             self.noise_strength, 
             self.matrix,
+            force_kernel,
         )
-        
+
+        telemetry = {} if self.telemetry else None
+        stats = {} if self.collect_stats else None
+        start = time.perf_counter()
+
+        # set_num_threads is per calling thread, so this only limits our kernels
+        previous_threads = get_num_threads()
+        if self.threads is not None:
+            set_num_threads(max(1, min(self.threads, config.NUMBA_NUM_THREADS)))
+        try:
+            if self.integrator == "verlet":
+                pos, vel, acc, types = update_particles_verlet(
+                    self.pos, self.vel, self.acc, self.types, *args,
+                    telemetry=telemetry, stats=stats, cell_order=self.cell_order, cell_size=cell_size,
+                )
+                self.pos, self.vel, self.types = pos, vel, types
+                self.acc = acc  # after the setters, which drop the old forces
+            elif self.integrator == "respa":
+                self.pos, self.vel, self.types = update_particles_respa(
+                    self.pos, self.vel, self.types, *args[:-1], substeps=self.respa_substeps,
+                    telemetry=telemetry, stats=stats,
+                )
+            elif self.integrator == "exp_euler":
+                self.pos, self.vel, self.types = update_particles_exp_euler(
+                    self.pos, self.vel, self.types, *args,
+                    telemetry=telemetry, stats=stats, cell_order=self.cell_order, cell_size=cell_size,
+                )
+            elif self.integrator == "euler":
+                self.pos, self.vel, self.types = update_particles(
+                    self.pos, self.vel, self.types, *args,
+                    telemetry=telemetry, stats=stats, cell_order=self.cell_order, cell_size=cell_size,
+                )
+            else:
+                raise ValueError(f"Unknown integrator {self.integrator!r}")
+        finally:
+            set_num_threads(previous_threads)
+
         # Wrap Around (Torus-World)
         self.pos[:, 0] = np.mod(self.pos[:, 0], self.w)
         self.pos[:, 1] = np.mod(self.pos[:, 1], self.h)
-        
-        return {"pos": self.pos, "types": self.types}
+
+        self._cell_index = None  # positions changed
+        self.time += dt
+
+        end = time.perf_counter()
+        tracing.complete("game.step", "sim", start, end)
+        if stats is not None:
+            stats["step"] = end - start
+            self.step_stats = stats  # replaced, never mutated, so readers in other threads see whole steps
+
+        if self.dt_controller is not None and len(self.vel):
+            if telemetry is not None:
+                max_speed = telemetry["max_speed"]  # already reduced in the step
+            else:
+                max_speed = np.sqrt(np.max(np.sum(self.vel * self.vel, axis=1)))
+            # The shortest cutoff has the stiffest repulsion
+            scale = self.r_max if self.radii is None else float(np.min(self.radii))
+            self.dt_controller.update(max_speed * dt, scale)
+
+        self.frame += 1
+        return self._snapshots.snapshot(self.pos, self.types, self.frame, self.time, telemetry, self.capacity)
+
+    def _apply_autotune(self):
+
+        """Applies the cached (or newly measured) autotuner choice when the scene bucket changed."""
+
+        try:
+            from .autotune import autotune, scene_key
+        except ImportError:
+            from autotune import autotune, scene_key
+
+        key = scene_key(self)
+        if key != self._autotune_key:
+            self._autotune_key = key
+            autotune(self)
+
+    @property
+    def capacity(self):
+        return len(self._pos_buf)
+
+    @property
+    def pos(self):
+        return self._pos_buf[:self.n]
+
+    @pos.setter
+    def pos(self, value):
+
+        # Assigning positions sets the particle count; assign vel and types
+        # of the same length along with it
+        value = np.asarray(value, dtype=np.float32)
+        self._reserve(len(value))
+        self._pos_buf[:len(value)] = value
+        self.n = len(value)
+        self._particles_changed()
+
+    @property
+    def vel(self):
+        return self._vel_buf[:self.n]
+
+    @vel.setter
+    def vel(self, value):
+        value = np.asarray(value, dtype=np.float32)
+        self._reserve(len(value))
+        self._vel_buf[:len(value)] = value
+        self._particles_changed()
+
+    @property
+    def types(self):
+        return self._types_buf[:self.n]
+
+    @types.setter
+    def types(self, value):
+        value = np.asarray(value, dtype=int)
+        self._reserve(len(value))
+        self._types_buf[:len(value)] = value
+        self._particles_changed()
+
+    def _reserve(self, n):
+
+        """
+        Makes room for at least n particles.
+
+        The buffers grow by doubling, so adding particles one batch at a time
+        costs amortized O(1) per particle instead of reallocating every array
+        for every batch.
+        """
+
+        if n <= self.capacity:
+            return
+        capacity = max(n, 2 * self.capacity, 16)
+
+        for name in ("_pos_buf", "_vel_buf", "_types_buf"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
 
     def init_particles(self, n, width, height):
 
@@ -451,6 +2269,111 @@ class Game:
 
         self.matrix[row, col] = np.float32(force)
 
+    def add_particles(self, pos, types=None, vel=None):
+
+        """
+        Appends particles to the simulation.
+
+        Only the new rows are written while the spare capacity lasts; the
+        buffers double when they are full.
+
+        Args:
+            pos (np.ndarray): Positions of the new particles, shape (K, 2),
+                wrapped into the world
+            types (np.ndarray or int or None): Types of the new particles; random if None
+            vel (np.ndarray or None): Velocities of the new particles; zero if None
+
+        Returns:
+            np.ndarray: Indices of the new particles in self.pos
+        """
+
+        pos = np.asarray(pos, dtype=np.float32).reshape(-1, 2)
+        k = len(pos)
+        start = self.n
+        self._reserve(start + k)
+
+        new = slice(start, start + k)
+        self._pos_buf[new, 0] = np.mod(pos[:, 0], self.w)
+        self._pos_buf[new, 1] = np.mod(pos[:, 1], self.h)
+        self._vel_buf[new] = 0.0 if vel is None else vel
+        self._types_buf[new] = np.random.randint(0, 4, size=k) if types is None else types
+        self.n = start + k
+
+        self._particles_changed()
+        return np.arange(start, start + k)
+
+    def remove_particles(self, indices):
+
+        """
+        Removes particles from the simulation.
+
+        Holes are filled with the surviving particles from the end of the
+        arrays, so removing K particles moves at most K rows; the order of
+        the remaining particles is not preserved.
+
+        Args:
+            indices (np.ndarray): Indices into self.pos of the particles to remove
+
+        Returns:
+            int: Number of particles removed
+        """
+
+        removed = np.unique(np.asarray(indices, dtype=np.int64))
+        if len(removed) == 0:
+            return 0
+        if removed[0] < 0 or removed[-1] >= self.n:
+            raise IndexError("particle index out of range")
+
+        new_n = self.n - len(removed)
+        holes = removed[removed < new_n]
+        tail = np.setdiff1d(np.arange(new_n, self.n), removed, assume_unique=True)
+
+        # Survivors from the tail move into the holes; both have the same length
+        for buf in (self._pos_buf, self._vel_buf, self._types_buf):
+            buf[holes] = buf[tail]
+        self.n = new_n
+
+        self._particles_changed()
+        return len(removed)
+
+    def spawn_particles(self, point, radius, count, particle_type=None):
+
+        """
+        Brush: adds count particles uniformly in a disc around a point.
+
+        Args:
+            point (tuple): Center (x, y)
+            radius (float): Radius of the disc
+            count (int): Number of particles to add
+            particle_type (int or None): Type of the new particles; random if None
+
+        Returns:
+            np.ndarray: Indices of the new particles in self.pos
+        """
+
+        angle = np.random.rand(count) * 2.0 * np.pi
+        distance = radius * np.sqrt(np.random.rand(count))
+        pos = np.column_stack((point[0] + distance * np.cos(angle), point[1] + distance * np.sin(angle)))
+        return self.add_particles(pos, types=particle_type)
+
+    def erase_particles(self, point, radius):
+
+        """
+        Brush: removes all particles within a radius of a point (torus distance).
+
+        Returns:
+            int: Number of particles removed
+        """
+
+        return self.remove_particles(self.query_radius(point, radius))
+
+    def _particles_changed(self):
+
+        """Drops the caches that refer to particle indices."""
+
+        self.acc = None
+        self._cell_index = None
+
     def reset_particles(self):
 
         """
@@ -460,4 +2383,143 @@ class Game:
         """
 
         n = self.pos.shape[0]
-        self.pos, self.vel, self.types = self.init_particles(n, self.w, self.h)
\ No newline at end of file
+        self.pos, self.vel, self.types = self.init_particles(n, self.w, self.h)
+        self.acc = None
+        self._cell_index = None
+
+    def invalidate_cell_index(self):
+
+        """
+        Drops the cached cell grid of cell_index().
+
+        Steps, resets, assignments to pos and types, and the add/remove
+        methods do this themselves. Call it after changing positions in
+        place (e.g. game.pos[i] = ...), which the game cannot notice.
+        """
+
+        self._cell_index = None
+
+    def cell_index(self):
+
+        """
+        Returns the cell grid of the current particle positions.
+
+        The grid is built with sort_into_cells on first use and cached until
+        the particles move (step), are reset, assigned, added or removed, so
+        analysis passes and queries between two steps share it. In-place edits
+        of pos need invalidate_cell_index(). The particle arrays of the game are not
+        reordered; "order" maps sorted indices back to indices into self.pos.
+
+        Returns:
+            dict: Contains the following keys:
+                - "order" (np.ndarray): sorted index -> index into self.pos
+                - "pos" (np.ndarray): Positions sorted by cell ID
+                - "types" (np.ndarray): Types sorted by cell ID
+                - "cell_starts", "cell_counts" (np.ndarray): Table of contents
+                - "cols", "rows" (int): Grid size
+                - "cell_size" (float): Nominal cell size (r_max)
+        """
+
+        if self._cell_index is None:
+            order, cell_starts, cell_counts, cols, rows = sort_into_cells(
+                self.pos, self.w, self.h, self.r_max
+            )
+            self._cell_index = {
+                "order": order,
+                "pos": np.ascontiguousarray(self.pos[order], dtype=np.float32),
+                "types": np.asarray(self.types[order], dtype=int),
+                "cell_starts": cell_starts,
+                "cell_counts": cell_counts,
+                "cols": cols,
+                "rows": rows,
+                "cell_size": float(self.r_max),
+            }
+        return self._cell_index
+
+    def _grid_args(self):
+
+        """Leading arguments of the kernels in p_life.spatial."""
+
+        index = self.cell_index()
+        return (
+            index["pos"],
+            index["cell_starts"],
+            index["cell_counts"],
+            int(index["cols"]),
+            int(index["rows"]),
+            index["cell_size"],
+            float(self.w),
+            float(self.h),
+        )
+
+    def query_radius(self, point, radius):
+
+        """
+        Finds the particles within a radius of a point (torus distance).
+
+        Only the cells overlapping the circle are visited, so the cost grows
+        with the number of particles found, not with the population.
+
+        Args:
+            point (tuple): Query point (x, y), wrapped into the world
+            radius (float): Query radius
+
+        Returns:
+            np.ndarray: Indices into self.pos of the particles found (unordered)
+        """
+
+        found, _ = query_radius_cells(*self._grid_args(), float(point[0]), float(point[1]), float(radius))
+        return self.cell_index()["order"][found]
+
+    def query_rect(self, x, y, width, height):
+
+        """
+        Finds the particles in the rectangle [x, x + width) x [y, y + height).
+
+        The rectangle wraps around the world edges like the particles do.
+
+        Args:
+            x, y (float): Lower left corner of the rectangle
+            width, height (float): Size of the rectangle
+
+        Returns:
+            np.ndarray: Indices into self.pos of the particles found (unordered)
+        """
+
+        found = query_rect_cells(*self._grid_args(), float(x), float(y), float(width), float(height))
+        return self.cell_index()["order"][found]
+
+    def query_knn(self, point, k):
+
+        """
+        Finds the k particles closest to a point (torus distance).
+
+        Args:
+            point (tuple): Query point (x, y)
+            k (int): Number of neighbors
+
+        Returns:
+            tuple: (indices, distances) of the min(k, N) nearest particles,
+                nearest first; indices refer to self.pos
+        """
+
+        found, dist_sq = query_knn_cells(*self._grid_args(), float(point[0]), float(point[1]), int(k))
+        return self.cell_index()["order"][found], np.sqrt(dist_sq)
+
+    def query_radius_batch(self, points, radius):
+
+        """
+        Radius queries for many points at once, in parallel.
+
+        Args:
+            points (np.ndarray): Query points, shape (M, 2)
+            radius (float): Query radius
+
+        Returns:
+            tuple: (offsets, indices); the particles found for points[m] are
+                indices[offsets[m]:offsets[m + 1]] (indices into self.pos)
+        """
+
+        points = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 2)
+        offsets, found = query_radius_batch_cells(*self._grid_args(), points, float(radius))
+        return offsets, self.cell_index()["order"][found]
@@ -1,12 +1,19 @@
-from PySide6 import QtWidgets, QtCore
+import os
+
+from numba import config
+from PySide6 import QtGui, QtWidgets, QtCore
 from PySide6.QtCore import Qt
 
 try:
+    from . import tracing
     from .game import Game
     from .frontend_vispy import ParticleCanvas
+    from .jit import format_report, warmup
 except ImportError:
+    import tracing
     from game import Game
     from frontend_vispy import ParticleCanvas
+    from jit import format_report, warmup
 
 
 app = QtWidgets.QApplication([])
@@ -20,11 +27,15 @@ controls = QtWidgets.QWidget()
 layout = QtWidgets.QGridLayout(controls)
 main_layout.addWidget(controls, stretch=0)
 
+# Load (or compile) all kernels before the first frame
+print(format_report(warmup()))
+
 game = Game(
     n=10000,
     world_width=100.0,
     world_height=100.0,
     r_max=10.0,
+    threads=max(1, config.NUMBA_NUM_THREADS - 1),  # leave a core to the render thread
 )
 canvas = ParticleCanvas(game, world_width=game.w, world_height=game.h)
 main_layout.addWidget(canvas.native, stretch=1)
@@ -232,10 +243,19 @@ timer = QtCore.QTimer()
 timer.timeout.connect(canvas.step_and_draw)
 timer.start(int(1000 / 60))
 
+# P_LIFE_TRACE=trace.json records a Chrome trace, written on Ctrl+T and on exit
+TRACE_PATH = os.environ.get("P_LIFE_TRACE")
+if TRACE_PATH:
+    tracing.enable()
+    trace_shortcut = QtGui.QShortcut(QtGui.QKeySequence("Ctrl+T"), window)
+    trace_shortcut.activated.connect(lambda: tracing.dump(TRACE_PATH))
+
 
 def main():
     window.showMaximized()
     app.exec()
+    if TRACE_PATH:
+        tracing.dump(TRACE_PATH)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
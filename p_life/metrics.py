@@ -0,0 +1,284 @@
+"""
+Prometheus metrics for long-running simulations.
+
+MetricsServer serves the Prometheus text format on /metrics from a daemon
+thread (http.server.ThreadingHTTPServer). The simulation loop calls
+observe(game) after each step; observe builds a new immutable sample and
+swaps the reference, so there is no lock and a scrape never waits for a step
+(and a step never waits for a scrape). Process memory is read on the scrape
+thread, so observe() makes no system calls.
+
+    server = MetricsServer(port=9100).start()
+    game.collect_stats = True  # phase timings and cell occupancy
+    while True:
+        game.step(0.01)
+        server.observe(game)
+
+Exposed metrics (prefix plife_): steps_total, steps_per_second,
+step_seconds{phase=...}, phase_seconds_total{phase=...}, particles,
+simulated_time_seconds, cells, cell_occupancy_max, cell_occupancy_mean,
+jit_compilations_total, jit_compile_seconds_total, resident_memory_bytes,
+max_resident_memory_bytes.
+
+Run a headless simulation with metrics:
+    python -m p_life.metrics --n 20000 --port 9100
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from numba.core import event
+
+try:
+    from . import tracing
+except ImportError:
+    import tracing
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+PHASES = ("binning", "forces", "integrate", "step")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class JitListener(event.Listener):
+
+    """Counts Numba compilations (outermost only) and their duration."""
+
+    def __init__(self):
+        self.compilations = 0
+        self.seconds = 0.0
+        self._local = threading.local()
+
+    def on_start(self, event):
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            self._local.start = time.perf_counter()
+        self._local.depth = depth + 1
+
+    def on_end(self, event):
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            self.compilations += 1
+            self.seconds += time.perf_counter() - self._local.start
+
+
+def memory_usage():
+
+    """
+    Returns:
+        tuple: (resident, max_resident) memory of this process in bytes;
+            None where the platform does not report it
+    """
+
+    resident = None
+    try:
+        with open("/proc/self/statm") as statm:
+            resident = int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    max_resident = None
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        max_resident = max_rss if sys.platform == "darwin" else max_rss * 1024  # kB on Linux
+    return resident, max_resident
+
+
+def format_metrics(sample):
+
+    """
+    Formats a sample from MetricsServer.observe in the Prometheus text format.
+
+    Args:
+        sample (dict): Metric values; missing or None values are left out
+
+    Returns:
+        str: Exposition text
+    """
+
+    lines = []
+
+    def metric(name, kind, help_text, values):
+        values = [(labels, v) for labels, v in values if v is not None]
+        if not values:
+            return
+        lines.append(f"# HELP plife_{name} {help_text}")
+        lines.append(f"# TYPE plife_{name} {kind}")
+        for labels, value in values:
+            lines.append(f"plife_{name}{labels} {float(value):.9g}")
+
+    def single(name, kind, help_text, key):
+        metric(name, kind, help_text, [("", sample.get(key))])
+
+    single("steps_total", "counter", "Simulation steps observed.", "steps")
+    single("steps_per_second", "gauge", "Steps per wall-clock second (moving average).", "steps_per_second")
+    metric("step_seconds", "gauge", "Duration of the last step per phase.",
+           [(f'{{phase="{p}"}}', sample.get("phase", {}).get(p)) for p in PHASES])
+    metric("phase_seconds_total", "counter", "Total time per phase.",
+           [(f'{{phase="{p}"}}', sample.get("phase_total", {}).get(p)) for p in PHASES])
+    single("particles", "gauge", "Number of particles.", "particles")
+    single("simulated_time_seconds", "gauge", "Simulated time.", "simulated_time")
+    single("cells", "gauge", "Cells of the interaction grid.", "cells")
+    single("cell_occupancy_max", "gauge", "Particles in the fullest cell.", "max_cell_occupancy")
+    single("cell_occupancy_mean", "gauge", "Mean particles per cell.", "mean_cell_occupancy")
+    single("jit_compilations_total", "counter", "Numba compilations in this process.", "jit_compilations")
+    single("jit_compile_seconds_total", "counter", "Time spent in Numba compilations.", "jit_seconds")
+    single("resident_memory_bytes", "gauge", "Resident memory of the process.", "resident_memory")
+    single("max_resident_memory_bytes", "gauge", "Peak resident memory of the process.", "max_resident_memory")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+
+    """
+    HTTP endpoint with the metrics of one simulation.
+
+    Attributes:
+        host (str): Interface to listen on
+        port (int): Port; 0 picks a free port, the actual port is set by start()
+        smoothing (float): Weight of the newest step in the steps/sec average
+    """
+
+    def __init__(self, host="127.0.0.1", port=9100, smoothing=0.1):
+        self.host = host
+        self.port = port
+        self.smoothing = smoothing
+        self.jit = JitListener()
+        self._sample = {}
+        self._steps = 0
+        self._rate = None
+        self._last_observe = None
+        self._phase_total = dict.fromkeys(PHASES, 0.0)
+        self._httpd = None
+        self._thread = None
+
+    def start(self):
+
+        """Starts serving in a daemon thread and listening for JIT compilations."""
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                with tracing.span("metrics.scrape", "io"):
+                    body = server.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # no line per scrape on stderr
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        event.register("numba:compile", self.jit)
+        return self
+
+    def stop(self):
+        if self._httpd is None:
+            return
+        event.unregister("numba:compile", self.jit)
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+        self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def observe(self, game):
+
+        """
+        Takes a sample of a game after a step (call from the simulation loop).
+
+        Args:
+            game (Game): The simulation; phase timings and cell occupancy
+                need game.collect_stats = True
+        """
+
+        now = time.perf_counter()
+        if self._last_observe is not None and now > self._last_observe:
+            rate = 1.0 / (now - self._last_observe)
+            self._rate = rate if self._rate is None else self._rate + self.smoothing * (rate - self._rate)
+        self._last_observe = now
+        self._steps += 1
+
+        stats = game.step_stats or {}
+        for phase in PHASES:
+            self._phase_total[phase] += stats.get(phase, 0.0)
+
+        # New dict per sample: the HTTP thread reads whichever one is current
+        self._sample = {
+            "steps": self._steps,
+            "steps_per_second": self._rate,
+            "phase": {p: stats[p] for p in PHASES if p in stats},
+            "phase_total": dict(self._phase_total) if stats else {},
+            "particles": len(game.pos),
+            "simulated_time": game.time,
+            "cells": stats.get("cells"),
+            "max_cell_occupancy": stats.get("max_cell_occupancy"),
+            "mean_cell_occupancy": stats.get("mean_cell_occupancy"),
+        }
+
+    def render(self):
+
+        """Current metrics in the Prometheus text format (memory is sampled now)."""
+
+        sample = dict(self._sample)
+        sample["resident_memory"], sample["max_resident_memory"] = memory_usage()
+        sample["jit_compilations"] = self.jit.compilations
+        sample["jit_seconds"] = self.jit.seconds
+        return format_metrics(sample)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a headless Particle Life simulation with a metrics endpoint")
+    parser.add_argument("--n", type=int, default=10000)
+    parser.add_argument("--width", type=float, default=100.0)
+    parser.add_argument("--height", type=float, default=100.0)
+    parser.add_argument("--dt", type=float, default=0.01)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    args = parser.parse_args()
+
+    try:
+        from .game import Game
+    except ImportError:
+        from game import Game
+
+    server = MetricsServer(args.host, args.port).start()
+    print(f"Metrics on http://{args.host}:{server.port}/metrics")
+
+    game = Game(n=args.n, world_width=args.width, world_height=args.height)
+    game.matrix[:] = np.random.uniform(-1.0, 1.0, size=game.matrix.shape)
+    game.collect_stats = True
+    try:
+        while True:
+            game.step(args.dt)
+            server.observe(game)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Thread count, threading layer and CPU affinity of the Numba kernels, and a
+scaling report.
+
+The number of threads is set per Game (Game(threads=...)), the threading
+layer and the affinity for the whole process. The layer must be chosen
+before the first parallel kernel runs, because Numba starts its thread pool
+only once:
+
+    from p_life import parallel
+    parallel.set_threading_layer("omp")
+    parallel.set_affinity([0, 1, 2, 3])
+    game = Game(n=20000, threads=4)
+
+Strong scaling (fixed scene, more threads) and weak scaling (particles grow
+with the threads) in steps/sec:
+    python -m p_life.parallel --n 20000 --threads 1,2,4,8
+    python -m p_life.parallel --n 5000 --mode weak --layer omp --affinity 0-7
+"""
+
+import argparse
+import importlib
+import os
+import time
+
+import numba
+import numpy as np
+
+try:
+    from .game import Game
+except ImportError:
+    from game import Game
+
+
+LAYERS = ("workqueue", "omp", "tbb")
+_LAYER_MODULES = {"workqueue": "workqueue", "omp": "omppool", "tbb": "tbbpool"}
+
+
+def available_layers():
+
+    """Threading layers whose Numba backend can be loaded here (tbb needs the tbb package)."""
+
+    available = []
+    for layer in LAYERS:
+        try:
+            importlib.import_module(f"numba.np.ufunc.{_LAYER_MODULES[layer]}")
+        except ImportError:
+            continue
+        available.append(layer)
+    return available
+
+
+def active_layer():
+
+    """Threading layer of the running thread pool, None before the first parallel kernel."""
+
+    try:
+        return numba.threading_layer()
+    except ValueError:
+        return None
+
+
+def set_threading_layer(layer):
+
+    """
+    Selects the threading layer for the thread pool of this process.
+
+    Args:
+        layer (str): "workqueue", "omp", "tbb", or a Numba layer category
+            ("default", "safe", "threadsafe", "forksafe")
+
+    Raises:
+        ValueError: If the layer is unknown or not available, or if another
+            layer is already running
+    """
+
+    categories = ("default", "safe", "threadsafe", "forksafe")
+    if layer not in LAYERS and layer not in categories:
+        raise ValueError(f"Unknown threading layer {layer!r}")
+    if layer in LAYERS and layer not in available_layers():
+        raise ValueError(f"Threading layer {layer!r} is not available, choose from {available_layers()}")
+
+    running = active_layer()
+    if running is not None:
+        if layer in LAYERS and layer != running:
+            raise ValueError(f"Thread pool already runs on {running!r}; select the layer before the first step")
+        return
+    numba.config.THREADING_LAYER = layer
+
+
+def set_affinity(cpus):
+
+    """
+    Pins this process (including threads that are already running, like a
+    started Numba pool) to a set of CPUs.
+
+    Args:
+        cpus (iterable of int): CPU numbers
+
+    Returns:
+        set or None: The CPUs now used, None where the platform has no
+            sched_setaffinity (macOS, Windows)
+    """
+
+    if not hasattr(os, "sched_setaffinity"):
+        return None
+
+    cpus = set(cpus)
+    try:
+        threads = [int(tid) for tid in os.listdir("/proc/self/task")]
+    except OSError:
+        threads = [0]
+    for tid in threads:
+        try:
+            os.sched_setaffinity(tid, cpus)
+        except ProcessLookupError:
+            pass  # thread ended meanwhile
+    return os.sched_getaffinity(0)
+
+
+def parse_cpus(text):
+
+    """Parses a CPU list like "0-3,6" into a sorted list of ints."""
+
+    cpus = set()
+    for part in text.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            cpus.update(range(int(first), int(last) + 1))
+        elif part:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def default_thread_counts():
+
+    """1, 2, 4, ... up to the size of the Numba pool (which is always included)."""
+
+    counts = []
+    threads = 1
+    while threads < numba.config.NUMBA_NUM_THREADS:
+        counts.append(threads)
+        threads *= 2
+    counts.append(numba.config.NUMBA_NUM_THREADS)
+    return counts
+
+
+def scaling_report(
+    n=20000,
+    thread_counts=None,
+    mode="strong",
+    steps=20,
+    warmup_steps=2,
+    world_width=100.0,
+    world_height=100.0,
+    r_max=10.0,
+    seed=0,
+):
+
+    """
+    Measures steps/sec of one scene for several thread counts.
+
+    Args:
+        n (int): Particles (strong), or particles per thread (weak)
+        thread_counts (list[int] or None): Default default_thread_counts()
+        mode (str): "strong" keeps the scene fixed; "weak" scales the number
+            of particles and the world area with the threads (same density)
+        steps (int): Timed steps per thread count
+        warmup_steps (int): Untimed steps before (compilation, caches)
+        world_width, world_height (float): World size (for one thread in weak mode)
+        r_max (float): Interaction radius
+        seed (int): Seed of particles and matrix, the same for every run
+
+    Returns:
+        list[dict]: One row per thread count with "threads", "n",
+            "steps_per_second", "speedup" and "efficiency" (relative to the
+            first row; for weak scaling in particle steps per second)
+    """
+
+    if mode not in ("strong", "weak"):
+        raise ValueError(f"Unknown scaling mode {mode!r}")
+    thread_counts = thread_counts or default_thread_counts()
+
+    rows = []
+    for threads in thread_counts:
+        scale = threads if mode == "weak" else 1
+        np.random.seed(seed)
+        game = Game(
+            n=n * scale,
+            world_width=world_width * np.sqrt(scale),
+            world_height=world_height * np.sqrt(scale),
+            r_max=r_max,
+            threads=threads,
+        )
+        game.matrix[:] = np.random.uniform(-1.0, 1.0, size=game.matrix.shape)
+
+        for _ in range(warmup_steps):
+            game.step(0.01)
+        start = time.perf_counter()
+        for _ in range(steps):
+            game.step(0.01)
+        seconds = time.perf_counter() - start
+
+        rows.append({
+            "threads": min(threads, numba.config.NUMBA_NUM_THREADS),
+            "n": game.n,
+            "steps_per_second": steps / seconds,
+        })
+
+    base = rows[0]
+    for row in rows:
+        work = row["steps_per_second"] * row["n"] / (base["steps_per_second"] * base["n"])
+        row["speedup"] = work
+        row["efficiency"] = work * base["threads"] / row["threads"]
+    return rows
+
+
+def format_scaling(rows, mode="strong"):
+
+    """Formats scaling_report rows as a table."""
+
+    lines = [
+        f"{mode} scaling, layer {active_layer()}, NUMBA_NUM_THREADS={numba.config.NUMBA_NUM_THREADS}",
+        f"{'threads':>7} {'particles':>10} {'steps/s':>9} {'speedup':>8} {'efficiency':>10}",
+    ]
+    for row in rows:
+        lines.append(
+            f"{row['threads']:>7} {row['n']:>10} {row['steps_per_second']:>9.2f} "
+            f"{row['speedup']:>8.2f} {row['efficiency']:>10.0%}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report steps/sec of Particle Life per Numba thread count")
+    parser.add_argument("--n", type=int, default=20000, help="particles (per thread for --mode weak)")
+    parser.add_argument("--mode", choices=("strong", "weak"), default="strong")
+    parser.add_argument("--threads", type=parse_cpus, default=None, help="thread counts, e.g. 1,2,4 or 1-8")
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--width", type=float, default=100.0)
+    parser.add_argument("--height", type=float, default=100.0)
+    parser.add_argument("--layer", default=None, help=f"threading layer: {', '.join(LAYERS)}")
+    parser.add_argument("--affinity", type=parse_cpus, default=None, help="CPUs to run on, e.g. 0-7")
+    args = parser.parse_args()
+
+    if args.layer:
+        set_threading_layer(args.layer)
+    if args.affinity:
+        if set_affinity(args.affinity) is None:
+            print("CPU affinity is not supported on this platform")
+
+    rows = scaling_report(args.n, args.threads, args.mode, args.steps,
+                          world_width=args.width, world_height=args.height)
+    print(format_scaling(rows, args.mode))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,517 @@
+"""
+Recording of simulation runs and their playback in ParticleCanvas.
+
+A recording is a directory with four files:
+
+    meta.json   world size, time step, format version
+    pos.f32     float32 (x, y) of all particles of all frames, frame after frame
+    types.u8    uint8 type of every particle in pos.f32
+    index.i64   one record per frame: offset into pos/types, particle count,
+                frame number, simulated time
+
+Recorder appends to the files. Recording only counts the frames whose index
+record and data are all on disk, so a run that is still going or was killed
+is readable up to its last complete frame. The particle count may change
+between frames (add_particles, remove_particles).
+
+Recording memory-maps the files: opening an overnight run reads nothing but
+the index, and the operating system pages in the frames that are shown. A
+single .npy file with a (frames, n, 2) position array can be opened the same
+way (all particles type 0).
+
+PlaybackSource looks like a Game to ParticleCanvas: step(dt) advances the
+playback position by speed * fps * dt frames and returns the frame there. A
+background thread copies the frames ahead of the playback position (in the
+playing direction, with the current stride) into memory, so the display does
+not wait for the disk.
+
+Record a headless run and play it back (needs VisPy and PySide6):
+    python -m p_life.playback record runs/overnight --n 20000 --frames 100000
+    python -m p_life.playback view runs/overnight
+"""
+
+import argparse
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack
+
+import numpy as np
+
+try:
+    from .game import Snapshot
+except ImportError:
+    from game import Snapshot
+
+
+FORMAT_VERSION = 1
+TYPES_DTYPE = np.dtype(np.uint8)
+INDEX_DTYPE = np.dtype([("offset", "<i8"), ("n", "<i8"), ("frame", "<i8"), ("time", "<f8")])
+
+
+class Recorder:
+
+    """
+    Appends snapshots to a recording directory.
+
+    Attributes:
+        directory (str): Recording directory (created if missing)
+        frames (int): Number of frames recorded
+    """
+
+    def __init__(self, directory, world_width, world_height, dt=None):
+        self.directory = directory
+        self.frames = 0
+        self._offset = 0
+        os.makedirs(directory, exist_ok=True)
+        meta = {
+            "format": FORMAT_VERSION,
+            "world_width": float(world_width),
+            "world_height": float(world_height),
+            "dt": dt,
+        }
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        with ExitStack() as stack:  # closes the files opened so far if one fails
+            self._pos = stack.enter_context(open(os.path.join(directory, "pos.f32"), "wb"))
+            self._types = stack.enter_context(open(os.path.join(directory, "types.u8"), "wb"))
+            self._index = stack.enter_context(open(os.path.join(directory, "index.i64"), "wb"))
+            self._files = stack.pop_all()
+
+    def record(self, snap, sim_time=None):
+
+        """
+        Appends one snapshot.
+
+        Args:
+            snap (Mapping): "pos" (n, 2) and "types" (n,) in 0..255; "frame"
+                and "time" are used when present (e.g. a Game.step Snapshot)
+            sim_time (float or None): Overrides snap["time"]
+        """
+
+        pos = np.ascontiguousarray(snap["pos"], dtype=np.float32)
+        types = np.asarray(snap["types"])
+        if len(types) and (types.min() < 0 or types.max() > np.iinfo(TYPES_DTYPE).max):
+            raise ValueError("particle types must be in 0..255 to be recorded")
+        if sim_time is None:
+            sim_time = snap.get("time", 0.0)
+
+        self._pos.write(pos.tobytes())
+        self._types.write(types.astype(TYPES_DTYPE).tobytes())
+        record = np.array(
+            [(self._offset, len(pos), snap.get("frame", self.frames), sim_time)],
+            dtype=INDEX_DTYPE,
+        )
+        self._index.write(record.tobytes())
+        self._offset += len(pos)
+        self.frames += 1
+
+    def flush(self):
+
+        """Writes buffered frames to the files."""
+
+        self._pos.flush()
+        self._types.flush()
+        self._index.flush()
+
+    def close(self):
+        self._files.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _map(path, dtype, shape):
+    if shape[0] == 0:
+        return np.empty(shape, dtype=dtype)  # mmap cannot map empty files
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+class Recording:
+
+    """
+    Read-only, memory-mapped frames of a recording.
+
+    recording[i] is a Snapshot whose arrays are views into the mapped files
+    (read-only, nothing is read before they are used).
+
+    Attributes:
+        path (str): Recording directory or .npy file
+        world_width, world_height (float): World size
+        dt (float or None): Simulated time per recorded frame, if known
+    """
+
+    def __init__(self, path, world_width=None, world_height=None):
+        self.path = path
+        self.dt = None
+
+        if os.path.isdir(path):
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            if meta.get("format") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported recording format {meta.get('format')!r}")
+            self.world_width = meta["world_width"]
+            self.world_height = meta["world_height"]
+            self.dt = meta.get("dt")
+
+            # The three files are buffered separately, so a running or killed
+            # recorder may have written index records for frames whose data
+            # is not (all) on disk yet: only frames that fit in every file count
+            index_path = os.path.join(path, "index.i64")
+            pos_path = os.path.join(path, "pos.f32")
+            types_path = os.path.join(path, "types.u8")
+            frames = os.path.getsize(index_path) // INDEX_DTYPE.itemsize
+            index = _map(index_path, INDEX_DTYPE, (frames,))
+            stored = min(
+                os.path.getsize(pos_path) // (2 * np.dtype(np.float32).itemsize),
+                os.path.getsize(types_path) // TYPES_DTYPE.itemsize,
+            )
+            ends = index["offset"] + index["n"]
+            frames = int(np.searchsorted(ends, stored, side="right"))  # ends grow with the frames
+            self._index = index[:frames]
+            total = int(ends[frames - 1]) if frames else 0
+            self._pos = _map(pos_path, np.float32, (total, 2))
+            self._types = _map(types_path, TYPES_DTYPE, (total,))
+        else:
+            stack = np.load(path, mmap_mode="r")
+            if stack.ndim != 3 or stack.shape[2] != 2:
+                raise ValueError(f"Expected a (frames, n, 2) position array, got shape {stack.shape}")
+            frames, n = stack.shape[:2]
+            self._pos = stack.reshape(frames * n, 2)
+            self._types = np.broadcast_to(np.zeros(1, dtype=TYPES_DTYPE), (frames * n,))
+            self._index = np.zeros(frames, dtype=INDEX_DTYPE)
+            self._index["offset"] = np.arange(frames) * n
+            self._index["n"] = n
+            self._index["frame"] = np.arange(frames)
+            extent = np.asarray(stack[0]).max(axis=0) if frames and n else np.ones(2)
+            self.world_width = world_width or float(np.ceil(extent[0]))
+            self.world_height = world_height or float(np.ceil(extent[1]))
+
+        if world_width is not None:
+            self.world_width = float(world_width)
+        if world_height is not None:
+            self.world_height = float(world_height)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError(f"frame {i} out of range for {len(self)} frames")
+        offset, n, frame, sim_time = self._index[i].tolist()
+        pos = self._pos[offset:offset + n]
+        types = self._types[offset:offset + n]
+        return Snapshot(frame, sim_time, pos, types)
+
+    def load(self, i):
+
+        """Frame i copied into memory (the copy pages it in); arrays are read-only."""
+
+        snap = self[i]
+        pos = np.array(snap.pos, dtype=np.float32)
+        types = np.array(snap.types)
+        pos.flags.writeable = False
+        types.flags.writeable = False
+        return Snapshot(snap.frame, snap.time, pos, types)
+
+
+class Prefetcher:
+
+    """
+    Loads upcoming frames of a recording on a background thread.
+
+    request(index, stride) sets the playback position; the thread then loads
+    the frames index + k * stride (k < ahead) that are not cached yet, and
+    frames outside that window are dropped. get(index) returns a cached
+    frame, or loads it on the calling thread (a miss).
+
+    Attributes:
+        ahead (int): Frames kept ahead of the playback position
+        hits, misses (int): get() calls served from the cache / loaded directly
+    """
+
+    def __init__(self, recording, ahead=32, loop=False):
+        self.recording = recording
+        self.ahead = int(ahead)
+        self.loop = loop
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._index = 0
+        self._stride = 1
+        self._closed = False
+        self._wake = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="playback-prefetch", daemon=True)
+        self._thread.start()
+
+    def _window(self):
+        n = len(self.recording)
+        window = []
+        for k in range(self.ahead):
+            i = self._index + k * self._stride
+            if self.loop and n:
+                i %= n
+            elif not 0 <= i < n:
+                break
+            window.append(i)
+        return window
+
+    def _next_missing(self):
+        for i in self._window():
+            if i not in self._cache:
+                return i
+        return None
+
+    def request(self, index, stride=1):
+        with self._wake:
+            self._index = int(index)
+            self._stride = int(stride) or 1
+            window = set(self._window())
+            for i in [i for i in self._cache if i not in window]:
+                del self._cache[i]
+            self._wake.notify()
+
+    def get(self, index):
+        with self._wake:
+            snap = self._cache.get(index)
+        if snap is not None:
+            self.hits += 1
+            return snap
+        self.misses += 1
+        snap = self.recording.load(index)
+        with self._wake:
+            self._cache[index] = snap
+        return snap
+
+    def close(self):
+        with self._wake:
+            self._closed = True
+            self._wake.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while not self._closed and self._next_missing() is None:
+                    self._wake.wait()
+                if self._closed:
+                    return
+                index = self._next_missing()
+
+            snap = self.recording.load(index)  # disk I/O without the lock
+
+            with self._wake:
+                if index in self._window():
+                    self._cache[index] = snap
+
+
+class PlaybackSource:
+
+    """
+    Stand-in for Game that plays a recording in ParticleCanvas.
+
+    Attributes:
+        recording (Recording): Frames played
+        speed (float): Playback speed; 1 shows `fps` recorded frames per
+            second, negative values play backwards
+        fps (float): Recorded frames per second at speed 1
+        paused (bool): step() keeps showing the current frame
+        loop (bool): Wrap around at the ends instead of stopping
+        w, h (float): World size (like Game)
+    """
+
+    def __init__(self, recording, speed=1.0, fps=60.0, loop=False, prefetch=32):
+        if isinstance(recording, (str, os.PathLike)):
+            recording = Recording(recording)
+        if len(recording) == 0:
+            raise ValueError("recording has no frames")
+        self.recording = recording
+        self.speed = float(speed)
+        self.fps = float(fps)
+        self.paused = False
+        self.loop = loop
+        self.w = recording.world_width
+        self.h = recording.world_height
+        self.position = 0.0  # fractional frame index
+        self.prefetcher = Prefetcher(recording, ahead=prefetch, loop=loop)
+        self.prefetcher.request(0)
+
+    @property
+    def index(self):
+
+        """Index of the frame shown."""
+
+        return int(self.position)
+
+    def seek(self, index):
+
+        """Jumps to frame `index` (clamped to the recording)."""
+
+        self.position = float(min(max(int(index), 0), len(self.recording) - 1))
+        self.prefetcher.request(self.index, self._stride(1 / self.fps))
+
+    def _stride(self, dt):
+        frames = self.speed * self.fps * dt
+        stride = int(round(frames)) or (1 if frames >= 0 else -1)
+        return stride
+
+    def step(self, dt=0.0):
+
+        """
+        Advances the playback by dt seconds of wall time.
+
+        Returns:
+            Snapshot: The frame at the new position
+        """
+
+        n = len(self.recording)
+        if not self.paused and dt:
+            position = self.position + self.speed * self.fps * dt
+            if self.loop:
+                position %= n
+            elif not 0.0 <= position < n:
+                position = min(max(position, 0.0), n - 1)
+                self.paused = True  # stop at the ends
+            self.position = position
+
+        index = self.index
+        snap = self.prefetcher.get(index)
+        self.prefetcher.request(index, self._stride(dt or 1 / self.fps))
+        return snap
+
+    def close(self):
+        self.prefetcher.close()
+
+
+def record(directory, n=10000, frames=1000, world_width=100.0, world_height=100.0, dt=0.01, every=1):
+
+    """Runs a random headless simulation and records every `every`-th step."""
+
+    try:
+        from .game import Game
+    except ImportError:
+        from game import Game
+
+    game = Game(n=n, world_width=world_width, world_height=world_height)
+    game.matrix[:] = np.random.uniform(-1.0, 1.0, size=game.matrix.shape)
+
+    with Recorder(directory, game.w, game.h, dt=dt * every) as recorder:
+        try:
+            for step in range(frames * every):
+                snap = game.step(dt)
+                if step % every == 0:
+                    recorder.record(snap)
+        except KeyboardInterrupt:
+            pass
+        print(f"Recorded {recorder.frames} frames to {directory}")
+
+
+def view(path, speed=1.0, loop=True):
+
+    """Opens a window that plays a recording with play/pause, a scrub slider and a speed box."""
+
+    from PySide6 import QtCore, QtWidgets
+    from PySide6.QtCore import Qt
+
+    try:
+        from .frontend_vispy import ParticleCanvas
+    except ImportError:
+        from frontend_vispy import ParticleCanvas
+
+    app = QtWidgets.QApplication([])
+    source = PlaybackSource(path, speed=speed, loop=loop)
+    last = len(source.recording) - 1
+
+    window = QtWidgets.QWidget()
+    window.setWindowTitle(f"particles life - {path}")
+    layout = QtWidgets.QVBoxLayout(window)
+    canvas = ParticleCanvas(source, world_width=source.w, world_height=source.h)
+    layout.addWidget(canvas.native, stretch=1)
+
+    controls = QtWidgets.QHBoxLayout()
+    play_btn = QtWidgets.QPushButton("Pause")
+    slider = QtWidgets.QSlider(Qt.Orientation.Horizontal)
+    slider.setRange(0, last)
+    speed_box = QtWidgets.QDoubleSpinBox()
+    speed_box.setRange(-64.0, 64.0)
+    speed_box.setSingleStep(0.25)
+    speed_box.setValue(source.speed)
+    label = QtWidgets.QLabel()
+    controls.addWidget(play_btn)
+    controls.addWidget(slider, stretch=1)
+    controls.addWidget(QtWidgets.QLabel("speed"))
+    controls.addWidget(speed_box)
+    controls.addWidget(label)
+    layout.addLayout(controls)
+
+    def show_position(snap):
+        slider.blockSignals(True)  # no seek back from the slider
+        slider.setValue(source.index)
+        slider.blockSignals(False)
+        label.setText(f"frame {source.index}/{last}  t={snap.time:.2f}")
+        play_btn.setText("Play" if source.paused else "Pause")
+
+    def tick():
+        snap = source.step(canvas.dt)
+        canvas.draw_snapshot(snap)
+        canvas.update()
+        show_position(snap)
+
+    def toggle():
+        source.paused = not source.paused
+        if not source.paused and not loop and source.index in (0, last):
+            # Restart from the end the playback stopped at
+            source.seek(0 if source.speed >= 0 else last)
+        show_position(source.step(0.0))
+
+    def scrub(value):
+        source.seek(value)
+        snap = source.step(0.0)
+        canvas.draw_snapshot(snap)
+        canvas.update()
+        show_position(snap)
+
+    play_btn.clicked.connect(toggle)
+    slider.valueChanged.connect(scrub)
+    speed_box.valueChanged.connect(lambda v: setattr(source, "speed", float(v)))
+
+    timer = QtCore.QTimer()
+    timer.timeout.connect(tick)
+    timer.start(int(1000 / 60))
+    window.resize(900, 650)
+    window.show()
+    app.exec()
+    source.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record Particle Life runs and play them back")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="run a headless simulation and record it")
+    record_parser.add_argument("directory")
+    record_parser.add_argument("--n", type=int, default=10000)
+    record_parser.add_argument("--frames", type=int, default=1000)
+    record_parser.add_argument("--width", type=float, default=100.0)
+    record_parser.add_argument("--height", type=float, default=100.0)
+    record_parser.add_argument("--dt", type=float, default=0.01)
+    record_parser.add_argument("--every", type=int, default=1, help="record every n-th step")
+
+    view_parser = commands.add_parser("view", help="play a recording directory or (frames, n, 2) .npy file")
+    view_parser.add_argument("path")
+    view_parser.add_argument("--speed", type=float, default=1.0)
+    view_parser.add_argument("--no-loop", action="store_true")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args.directory, args.n, args.frames, args.width, args.height, args.dt, args.every)
+    else:
+        view(args.path, args.speed, loop=not args.no_loop)
+
+
+if __name__ == "__main__":
+    main()
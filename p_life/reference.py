@@ -0,0 +1,357 @@
+"""
+Brute-force reference of the force law and an equivalence harness for the
+optimized kernels.
+
+reference_forces evaluates the force law of calculate_forces for all N^2
+pairs in float64 with plain NumPy, without cells. check_kernels runs every
+kernel variant on a set of randomized scenes (different N, densities, world
+sizes and r_max up to half the world) and compares it to the reference.
+
+Run the harness:
+    python -m p_life.reference
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+try:
+    from .ensemble import Ensemble, calculate_ensemble_forces, sort_ensemble_into_cells
+    from .game import (
+        FORCE_KERNELS,
+        RESPA_CUTOFF,
+        Game,
+        calculate_forces_ordered,
+        calculate_matrix_forces,
+        calculate_repulsion_forces,
+        cell_layout,
+        sort_into_cells,
+    )
+except ImportError:
+    from ensemble import Ensemble, calculate_ensemble_forces, sort_ensemble_into_cells
+    from game import (
+        FORCE_KERNELS,
+        RESPA_CUTOFF,
+        Game,
+        calculate_forces_ordered,
+        calculate_matrix_forces,
+        calculate_repulsion_forces,
+        cell_layout,
+        sort_into_cells,
+    )
+
+
+BETA = 0.3  # repulsion zone, fraction of r_max
+REPULSION_STRENGTH = 2.0
+
+
+def reference_forces(pos, types, matrix, r_max, world_width, world_height, chunk=1024, radii=None):
+
+    """
+    Force on every particle from all other particles, O(N^2) in float64.
+
+    Same law as calculate_forces: minimum-image distance on the torus, linear
+    repulsion below BETA * r_max, matrix-scaled triangular bump up to r_max.
+
+    Args:
+        pos (np.ndarray): Particle positions, shape (N, 2)
+        types (np.ndarray): Particle types, shape (N,)
+        matrix (np.ndarray): Interaction matrix
+        r_max (float): Interaction radius
+        world_width, world_height (float): World size
+        chunk (int): Rows of the pair matrix evaluated at once (memory bound)
+        radii (np.ndarray or None): Interaction radius per pair of types,
+            shape (R, R), in place of r_max (calculate_forces_pair_radii)
+
+    Returns:
+        np.ndarray: float64 forces, shape (N, 2), in the order of pos
+    """
+
+    pos = np.asarray(pos, dtype=np.float64)
+    types = np.asarray(types)
+    matrix = np.asarray(matrix, dtype=np.float64)
+    size = np.array([world_width, world_height])
+    forces = np.zeros_like(pos)
+
+    for start in range(0, len(pos), chunk):
+        rel = pos[None, :, :] - pos[start:start + chunk, None, :]  # a -> b
+        rel -= size * np.round(rel / size)
+        dist = np.sqrt(np.sum(rel * rel, axis=2))
+        if radii is None:
+            cutoff = np.full_like(dist, r_max)
+        else:
+            cutoff = np.asarray(radii, dtype=np.float64)[types[start:start + chunk, None], types[None, :]]
+        normalized = dist / cutoff
+
+        pct = (normalized - BETA) / (1.0 - BETA)
+        factor = np.where(
+            normalized < BETA,
+            (normalized / BETA - 1.0) * REPULSION_STRENGTH,
+            matrix[types[start:start + chunk, None], types[None, :]] * (1.0 - np.abs(2.0 * pct - 1.0)),
+        )
+        factor[(dist <= 0.0) | (dist >= cutoff)] = 0.0
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            direction = np.where(dist[:, :, None] > 0.0, rel / dist[:, :, None], 0.0)
+        forces[start:start + chunk] = np.sum(direction * factor[:, :, None], axis=1)
+
+    return forces
+
+
+def cell_kernel_forces(kernel, cell_scale=1.0):
+
+    """
+    Adapts a kernel with the calculate_forces signature to the harness: sorts
+    the particles into cells (of cell_scale * r_max, see Game.cell_size), runs
+    the kernel and restores the original order.
+    """
+
+    def forces(pos, types, matrix, r_max, world_width, world_height):
+        order, cell_starts, cell_counts, cols, rows = sort_into_cells(
+            pos, world_width, world_height, cell_scale * r_max
+        )
+        sorted_forces = kernel(
+            np.ascontiguousarray(pos[order]), types[order], cell_starts, cell_counts,
+            cols, rows, matrix, r_max, world_width, world_height,
+        )
+        result = np.empty((len(pos), 2), dtype=np.float64)
+        result[order] = sorted_forces
+        return result
+
+    return forces
+
+
+def ordered_forces(order):
+
+    """Adapts calculate_forces_ordered with particles sorted along a space-filling curve."""
+
+    def forces(pos, types, matrix, r_max, world_width, world_height):
+        sort_indices, cell_starts, cell_counts, cols, rows = sort_into_cells(
+            pos, world_width, world_height, r_max, order
+        )
+        sorted_forces = calculate_forces_ordered(
+            np.ascontiguousarray(pos[sort_indices]), types[sort_indices], cell_starts, cell_counts,
+            cell_layout(cols, rows, order)[1], matrix, r_max, world_width, world_height,
+        )
+        result = np.empty((len(pos), 2), dtype=np.float64)
+        result[sort_indices] = sorted_forces
+        return result
+
+    return forces
+
+
+def respa_split_forces(pos, types, matrix, r_max, world_width, world_height):
+
+    """Slow plus fast force of the respa integrator (repulsion on its finer grid)."""
+
+    slow = cell_kernel_forces(calculate_matrix_forces)(pos, types, matrix, r_max, world_width, world_height)
+
+    cutoff = RESPA_CUTOFF * r_max
+    order, cell_starts, cell_counts, cols, rows = sort_into_cells(pos, world_width, world_height, cutoff)
+    fast = calculate_repulsion_forces(
+        np.ascontiguousarray(pos[order]), types[order], cell_starts, cell_counts,
+        cols, rows, matrix, r_max, world_width, world_height,
+    )
+    slow[order] += fast
+    return slow
+
+
+def ensemble_forces(pos, types, matrix, r_max, world_width, world_height):
+
+    """Forces of calculate_ensemble_forces for an ensemble of one world."""
+
+    game = Game(n=0, world_width=world_width, world_height=world_height, r_max=r_max)
+    game.pos, game.types = pos, types
+    game.vel = np.zeros_like(pos)
+    game.matrix = matrix
+    ensemble = Ensemble([game])
+
+    order, cell_starts, cell_counts = sort_ensemble_into_cells(
+        ensemble.pos, ensemble.world, ensemble.widths, ensemble.heights,
+        ensemble.r_maxs, ensemble.cols, ensemble.rows, ensemble.cell_offsets,
+    )
+    sorted_forces = calculate_ensemble_forces(
+        ensemble.pos[order], ensemble.types[order], cell_starts, cell_counts,
+        ensemble.cell_world, ensemble.cell_offsets, ensemble.cols, ensemble.rows,
+        ensemble.matrices, ensemble.r_maxs, ensemble.widths, ensemble.heights,
+    )
+    result = np.empty((len(pos), 2), dtype=np.float64)
+    result[order] = sorted_forces
+    return result
+
+
+def kernel_variants():
+
+    """All force implementations checked by the harness, by name."""
+
+    variants = {name: cell_kernel_forces(kernel) for name, kernel in FORCE_KERNELS.items()}
+    variants["cells_coarse"] = cell_kernel_forces(FORCE_KERNELS["cells"], cell_scale=1.5)
+    variants["morton"] = ordered_forces("morton")
+    variants["hilbert"] = ordered_forces("hilbert")
+    variants["respa_split"] = respa_split_forces
+    variants["ensemble"] = ensemble_forces
+    return variants
+
+
+def random_scene(rng, n, world_width, world_height, r_max, clustered=False, n_types=4):
+
+    """
+    Random particles, types and interaction matrix.
+
+    Args:
+        rng (np.random.Generator): Random source
+        n (int): Number of particles
+        world_width, world_height (float): World size
+        r_max (float): Interaction radius
+        clustered (bool): Put the particles into a few dense blobs (some of
+            them across the world edges) instead of spreading them uniformly
+        n_types (int): Number of particle types
+
+    Returns:
+        dict: "pos" (float32), "types", "matrix" (float32), "r_max",
+            "world_width", "world_height"
+    """
+
+    size = np.array([world_width, world_height])
+    if clustered:
+        centers = rng.uniform(0.0, 1.0, size=(4, 2)) * size
+        centers[0] = (0.0, 0.0)  # one blob around the corner
+        pos = centers[rng.integers(0, len(centers), size=n)] + rng.normal(0.0, 0.3 * r_max, size=(n, 2))
+    else:
+        pos = rng.uniform(0.0, 1.0, size=(n, 2)) * size
+    pos = np.mod(pos, size).astype(np.float32)
+    pos = np.minimum(pos, np.nextafter(size.astype(np.float32), 0))  # float32 rounding up to the edge
+
+    return {
+        "pos": pos,
+        "types": rng.integers(0, n_types, size=n),
+        "matrix": rng.uniform(-1.0, 1.0, size=(n_types, n_types)).astype(np.float32),
+        "r_max": float(r_max),
+        "world_width": float(world_width),
+        "world_height": float(world_height),
+    }
+
+
+# (name, n, world width, world height, r_max, clustered)
+SCENES = [
+    ("single", 1, 50.0, 50.0, 10.0, False),
+    ("pair", 2, 50.0, 50.0, 10.0, False),
+    ("sparse", 200, 100.0, 100.0, 5.0, False),
+    ("default", 2000, 50.0, 50.0, 10.0, False),
+    ("dense", 3000, 20.0, 20.0, 4.0, False),
+    ("clustered", 2000, 60.0, 60.0, 6.0, True),
+    ("rectangular", 1500, 73.0, 31.0, 7.0, False),
+    ("uneven_cells", 1500, 47.5, 47.5, 10.0, False),
+    ("three_cells", 800, 30.0, 30.0, 10.0, False),
+    ("two_cells", 800, 20.0, 20.0, 9.9, False),
+    ("half_world", 800, 20.0, 20.0, 10.0, False),
+    ("one_by_many", 800, 15.0, 60.0, 7.4, False),
+]
+
+
+def make_scenes(seed=0, scenes=SCENES):
+
+    """Builds the random scenes of the harness, reproducible by seed."""
+
+    rng = np.random.default_rng(seed)
+    return [
+        dict(random_scene(rng, n, w, h, r_max, clustered), name=name)
+        for name, n, w, h, r_max, clustered in scenes
+    ]
+
+
+def compare(forces, scene, rtol=1e-3):
+
+    """
+    Compares one force implementation with the reference on one scene.
+
+    The error is measured per particle as the length of the difference
+    vector, relative to the largest reference force in the scene (at least 1),
+    since float32 kernels lose precision relative to the force scale.
+
+    Args:
+        forces (callable): forces(pos, types, matrix, r_max, world_width, world_height)
+        scene (dict): Scene from random_scene / make_scenes
+        rtol (float): Allowed error relative to the force scale
+
+    Returns:
+        dict: "scene", "n", "max_error", "mean_error", "worst" (index of the
+            particle with the largest error) and "passed"
+    """
+
+    args = (scene["pos"], scene["types"], scene["matrix"], scene["r_max"],
+            scene["world_width"], scene["world_height"])
+    expected = reference_forces(*args)
+    actual = np.asarray(forces(*args), dtype=np.float64)
+
+    scale = max(1.0, float(np.max(np.linalg.norm(expected, axis=1), initial=0.0)))
+    error = np.linalg.norm(actual - expected, axis=1) / scale
+    max_error = float(np.max(error, initial=0.0))
+
+    return {
+        "scene": scene.get("name", ""),
+        "n": len(scene["pos"]),
+        "max_error": max_error,
+        "mean_error": float(np.mean(error)) if len(error) else 0.0,
+        "worst": int(np.argmax(error)) if len(error) else -1,
+        "passed": bool(max_error <= rtol),
+    }
+
+
+def check_kernels(variants=None, scenes=None, rtol=1e-3):
+
+    """
+    Runs every kernel variant on every scene against the reference.
+
+    Args:
+        variants (dict or None): name -> forces callable; default kernel_variants()
+        scenes (list or None): Scenes; default make_scenes()
+        rtol (float): Allowed error relative to the force scale
+
+    Returns:
+        list[dict]: Result of compare() with an additional "kernel" key
+    """
+
+    variants = kernel_variants() if variants is None else variants
+    scenes = make_scenes() if scenes is None else scenes
+    results = []
+    for name, forces in variants.items():
+        for scene in scenes:
+            results.append(dict(compare(forces, scene, rtol), kernel=name))
+    return results
+
+
+def format_report(results):
+
+    """Formats check_kernels results as a table, failures marked."""
+
+    lines = [f"{'kernel':<14} {'scene':<14} {'n':>6} {'max error':>11} {'mean error':>11}"]
+    for r in results:
+        mark = "" if r["passed"] else "  FAIL (particle {})".format(r["worst"])
+        lines.append(
+            f"{r['kernel']:<14} {r['scene']:<14} {r['n']:>6} {r['max_error']:>11.2e} {r['mean_error']:>11.2e}{mark}"
+        )
+    failed = sum(not r["passed"] for r in results)
+    lines.append(f"{len(results) - failed} passed, {failed} failed")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the force kernels against the brute-force reference")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rtol", type=float, default=1e-3)
+    parser.add_argument("--kernel", action="append", help="only check these variants")
+    args = parser.parse_args()
+
+    variants = kernel_variants()
+    if args.kernel:
+        variants = {name: variants[name] for name in args.kernel}
+
+    results = check_kernels(variants, make_scenes(args.seed), args.rtol)
+    print(format_report(results))
+    sys.exit(0 if all(r["passed"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
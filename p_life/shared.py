@@ -0,0 +1,324 @@
+"""
+Shared-memory publication of snapshots for viewer and analysis processes on
+the same host.
+
+The publisher owns one multiprocessing.shared_memory block that holds a ring
+of slots. Each slot has room for `capacity` particles (positions and types)
+plus a small header with a seqlock-style version counter:
+
+    seq odd   the publisher is writing the slot
+    seq even  the slot is consistent
+
+publish() writes the next slot of the ring and then marks it as the latest,
+so readers never wait for the simulation and the simulation never waits for
+readers. A reader maps the block once and reads the latest slot either as a
+checked copy (read()) or as zero-copy views (read(copy=False)) that stay
+valid until the publisher comes round the ring again; still_valid() tells
+whether that happened.
+
+Publish a headless run and watch it from another process:
+    python -m p_life.shared serve --name plife --n 20000
+    python -m p_life.shared view --name plife
+"""
+
+import argparse
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+try:
+    from . import tracing
+except ImportError:
+    import tracing
+
+
+MAGIC = 0x504C4946  # "PLIF"
+HEADER_WORDS = 8  # global header: magic, n_slots, capacity, latest slot, published frames
+SLOT_HEADER_BYTES = 64  # int64 seq, frame, n, pad; float64 time, world w, world h, pad
+TYPES_DTYPE = np.dtype(int)  # same dtype as Game.types
+
+# Blocks created by publishers in this process (the resource tracker is per process)
+_PUBLISHED_HERE = set()
+
+
+def _slot_size(capacity):
+    return SLOT_HEADER_BYTES + capacity * 2 * 4 + capacity * TYPES_DTYPE.itemsize
+
+
+def _slot_views(buf, slot, capacity):
+
+    """Header, position and type views of one slot of the ring."""
+
+    offset = HEADER_WORDS * 8 + slot * _slot_size(capacity)
+    ints = np.ndarray(4, dtype=np.int64, buffer=buf, offset=offset)
+    reals = np.ndarray(4, dtype=np.float64, buffer=buf, offset=offset + 32)
+    offset += SLOT_HEADER_BYTES
+    pos = np.ndarray((capacity, 2), dtype=np.float32, buffer=buf, offset=offset)
+    offset += pos.nbytes
+    types = np.ndarray(capacity, dtype=TYPES_DTYPE, buffer=buf, offset=offset)
+    return ints, reals, pos, types
+
+
+class SnapshotPublisher:
+
+    """
+    Writes snapshots into a shared-memory ring of slots.
+
+    Attributes:
+        name (str): Name of the shared memory block, passed to SnapshotReader
+        capacity (int): Maximum number of particles per snapshot
+        n_slots (int): Number of slots in the ring
+        frame (int): Number of snapshots published
+    """
+
+    def __init__(self, capacity, n_slots=3, name=None):
+        self.capacity = int(capacity)
+        self.n_slots = int(n_slots)
+        self.frame = 0
+        size = HEADER_WORDS * 8 + self.n_slots * _slot_size(self.capacity)
+        self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self._shm.name
+        _PUBLISHED_HERE.add(self.name)
+
+        self._header = np.ndarray(HEADER_WORDS, dtype=np.int64, buffer=self._shm.buf)
+        self._header[:] = (MAGIC, self.n_slots, self.capacity, -1, 0, 0, 0, 0)
+        self._slots = [_slot_views(self._shm.buf, s, self.capacity) for s in range(self.n_slots)]
+        for ints, _, _, _ in self._slots:
+            ints[:] = 0
+
+    def publish(self, snap, sim_time=0.0, world_width=0.0, world_height=0.0):
+
+        """
+        Writes a snapshot into the next slot and makes it the latest one.
+
+        Args:
+            snap (dict): Snapshot with "pos" and "types" (e.g. from Game.step)
+            sim_time (float): Simulated time
+            world_width, world_height (float): World size
+        """
+
+        n = len(snap["pos"])
+        if n > self.capacity:
+            raise ValueError(f"{n} particles do not fit into a capacity of {self.capacity}")
+
+        slot = self.frame % self.n_slots
+        ints, reals, pos, types = self._slots[slot]
+
+        with tracing.span("shared.publish", "io"):
+            ints[0] += 1  # odd: writing
+            pos[:n] = snap["pos"]
+            types[:n] = snap["types"]
+            ints[1] = self.frame
+            ints[2] = n
+            reals[:3] = (sim_time, world_width, world_height)
+            ints[0] += 1  # even: consistent
+
+        self._header[3] = slot
+        self._header[4] = self.frame + 1
+        self.frame += 1
+
+    def close(self):
+
+        """Releases and removes the shared memory block."""
+
+        if self._shm is None:
+            return
+        self._header = self._slots = None
+        self._shm.close()
+        self._shm.unlink()
+        _PUBLISHED_HERE.discard(self.name)
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SnapshotReader:
+
+    """
+    Maps the shared memory block of a SnapshotPublisher (in any process).
+
+    Args:
+        name (str): SnapshotPublisher.name
+    """
+
+    def __init__(self, name):
+        if sys.version_info >= (3, 13):
+            self._shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            # Only the publisher may remove the block; otherwise the resource
+            # tracker of this process unlinks it when the reader exits
+            if self._shm.name not in _PUBLISHED_HERE:
+                resource_tracker.unregister(self._shm._name, "shared_memory")
+
+        header = np.ndarray(HEADER_WORDS, dtype=np.int64, buffer=self._shm.buf)
+        if header[0] != MAGIC:
+            raise ValueError(f"{name!r} is not a snapshot ring")
+        self._header = header
+        self.n_slots = int(header[1])
+        self.capacity = int(header[2])
+        self._slots = [_slot_views(self._shm.buf, s, self.capacity) for s in range(self.n_slots)]
+
+    @property
+    def published(self):
+        return int(self._header[4])
+
+    def read(self, copy=True, timeout=1.0):
+
+        """
+        Reads the latest snapshot.
+
+        Args:
+            copy (bool): True returns private copies, checked against the
+                version counter; False returns zero-copy views into the slot,
+                to be checked with still_valid() after use
+            timeout (float): Seconds to retry while the slot is being written
+
+        Returns:
+            dict or None: Snapshot with the keys "pos", "types", "frame",
+                "time", "world_width", "world_height", "seq" and "slot"; None if
+                nothing has been published yet
+        """
+
+        end = time.monotonic() + timeout
+        while True:
+            slot = int(self._header[3])
+            if slot < 0:
+                return None
+
+            ints, reals, pos, types = self._slots[slot]
+            seq = int(ints[0])
+            if seq % 2 == 0:
+                n = int(ints[2])
+                snap = {
+                    "pos": pos[:n].copy() if copy else pos[:n],
+                    "types": types[:n].copy() if copy else types[:n],
+                    "frame": int(ints[1]),
+                    "time": float(reals[0]),
+                    "world_width": float(reals[1]),
+                    "world_height": float(reals[2]),
+                    "seq": seq,
+                    "slot": slot,
+                }
+                if int(ints[0]) == seq:
+                    return snap
+
+            if time.monotonic() > end:
+                raise TimeoutError("snapshot slot stayed busy")
+
+    def still_valid(self, snap):
+
+        """Whether the slot of a zero-copy snapshot has not been rewritten since read()."""
+
+        return int(self._slots[snap["slot"]][0][0]) == snap["seq"]
+
+    def close(self):
+        self._header = self._slots = None
+        self._shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SharedGame:
+
+    """
+    Stand-in for Game that shows the latest shared snapshot in ParticleCanvas.
+
+    step(dt) ignores dt and returns the newest snapshot.
+    """
+
+    def __init__(self, name, timeout=10.0):
+        self.reader = SnapshotReader(name)
+        end = time.monotonic() + timeout
+        while self.reader.published == 0:
+            if time.monotonic() > end:
+                raise TimeoutError("nothing published")
+            time.sleep(0.01)
+        first = self.reader.read()
+        self.w = first["world_width"]
+        self.h = first["world_height"]
+
+    def step(self, dt=0.0):
+        return self.reader.read()
+
+    def close(self):
+        self.reader.close()
+
+
+def serve(name, n=10000, world_width=100.0, world_height=100.0, dt=0.01):
+
+    """Runs a random headless simulation and publishes every step until interrupted."""
+
+    try:
+        from .game import Game
+    except ImportError:
+        from game import Game
+
+    game = Game(n=n, world_width=world_width, world_height=world_height)
+    game.matrix[:] = np.random.uniform(-1.0, 1.0, size=game.matrix.shape)
+
+    with SnapshotPublisher(capacity=n, name=name) as publisher:
+        print(f"Publishing to shared memory {publisher.name!r}")
+        try:
+            while True:
+                publisher.publish(game.step(dt), game.time, game.w, game.h)
+        except KeyboardInterrupt:
+            pass
+
+
+def view(name):
+
+    """Opens a window that shows the published snapshots."""
+
+    from PySide6 import QtCore, QtWidgets
+
+    try:
+        from .frontend_vispy import ParticleCanvas
+    except ImportError:
+        from frontend_vispy import ParticleCanvas
+
+    app = QtWidgets.QApplication([])
+    shared = SharedGame(name)
+    canvas = ParticleCanvas(shared, world_width=shared.w, world_height=shared.h)
+    canvas.native.setWindowTitle(f"particles life - {name}")
+    canvas.show()
+
+    timer = QtCore.QTimer()
+    timer.timeout.connect(canvas.step_and_draw)
+    timer.start(int(1000 / 60))
+    app.exec()
+    shared.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Share Particle Life snapshots between local processes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="run a headless simulation and publish it")
+    serve_parser.add_argument("--name", default="plife")
+    serve_parser.add_argument("--n", type=int, default=10000)
+    serve_parser.add_argument("--width", type=float, default=100.0)
+    serve_parser.add_argument("--height", type=float, default=100.0)
+
+    view_parser = commands.add_parser("view", help="show the published snapshots in a window")
+    view_parser.add_argument("--name", default="plife")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.name, args.n, args.width, args.height)
+    else:
+        view(args.name)
+
+
+if __name__ == "__main__":
+    main()
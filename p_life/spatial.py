@@ -0,0 +1,329 @@
+"""
+Spatial queries on the cell grid of a Particle Life world.
+
+The kernels take the sorted positions and table of contents produced by
+sort_into_cells (see Game.cell_index()) and only visit the cells that overlap
+the query region, with torus wrap-around. Returned indices refer to the
+sorted arrays; Game maps them back to indices into Game.pos.
+"""
+
+import numpy as np
+from numba import njit, prange
+from numba import types as nb_types
+
+
+@njit(cache=True)
+def _cell_of(value, cell_size, n_cells):
+
+    """Cell along one axis, same rule as sort_into_cells."""
+
+    return min(max(int(value / cell_size), 0), n_cells - 1)
+
+
+@njit(cache=True)
+def _axis_ranges(start, extent, size, cell_size, n_cells):
+
+    """
+    Cells along one axis that overlap [start, start + extent] on a ring of
+    length size, as up to two inclusive ranges (first_a, last_a, first_b,
+    last_b); the second range is empty if first_b > last_b.
+    """
+
+    if extent >= size:
+        return 0, n_cells - 1, 1, 0
+
+    start = start % size
+    end = start + extent
+    if end < size:
+        return _cell_of(start, cell_size, n_cells), _cell_of(end, cell_size, n_cells), 1, 0
+
+    # The interval wraps around the world edge
+    first_a = _cell_of(start, cell_size, n_cells)
+    last_b = _cell_of(end - size, cell_size, n_cells)
+    if last_b >= first_a:
+        return 0, n_cells - 1, 1, 0
+    return first_a, n_cells - 1, 0, last_b
+
+
+@njit(cache=True)
+def _range_length(first_a, last_a, first_b, last_b):
+
+    """Number of cells in a pair of ranges from _axis_ranges."""
+
+    return (last_a - first_a + 1) + max(last_b - first_b + 1, 0)
+
+
+@njit(cache=True)
+def _range_at(j, first_a, last_a, first_b):
+
+    """j-th cell of a pair of ranges from _axis_ranges."""
+
+    n_a = last_a - first_a + 1
+    if j < n_a:
+        return first_a + j
+    return first_b + j - n_a
+
+
+@njit(cache=True)
+def _torus_delta(delta, size):
+
+    """Shortest signed distance on a ring of length size."""
+
+    half = size * 0.5
+    if delta > half:
+        return delta - size
+    if delta < -half:
+        return delta + size
+    return delta
+
+
+@njit(cache=True)
+def _append(indices, dist_sq, count, index, value):
+
+    """Appends to a pair of growable buffers and returns them (amortized doubling)."""
+
+    if count == len(indices):
+        grown_indices = np.empty(2 * len(indices), dtype=indices.dtype)
+        grown_dist = np.empty(2 * len(indices), dtype=dist_sq.dtype)
+        grown_indices[:count] = indices[:count]
+        grown_dist[:count] = dist_sq[:count]
+        indices = grown_indices
+        dist_sq = grown_dist
+    indices[count] = index
+    dist_sq[count] = value
+    return indices, dist_sq
+
+
+@njit(cache=True)
+def query_radius_cells(
+    sorted_pos,
+    cell_starts,
+    cell_counts,
+    cols,
+    rows,
+    cell_size,
+    world_width,
+    world_height,
+    x,
+    y,
+    radius,
+):
+
+    """
+    Finds all particles within radius of the point (x, y).
+
+    Arguments:
+        sorted_pos (np.ndarray): Particle positions sorted by cell ID, shape (N, 2)
+        cell_starts (np.ndarray): Start index of each cell in sorted arrays
+        cell_counts (np.ndarray): Number of particles in each cell
+        cols (int): Number of grid columns
+        rows (int): Number of grid rows
+        cell_size (float): Cell size used by sort_into_cells
+        world_width (float): Width of the simulation world
+        world_height (float): Height of the simulation world
+        x, y (float): Query point
+        radius (float): Query radius (torus distance)
+
+    Returns:
+        tuple: (indices, dist_sq) of the matches, indices into the sorted arrays
+    """
+
+    x = x % world_width
+    y = y % world_height
+    radius_sq = radius * radius
+
+    indices = np.empty(16, dtype=np.int64)
+    dist_sq = np.empty(16, dtype=np.float64)
+    count = 0
+
+    x0, x1, x2, x3 = _axis_ranges(x - radius, 2.0 * radius, world_width, cell_size, cols)
+    y0, y1, y2, y3 = _axis_ranges(y - radius, 2.0 * radius, world_height, cell_size, rows)
+
+    for j in range(_range_length(y0, y1, y2, y3)):
+        cell_y = _range_at(j, y0, y1, y2)
+        for i_x in range(_range_length(x0, x1, x2, x3)):
+            cell_x = _range_at(i_x, x0, x1, x2)
+            cell_id = cell_x + cell_y * cols
+            start = cell_starts[cell_id]
+            for i in range(start, start + cell_counts[cell_id]):
+                rel_x = _torus_delta(sorted_pos[i, 0] - x, world_width)
+                rel_y = _torus_delta(sorted_pos[i, 1] - y, world_height)
+                d_sq = rel_x * rel_x + rel_y * rel_y
+                if d_sq <= radius_sq:
+                    indices, dist_sq = _append(indices, dist_sq, count, i, d_sq)
+                    count += 1
+
+    return indices[:count], dist_sq[:count]
+
+
+@njit(cache=True)
+def query_rect_cells(
+    sorted_pos,
+    cell_starts,
+    cell_counts,
+    cols,
+    rows,
+    cell_size,
+    world_width,
+    world_height,
+    x,
+    y,
+    width,
+    height,
+):
+
+    """
+    Finds all particles in the rectangle [x, x + width) x [y, y + height).
+
+    The rectangle may cross the world edges; it wraps around like the world.
+
+    Arguments:
+        sorted_pos, cell_starts, cell_counts, cols, rows, cell_size,
+        world_width, world_height: Same as query_radius_cells
+        x, y (float): Lower left corner of the rectangle
+        width, height (float): Size of the rectangle
+
+    Returns:
+        np.ndarray: Indices of the matches into the sorted arrays
+    """
+
+    x = x % world_width
+    y = y % world_height
+
+    indices = np.empty(16, dtype=np.int64)
+    unused = np.empty(16, dtype=np.float64)
+    count = 0
+
+    x0, x1, x2, x3 = _axis_ranges(x, width, world_width, cell_size, cols)
+    y0, y1, y2, y3 = _axis_ranges(y, height, world_height, cell_size, rows)
+
+    for j in range(_range_length(y0, y1, y2, y3)):
+        cell_y = _range_at(j, y0, y1, y2)
+        for i_x in range(_range_length(x0, x1, x2, x3)):
+            cell_x = _range_at(i_x, x0, x1, x2)
+            cell_id = cell_x + cell_y * cols
+            start = cell_starts[cell_id]
+            for i in range(start, start + cell_counts[cell_id]):
+                if (sorted_pos[i, 0] - x) % world_width < width and (sorted_pos[i, 1] - y) % world_height < height:
+                    indices, unused = _append(indices, unused, count, i, 0.0)
+                    count += 1
+
+    return indices[:count]
+
+
+@njit(cache=True)
+def query_knn_cells(
+    sorted_pos,
+    cell_starts,
+    cell_counts,
+    cols,
+    rows,
+    cell_size,
+    world_width,
+    world_height,
+    x,
+    y,
+    k,
+):
+
+    """
+    Finds the k particles closest to the point (x, y).
+
+    Runs radius queries starting at one cell size and doubling the radius
+    until at least k particles are found (or the whole world is covered);
+    every particle within the final radius is a candidate, so the k nearest
+    among them are exact.
+
+    Arguments:
+        sorted_pos, cell_starts, cell_counts, cols, rows, cell_size,
+        world_width, world_height: Same as query_radius_cells
+        x, y (float): Query point
+        k (int): Number of neighbors
+
+    Returns:
+        tuple: (indices, dist_sq) of the min(k, N) nearest particles, sorted by
+            distance, indices into the sorted arrays
+    """
+
+    k = min(k, len(sorted_pos))
+    max_radius = np.sqrt(world_width * world_width + world_height * world_height)
+    radius = cell_size
+
+    while True:
+        indices, dist_sq = query_radius_cells(
+            sorted_pos, cell_starts, cell_counts, cols, rows, cell_size,
+            world_width, world_height, x, y, radius,
+        )
+        if len(indices) >= k or radius >= max_radius:
+            break
+        radius *= 2.0
+
+    order = np.argsort(dist_sq)[:k]
+    return indices[order], dist_sq[order]
+
+
+@njit(parallel=True, cache=True)
+def query_radius_batch_cells(
+    sorted_pos,
+    cell_starts,
+    cell_counts,
+    cols,
+    rows,
+    cell_size,
+    world_width,
+    world_height,
+    points,
+    radius,
+):
+
+    """
+    Radius queries for many points in parallel.
+
+    Arguments:
+        sorted_pos, cell_starts, cell_counts, cols, rows, cell_size,
+        world_width, world_height: Same as query_radius_cells
+        points (np.ndarray): Query points, shape (M, 2)
+        radius (float): Query radius
+
+    Returns:
+        tuple: (offsets, indices) in compressed form: the matches of point m
+            are indices[offsets[m]:offsets[m + 1]] (indices into the sorted arrays)
+    """
+
+    n_points = len(points)
+
+    # First pass counts the matches of every point, second pass fills them
+    # in, so every thread writes to its own slice of one output array
+    offsets = np.zeros(n_points + 1, dtype=np.int64)
+    for m in prange(n_points):
+        found, _ = query_radius_cells(
+            sorted_pos, cell_starts, cell_counts, cols, rows, cell_size,
+            world_width, world_height, points[m, 0], points[m, 1], radius,
+        )
+        offsets[m + 1] = len(found)
+    offsets = np.cumsum(offsets)
+
+    indices = np.empty(offsets[-1], dtype=np.int64)
+    for m in prange(n_points):
+        found, _ = query_radius_cells(
+            sorted_pos, cell_starts, cell_counts, cols, rows, cell_size,
+            world_width, world_height, points[m, 0], points[m, 1], radius,
+        )
+        indices[offsets[m]:offsets[m + 1]] = found
+
+    return offsets, indices
+
+
+_FLOAT_2D = nb_types.float32[:, ::1]
+_INT_1D = nb_types.int64[::1]
+_GRID = (_FLOAT_2D, _INT_1D, _INT_1D, nb_types.int64, nb_types.int64,
+         nb_types.float64, nb_types.float64, nb_types.float64)
+
+# Explicit signatures of all kernels in this module, compiled ahead of the
+# first use by p_life.jit.warmup
+KERNEL_SIGNATURES = [
+    (query_radius_cells, _GRID + (nb_types.float64,) * 3),
+    (query_rect_cells, _GRID + (nb_types.float64,) * 4),
+    (query_knn_cells, _GRID + (nb_types.float64, nb_types.float64, nb_types.int64)),
+    (query_radius_batch_cells, _GRID + (nb_types.float64[:, ::1], nb_types.float64)),
+]
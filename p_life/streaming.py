@@ -0,0 +1,425 @@
+"""
+Frame streaming for watching a simulation from another machine.
+
+The server runs an asyncio TCP server in a background thread and is fed from
+the simulation thread with publish(snapshot). Every snapshot is encoded once
+into a compact binary frame:
+
+    uint32 length of the rest of the message
+    header  magic b"PLFR", frame number, particle count, time, world size,
+            number of types
+    uint32  particle count per type
+    uint16  (x, y) per particle, grouped by type, quantized to the world size
+
+Types are not sent per particle: the particles are grouped by type and the
+per-type counts restore the type array on the client. 4 bytes per particle
+instead of 16 for float32 positions plus int64 types.
+
+Each client has a single "latest frame" slot. A client that cannot keep up
+(its socket send buffer is full) skips frames instead of building a backlog
+on the server, and publish() never blocks the simulation.
+
+The client side needs only numpy and the standard library; RemoteGame looks
+like a Game to ParticleCanvas (step(dt) returns the newest snapshot).
+
+Run a headless simulation and serve it:
+    python -m p_life.streaming serve --n 20000 --port 5005
+Watch it (needs VisPy and PySide6):
+    python -m p_life.streaming view --host compute-node --port 5005
+"""
+
+import argparse
+import asyncio
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+try:
+    from . import tracing
+except ImportError:
+    import tracing
+
+
+MAGIC = b"PLFR"
+HEADER = struct.Struct("<4sIIdddH")  # magic, frame, n, time, world w, world h, n_types
+LENGTH = struct.Struct("<I")
+QUANT = 65536  # uint16 steps per world width/height
+
+
+def encode_frame(pos, types, world_width, world_height, frame=0, sim_time=0.0, n_types=4):
+
+    """
+    Encodes a snapshot as a binary frame (without the length prefix).
+
+    Args:
+        pos (np.ndarray): Particle positions in [0, w) x [0, h), shape (N, 2)
+        types (np.ndarray): Particle types 0..n_types-1, shape (N,)
+        world_width, world_height (float): World size used for quantization
+        frame (int): Frame number
+        sim_time (float): Simulated time
+        n_types (int): Number of particle types
+
+    Returns:
+        bytes: Encoded frame
+
+    Raises:
+        ValueError: If a type is outside 0..n_types-1
+    """
+
+    pos = np.asarray(pos, dtype=np.float64)
+    types = np.asarray(types)
+    if len(types) and (types.min() < 0 or types.max() >= n_types):
+        raise ValueError(f"particle types must be in 0..{n_types - 1}")
+    counts = np.bincount(types, minlength=n_types).astype(np.uint32)
+    order = np.argsort(types, kind="stable")
+
+    scale = np.array([QUANT / world_width, QUANT / world_height])
+    quantized = np.clip(pos[order] * scale, 0, QUANT - 1).astype(np.uint16)
+
+    header = HEADER.pack(MAGIC, frame, len(pos), sim_time, world_width, world_height, n_types)
+    return b"".join((header, counts.tobytes(), quantized.tobytes()))
+
+
+def decode_frame(data):
+
+    """
+    Decodes a frame from encode_frame.
+
+    Args:
+        data (bytes): Encoded frame (without the length prefix)
+
+    Returns:
+        dict: Snapshot with the keys "pos" (float32, cell centers of the
+            quantization grid), "types", "frame", "time", "world_width"
+            and "world_height"
+    """
+
+    magic, frame, n, sim_time, world_width, world_height, n_types = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a particle life frame")
+
+    offset = HEADER.size
+    counts = np.frombuffer(data, dtype=np.uint32, count=n_types, offset=offset)
+    offset += counts.nbytes
+    quantized = np.frombuffer(data, dtype=np.uint16, count=2 * n, offset=offset).reshape(n, 2)
+
+    scale = np.array([world_width / QUANT, world_height / QUANT], dtype=np.float32)
+    pos = (quantized.astype(np.float32) + np.float32(0.5)) * scale
+    types = np.repeat(np.arange(n_types), counts)
+
+    return {
+        "pos": pos,
+        "types": types,
+        "frame": frame,
+        "time": sim_time,
+        "world_width": world_width,
+        "world_height": world_height,
+    }
+
+
+class _Client:
+
+    """Per-connection state: a single slot for the newest unsent frame."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.frame = None
+        self.ready = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+
+    def offer(self, frame):
+        if self.frame is not None:
+            self.dropped += 1  # previous frame was never sent
+        self.frame = frame
+        self.ready.set()
+
+
+class StreamServer:
+
+    """
+    TCP server that sends the newest frame to every connected client.
+
+    Attributes:
+        host (str): Interface to listen on
+        port (int): Port; 0 picks a free port, the actual port is set by start()
+        frame (int): Number of frames published
+        clients (int): Number of connected clients
+        sent (int): Frames sent over all clients
+        dropped (int): Frames skipped over all clients because they were too slow
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self.frame = 0
+        self.sent = 0
+        self._dropped_closed = 0  # dropped frames of clients that disconnected
+        self._clients = set()
+        self._latest = None  # newest frame, sent to clients as they connect
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    @property
+    def clients(self):
+        return len(self._clients)
+
+    @property
+    def dropped(self):
+        return self._dropped_closed + sum(c.dropped for c in list(self._clients))
+
+    def start(self):
+
+        """Starts the event loop thread and waits until the server listens."""
+
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(started,), daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+
+        """Closes all connections and stops the event loop thread."""
+
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def publish(self, snap, world_width, world_height, sim_time=0.0):
+
+        """
+        Encodes a snapshot and hands it to all clients; never blocks.
+
+        Safe to call from any thread (typically the simulation loop).
+
+        Args:
+            snap (dict): Snapshot with "pos" and "types" (e.g. from Game.step)
+            world_width, world_height (float): World size
+            sim_time (float): Simulated time
+        """
+
+        if self._loop is None:
+            raise RuntimeError("server is not running")
+
+        types = np.asarray(snap["types"])
+        n_types = max(4, int(types.max()) + 1) if len(types) else 4
+        with tracing.span("stream.encode", "io"):
+            data = encode_frame(snap["pos"], types, world_width, world_height, self.frame, sim_time, n_types)
+        self.frame += 1
+        self._loop.call_soon_threadsafe(self._distribute, LENGTH.pack(len(data)) + data)
+
+    # ----- event loop thread -----
+
+    def _run(self, started):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, self.port)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    def _distribute(self, frame):
+        self._latest = frame
+        for client in self._clients:
+            client.offer(frame)
+
+    async def _handle(self, reader, writer):
+        client = _Client(writer)
+        self._clients.add(client)
+        if self._latest is not None:
+            client.offer(self._latest)
+        try:
+            while True:
+                await client.ready.wait()
+                client.ready.clear()
+                frame, client.frame = client.frame, None
+                writer.write(frame)
+                # Waits while the socket is full; frames offered meanwhile
+                # replace each other in the slot
+                await writer.drain()
+                client.sent += 1
+                self.sent += 1
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(client)
+            self._dropped_closed += client.dropped
+            writer.close()
+
+    async def _shutdown(self):
+        self._server.close()
+        for client in list(self._clients):
+            client.writer.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._server.wait_closed()
+
+
+class StreamClient:
+
+    """
+    Receives frames in a background thread and keeps the newest one.
+
+    Attributes:
+        snapshot (dict or None): Newest decoded snapshot (see decode_frame)
+        received (int): Number of frames received
+    """
+
+    def __init__(self, host, port, timeout=10.0):
+        self.snapshot = None
+        self.received = 0
+        self._first = threading.Event()
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.settimeout(None)
+        self._thread = threading.Thread(target=self._receive, daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout=10.0):
+
+        """Blocks until the first frame arrived; returns the newest snapshot."""
+
+        if not self._first.wait(timeout):
+            raise TimeoutError("no frame received")
+        return self.snapshot
+
+    def close(self):
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+        self._thread.join()
+
+    def _read_exactly(self, size):
+        chunks = bytearray()
+        while len(chunks) < size:
+            chunk = self._sock.recv(size - len(chunks))
+            if not chunk:
+                raise ConnectionError("server closed the connection")
+            chunks += chunk
+        return bytes(chunks)
+
+    def _receive(self):
+        try:
+            while True:
+                (size,) = LENGTH.unpack(self._read_exactly(LENGTH.size))
+                self.snapshot = decode_frame(self._read_exactly(size))
+                self.received += 1
+                self._first.set()
+        except (ConnectionError, OSError):
+            pass
+
+
+class RemoteGame:
+
+    """
+    Stand-in for Game that shows a stream in ParticleCanvas.
+
+    step(dt) ignores dt and returns the newest received snapshot.
+    """
+
+    def __init__(self, host, port, timeout=10.0):
+        self.client = StreamClient(host, port, timeout)
+        first = self.client.wait(timeout)
+        self.w = first["world_width"]
+        self.h = first["world_height"]
+
+    def step(self, dt=0.0):
+        return self.client.snapshot
+
+    def close(self):
+        self.client.close()
+
+
+def serve(n=10000, world_width=100.0, world_height=100.0, host="0.0.0.0", port=5005, dt=0.01, fps=30.0):
+
+    """Runs a random headless simulation and streams it until interrupted."""
+
+    try:
+        from .game import Game
+    except ImportError:
+        from game import Game
+
+    game = Game(n=n, world_width=world_width, world_height=world_height)
+    game.matrix[:] = np.random.uniform(-1.0, 1.0, size=game.matrix.shape)
+
+    with StreamServer(host, port) as server:
+        print(f"Streaming on {host}:{server.port}")
+        next_frame = time.perf_counter()
+        while True:
+            snap = game.step(dt)
+            if time.perf_counter() >= next_frame:
+                server.publish(snap, game.w, game.h, game.time)
+                next_frame += 1.0 / fps
+
+
+def view(host, port):
+
+    """Opens a window that shows a stream."""
+
+    from PySide6 import QtCore, QtWidgets
+
+    try:
+        from .frontend_vispy import ParticleCanvas
+    except ImportError:
+        from frontend_vispy import ParticleCanvas
+
+    app = QtWidgets.QApplication([])
+    remote = RemoteGame(host, port)
+    canvas = ParticleCanvas(remote, world_width=remote.w, world_height=remote.h)
+    canvas.native.setWindowTitle(f"particles life - {host}:{port}")
+    canvas.show()
+
+    timer = QtCore.QTimer()
+    timer.timeout.connect(canvas.step_and_draw)
+    timer.start(int(1000 / 60))
+    app.exec()
+    remote.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a Particle Life simulation over TCP")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="run a headless simulation and stream it")
+    serve_parser.add_argument("--n", type=int, default=10000)
+    serve_parser.add_argument("--width", type=float, default=100.0)
+    serve_parser.add_argument("--height", type=float, default=100.0)
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=5005)
+    serve_parser.add_argument("--fps", type=float, default=30.0)
+
+    view_parser = commands.add_parser("view", help="show a stream in a window")
+    view_parser.add_argument("--host", default="127.0.0.1")
+    view_parser.add_argument("--port", type=int, default=5005)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.n, args.width, args.height, args.host, args.port, fps=args.fps)
+    else:
+        view(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
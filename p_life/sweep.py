@@ -0,0 +1,304 @@
+"""
+Parameter sweeps for Particle Life.
+
+Runs headless Game instances for a grid or random sample of interaction
+matrices, friction and noise values across a process pool and writes one row
+of cheap summary metrics per run to a CSV table. Runs already present in the
+table are skipped, so an interrupted sweep resumes where it stopped.
+
+Usage:
+    python -m p_life.sweep --samples 100 --steps 500 --out sweep.csv
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+try:
+    from .game import Game, regroup_particles_in_cells
+except ImportError:
+    from game import Game, regroup_particles_in_cells
+
+
+# Columns of the results table
+FIELDS = [
+    "run_id",
+    "seed",
+    "friction",
+    "noise_strength",
+    "matrix",
+    "mean_speed",
+    "kinetic_energy",
+    "occupied_cells",
+    "cell_count_cv",
+]
+
+
+def grid_parameters(matrices, frictions, noise_strengths, seed=0):
+
+    """
+    Builds the full grid of all combinations of the given parameter values.
+
+    Args:
+        matrices (list): Interaction matrices (array-like, T x T)
+        frictions (list[float]): Friction values
+        noise_strengths (list[float]): Noise strength values
+        seed (int): Base seed; run i uses seed + i for its initial state
+
+    Returns:
+        list[dict]: One parameter set per run with keys run_id, seed,
+            matrix, friction and noise_strength
+    """
+
+    combinations = itertools.product(matrices, frictions, noise_strengths)
+    return [
+        {
+            "run_id": run_id,
+            "seed": seed + run_id,
+            "matrix": np.asarray(matrix, dtype=np.float32),
+            "friction": float(friction),
+            "noise_strength": float(noise_strength),
+        }
+        for run_id, (matrix, friction, noise_strength) in enumerate(combinations)
+    ]
+
+
+def random_parameters(
+    samples,
+    seed=0,
+    n_types=4,
+    force_range=(-1.0, 1.0),
+    friction_range=(0.8, 0.99),
+    noise_range=(0.0, 0.5),
+):
+
+    """
+    Draws a reproducible random sample of parameter sets.
+
+    The same seed always yields the same runs, which is what allows an
+    interrupted sweep to resume.
+
+    Args:
+        samples (int): Number of runs
+        seed (int): Seed of the sample and base seed of the runs
+        n_types (int): Number of particle types (matrix size)
+        force_range (tuple): Range of the matrix entries
+        friction_range (tuple): Range of the friction values
+        noise_range (tuple): Range of the noise strengths
+
+    Returns:
+        list[dict]: Parameter sets in the format of grid_parameters
+    """
+
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "run_id": run_id,
+            "seed": seed + run_id,
+            "matrix": rng.uniform(*force_range, size=(n_types, n_types)).astype(np.float32),
+            "friction": float(rng.uniform(*friction_range)),
+            "noise_strength": float(rng.uniform(*noise_range)),
+        }
+        for run_id in range(samples)
+    ]
+
+
+def summary_metrics(game):
+
+    """
+    Computes cheap summary metrics of the final state of a game.
+
+    Args:
+        game (Game): Simulated game
+
+    Returns:
+        dict: mean_speed, kinetic_energy (mean of |v|^2 / 2), occupied_cells
+            (fraction of non-empty grid cells) and cell_count_cv (coefficient
+            of variation of the particles per cell, high for clustered states)
+    """
+
+    speed_sq = np.sum(game.vel.astype(np.float64) ** 2, axis=1)
+    _, _, _, _, cell_counts, _, _ = regroup_particles_in_cells(
+        game.pos, game.vel, game.types, game.w, game.h, game.r_max
+    )
+    mean_count = cell_counts.mean()
+
+    return {
+        "mean_speed": float(np.sqrt(speed_sq).mean()),
+        "kinetic_energy": float(0.5 * speed_sq.mean()),
+        "occupied_cells": float(np.count_nonzero(cell_counts) / len(cell_counts)),
+        "cell_count_cv": float(cell_counts.std() / mean_count) if mean_count > 0 else 0.0,
+    }
+
+
+def run_one(params, n=2000, steps=500, dt=0.01, world_width=100.0, world_height=100.0, r_max=10.0):
+
+    """
+    Runs a single headless simulation and summarizes its final state.
+
+    Args:
+        params (dict): Parameter set from grid_parameters or random_parameters
+        n (int): Number of particles
+        steps (int): Number of simulation steps
+        dt (float): Time step
+        world_width (float): Width of the world
+        world_height (float): Height of the world
+        r_max (float): Maximum interaction radius
+
+    Returns:
+        dict: Row of the results table (see FIELDS)
+    """
+
+    np.random.seed(params["seed"])
+    game = Game(n=n, world_width=world_width, world_height=world_height, r_max=r_max)
+    game.matrix = np.array(params["matrix"], dtype=np.float32)
+    game.friction = params["friction"]
+    game.noise_strength = params["noise_strength"]
+
+    for _ in range(steps):
+        game.step(dt)
+
+    row = {
+        "run_id": params["run_id"],
+        "seed": params["seed"],
+        "friction": params["friction"],
+        "noise_strength": params["noise_strength"],
+        "matrix": json.dumps(np.round(game.matrix.astype(float), 4).tolist()),
+    }
+    row.update(summary_metrics(game))
+    return row
+
+
+def load_results(path):
+
+    """
+    Reads a results table written by run_sweep.
+
+    Args:
+        path (str): Path of the CSV file
+
+    Returns:
+        list[dict]: Rows of the table, empty if the file does not exist
+    """
+
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def _init_worker(threads):
+
+    """Limits the Numba thread pool of a worker process to avoid oversubscription."""
+
+    import numba
+
+    numba.set_num_threads(min(threads, numba.config.NUMBA_NUM_THREADS))
+
+
+def run_sweep(
+    parameters,
+    out_path,
+    workers=None,
+    threads_per_worker=1,
+    **run_kwargs,
+):
+
+    """
+    Runs all parameter sets that are not yet in the results table.
+
+    Every finished run is appended to the CSV file immediately, so after an
+    interruption the same call continues with the missing runs only.
+
+    Args:
+        parameters (list[dict]): Parameter sets (see grid_parameters)
+        out_path (str): Path of the CSV results table
+        workers (int, optional): Number of worker processes. Defaults to
+            cpu_count // threads_per_worker. 0 runs everything in this process.
+        threads_per_worker (int): Numba threads per worker process
+        **run_kwargs: Passed on to run_one (n, steps, dt, world size, r_max)
+
+    Returns:
+        list[dict]: All rows of the results table after the sweep
+    """
+
+    done = {int(row["run_id"]) for row in load_results(out_path)}
+    pending = [p for p in parameters if p["run_id"] not in done]
+
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // threads_per_worker)
+
+    write_header = not os.path.exists(out_path) or os.path.getsize(out_path) == 0
+    with open(out_path, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        if write_header:
+            writer.writeheader()
+
+        def record(row):
+            writer.writerow(row)
+            f.flush()
+
+        if workers == 0:
+            # In-process: limit the threads of this thread only for the sweep
+            import numba
+
+            previous_threads = numba.get_num_threads()
+            _init_worker(threads_per_worker)
+            try:
+                for params in pending:
+                    record(run_one(params, **run_kwargs))
+            finally:
+                numba.set_num_threads(previous_threads)
+        elif pending:
+            # "spawn" gives every worker a fresh Numba threading layer
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(threads_per_worker,),
+            ) as pool:
+                futures = [pool.submit(run_one, params, **run_kwargs) for params in pending]
+                for future in as_completed(futures):
+                    record(future.result())
+
+    return load_results(out_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Particle Life parameter sweep")
+    parser.add_argument("--samples", type=int, default=50, help="number of random parameter sets")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--n", type=int, default=2000, help="particles per run")
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--dt", type=float, default=0.01)
+    parser.add_argument("--world", type=float, default=100.0, help="world width and height")
+    parser.add_argument("--r-max", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--out", default="sweep.csv")
+    args = parser.parse_args()
+
+    rows = run_sweep(
+        random_parameters(args.samples, seed=args.seed),
+        args.out,
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        n=args.n,
+        steps=args.steps,
+        dt=args.dt,
+        world_width=args.world,
+        world_height=args.world,
+        r_max=args.r_max,
+    )
+    print(f"{len(rows)} runs in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Timeline tracing of simulation, render and I/O activity in the Chrome trace
+format (chrome://tracing, https://ui.perfetto.dev).
+
+Tracing is off by default. Instrumented code wraps its phases in
+span(name, category); while tracing is off, span() returns a shared no-op
+context manager, which costs one global lookup and a call. enable() starts
+recording complete events (begin time, duration, thread id) into a ring
+buffer that keeps the newest `capacity` events, and dump() writes them as
+trace JSON at any time.
+
+    from p_life import tracing
+    tracing.enable()
+    ...
+    tracing.dump("trace.json")
+
+The GUI records a trace when started with P_LIFE_TRACE=trace.json, writes it
+on exit and on Ctrl+T.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class _NoSpan:
+
+    """Context manager that does nothing (tracing disabled)."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+
+    __slots__ = ("tracer", "name", "category", "start")
+
+    def __init__(self, tracer, name, category):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.complete(self.name, self.category, self.start, time.perf_counter())
+        return False
+
+
+class Tracer:
+
+    """
+    Ring buffer of trace events.
+
+    Appending to a deque is atomic, so any thread can record without a lock.
+
+    Attributes:
+        capacity (int): Number of events kept; older ones are dropped
+        recorded (int): Number of events recorded (including dropped ones)
+    """
+
+    def __init__(self, capacity=200000):
+        self.capacity = int(capacity)
+        self.recorded = 0
+        self._events = deque(maxlen=self.capacity)
+        self._threads = {}  # thread id -> name
+        self._origin = time.perf_counter()
+
+    def _thread(self):
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        return tid
+
+    def complete(self, name, category, start, end):
+
+        """Records a phase from start to end (time.perf_counter() values)."""
+
+        self._events.append((name, category, start, end - start, self._thread()))
+        self.recorded += 1
+
+    def instant(self, name, category="mark"):
+
+        """Records a point in time."""
+
+        self._events.append((name, category, time.perf_counter(), None, self._thread()))
+        self.recorded += 1
+
+    def events(self):
+
+        """
+        Returns:
+            list[dict]: Trace events in the Chrome trace format ("X" complete
+                events and "i" instants, times in microseconds since enable),
+                plus thread name metadata
+        """
+
+        pid = os.getpid()
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(self._threads.items())
+        ]
+        for name, category, start, duration, tid in list(self._events):
+            event = {
+                "name": name,
+                "cat": category,
+                "ts": (start - self._origin) * 1e6,
+                "pid": pid,
+                "tid": tid,
+            }
+            if duration is None:
+                event.update(ph="i", s="t")
+            else:
+                event.update(ph="X", dur=duration * 1e6)
+            events.append(event)
+        return events
+
+    def dump(self, path):
+
+        """Writes the recorded events as Chrome trace JSON."""
+
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events(), "displayTimeUnit": "ms"}, f)
+
+    def span(self, name, category):
+        return _Span(self, name, category)
+
+
+_tracer = None
+
+
+def enable(capacity=200000):
+
+    """Starts recording into a new ring buffer of `capacity` events; returns the Tracer."""
+
+    global _tracer
+    _tracer = Tracer(capacity)
+    return _tracer
+
+
+def disable():
+
+    """Stops recording; returns the Tracer with the events recorded so far (or None)."""
+
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def enabled():
+    return _tracer is not None
+
+
+def span(name, category="sim"):
+
+    """
+    Context manager that records the enclosed block as one event.
+
+    Args:
+        name (str): Event name, e.g. "game.step"
+        category (str): Event category, e.g. "sim", "render", "io"
+    """
+
+    tracer = _tracer
+    if tracer is None:
+        return _NO_SPAN
+    return tracer.span(name, category)
+
+
+def complete(name, category, start, end):
+
+    """Records an already measured phase (time.perf_counter() values) if tracing is on."""
+
+    tracer = _tracer
+    if tracer is not None:
+        tracer.complete(name, category, start, end)
+
+
+def instant(name, category="mark"):
+    tracer = _tracer
+    if tracer is not None:
+        tracer.instant(name, category)
+
+
+def dump(path):
+
+    """Writes the events recorded so far as Chrome trace JSON; returns False if tracing is off."""
+
+    tracer = _tracer
+    if tracer is None:
+        return False
+    tracer.dump(path)
+    return True
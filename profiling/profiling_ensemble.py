@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import time
+import numpy as np
+from p_life.game import Game
+from p_life.ensemble import Ensemble
+
+worlds = 200
+n = 2000
+steps = 20
+
+
+def make_games():
+    games = []
+    for _ in range(worlds):
+        g = Game(n=n, world_width=50.0, world_height=50.0, r_max=5.0)
+        g.matrix[:] = np.random.uniform(-1.0, 1.0, size=(4, 4))
+        games.append(g)
+    return games
+
+
+games = make_games()
+ensemble = Ensemble(make_games())
+large = Game(n=worlds * n, world_width=50.0 * np.sqrt(worlds), world_height=50.0 * np.sqrt(worlds), r_max=5.0)
+
+# Compile outside of the timing
+games[0].step(0.01)
+ensemble.step(0.01)
+large.step(0.01)
+
+# Benchmark one Game.step call per world
+start = time.perf_counter()
+for _ in range(steps):
+    for g in games:
+        g.step(0.01)
+end = time.perf_counter()
+print("Separate games:", end - start)
+
+# Benchmark all worlds in one ensemble
+start = time.perf_counter()
+for _ in range(steps):
+    ensemble.step(0.01)
+end = time.perf_counter()
+print("Ensemble:", end - start)
+
+# Benchmark one large world with the same particle count and density
+start = time.perf_counter()
+for _ in range(steps):
+    large.step(0.01)
+end = time.perf_counter()
+print("One large game:", end - start)
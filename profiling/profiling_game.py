@@ -3,7 +3,13 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import time
-from p_life.game import Game, update_particles
+from p_life.game import (
+    Game,
+    update_particles,
+    regroup_particles_in_cells,
+    calculate_forces,
+    calculate_forces_tiled,
+)
 from p_life_old_version.game import update_particles_old
 
 game = Game(
@@ -37,4 +43,25 @@ for _ in range(n):
 
 end = time.perf_counter()
 
-print("Hybrid version:", end - start)
\ No newline at end of file
+print("Hybrid version:", end - start)
+
+
+# Benchmark force kernels on the same cell grid
+sorted_pos, _, sorted_types, cell_starts, cell_counts, cols, rows = regroup_particles_in_cells(
+    pos, vel, types, game.w, game.h, game.r_max
+)
+args = (sorted_pos, sorted_types, cell_starts, cell_counts, cols, rows, game.matrix, game.r_max, game.w, game.h)
+
+timings = {}
+for name, kernel in (("cells", calculate_forces), ("tiled", calculate_forces_tiled)):
+    kernel(*args)  # compile outside of the timing
+
+    start = time.perf_counter()
+    for _ in range(n):
+        kernel(*args)
+    end = time.perf_counter()
+
+    timings[name] = end - start
+    print(f"Force kernel {name}:", timings[name])
+
+print("Tiled kernel speedup:", timings["cells"] / timings["tiled"])
@@ -0,0 +1,104 @@
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+import p_life.game as game
+from p_life.analysis import RadialDistribution, find_clusters
+
+
+def blob_game():
+
+    """
+    Creates a game with three tight blobs: one in the middle, one in a corner
+    and one that wraps around the left/right world edge.
+    """
+
+    rng = np.random.default_rng(2)
+    centers = [(20.0, 20.0), (5.0, 35.0), (0.0, 10.0)]
+    pos = np.concatenate([c + rng.normal(0.0, 0.3, size=(30, 2)) for c in centers])
+
+    g = game.Game(n=90, world_width=40.0, world_height=40.0, r_max=5.0)
+    g.pos = np.mod(pos, 40.0).astype(np.float32)
+    g.types = np.repeat([0, 1, 2], 30)
+    return g
+
+
+def test_find_clusters_counts_blobs():
+
+    """
+    Tests that three separated blobs give three clusters of 30 particles.
+    """
+
+    result = find_clusters(blob_game(), threshold=2.0)
+
+    assert result["n_clusters"] == 3
+    npt.assert_array_equal(np.sort(result["sizes"]), [30, 30, 30])
+    assert result["composition"].sum() == 90
+
+
+def test_find_clusters_labels_and_wrapped_centroid():
+
+    """
+    Tests that labels follow game.pos order and the wrapped blob's centroid is
+    at the edge.
+    """
+
+    g = blob_game()
+    result = find_clusters(g, threshold=2.0)
+
+    labels = result["labels"]
+    for blob in range(3):
+        assert len(set(labels[blob * 30:(blob + 1) * 30])) == 1
+
+    wrapped = labels[60]
+    x = result["centroids"][wrapped, 0]
+    assert min(x, 40.0 - x) < 1.0
+    npt.assert_array_equal(result["composition"][wrapped], [0, 0, 30, 0])
+
+
+def test_find_clusters_rejects_large_threshold():
+
+    """
+    Tests that thresholds beyond the cell size are rejected.
+    """
+
+    with pytest.raises(ValueError):
+        find_clusters(blob_game(), threshold=6.0)
+
+
+def test_radial_distribution_ideal_gas():
+
+    """
+    Tests that uniformly random particles give g(r) close to 1 for every type
+    pair.
+    """
+
+    rdf = RadialDistribution(r_cut=5.0, bins=5, n_types=2)
+    np.random.seed(3)
+    for _ in range(5):
+        g = game.Game(n=4000, world_width=50.0, world_height=50.0, r_max=5.0)
+        g.types = np.random.randint(0, 2, size=4000)
+        rdf.add(g)
+
+    r, g_r = rdf.result()
+    assert len(r) == 5 and rdf.frames == 5
+    npt.assert_allclose(g_r[:, :, 1:], 1.0, atol=0.1)
+
+
+def test_radial_distribution_counts_pairs():
+
+    """
+    Tests that two particles 1.5 apart across the world edge land in the same
+    bin for both orders.
+    """
+
+    g = game.Game(n=2, world_width=20.0, world_height=20.0, r_max=5.0)
+    g.pos = np.array([[19.5, 10.0], [1.0, 10.0]], dtype=np.float32)
+    g.types = np.array([0, 1])
+
+    rdf = RadialDistribution(r_cut=5.0, bins=10, n_types=2)
+    rdf.add(g)
+
+    assert rdf.hist[0, 1, 3] == 1
+    assert rdf.hist[1, 0, 3] == 1
+    assert rdf.hist.sum() == 2
@@ -0,0 +1,54 @@
+import json
+
+import numpy as np
+
+import p_life.game as game
+from p_life.autotune import autotune, candidates, machine_key, scene_key, tune
+
+
+def test_tune_ranks_candidates_without_stepping_the_game():
+
+    """
+    Tests that tune times every candidate on copies and returns them fastest
+    first.
+    """
+
+    np.random.seed(31)
+    g = game.Game(n=500, world_width=40.0, world_height=40.0)
+    before = g.pos.copy()
+
+    configs = candidates(g)
+    results = tune(g, configs[:3], steps=1)
+
+    assert {r["kernel"] for r in configs} == {"cells", "tiled"}
+    assert {r["cell_order"] for r in configs} == {"row", "morton", "hilbert"}
+    assert len(results) == 3
+    assert [r["seconds"] for r in results] == sorted(r["seconds"] for r in results)
+    assert g.time == 0.0
+    np.testing.assert_array_equal(g.pos, before)
+
+
+def test_autotune_caches_decision(tmp_path, monkeypatch):
+
+    """
+    Tests that the first autotune measures and stores, and a game in the same
+    bucket reuses the entry.
+    """
+
+    cache = tmp_path / "autotune.json"
+    monkeypatch.setenv("P_LIFE_AUTOTUNE_CACHE", str(cache))
+    monkeypatch.setattr("p_life.autotune.CELL_SCALES", (1.0, 1.5))
+
+    np.random.seed(32)
+    g = game.Game(n=300, world_width=30.0, world_height=30.0)
+    first = autotune(g, steps=1)
+    assert first["source"] == "tuned"
+
+    entry = json.loads(cache.read_text())[machine_key()][scene_key(g)]
+    assert entry["kernel"] == g.kernel and entry["cell_order"] == g.cell_order
+
+    other = game.Game(n=310, world_width=30.0, world_height=30.0)
+    other.autotune = True
+    other.step(0.01)
+    assert other.kernel == g.kernel and other.cell_size == g.cell_size
+    assert autotune(other)["source"] == "cache"
@@ -0,0 +1,70 @@
+import numpy as np
+import numpy.testing as npt
+
+import p_life.game as game
+from p_life.ensemble import Ensemble
+
+
+def make_games():
+
+    """
+    Creates three small worlds with different sizes, matrices and friction.
+    Noise is disabled so the ensemble can be compared with Game.step.
+    """
+
+    rng = np.random.default_rng(1)
+    games = []
+    for n, size, friction in ((150, 30.0, 0.85), (80, 20.0, 0.9), (200, 40.0, 0.95)):
+        g = game.Game(n=n, world_width=size, world_height=size, r_max=5.0)
+        g.matrix[:] = rng.uniform(-1.0, 1.0, size=(4, 4)).astype(np.float32)
+        g.friction = friction
+        g.noise_strength = 0.0
+        games.append(g)
+    return games
+
+
+def sort_rows(arr):
+    return arr[np.lexsort((arr[:, 1], arr[:, 0]))]
+
+
+def test_ensemble_matches_individual_games():
+
+    """
+    Tests that stepping an ensemble gives the same result as stepping each
+    world on its own with Game.step.
+    """
+
+    games = make_games()
+    references = make_games()
+    for g, ref in zip(games, references):
+        ref.pos, ref.vel, ref.types = g.pos.copy(), g.vel.copy(), g.types.copy()
+
+    ensemble = Ensemble(games)
+    for _ in range(5):
+        ensemble.step(dt=0.01)
+        for ref in references:
+            ref.step(dt=0.01)
+
+    for k, ref in enumerate(references):
+        snap = ensemble.snapshot(k)
+        npt.assert_allclose(sort_rows(snap["pos"]), sort_rows(ref.pos), rtol=1e-4, atol=1e-4)
+
+
+def test_ensemble_keeps_worlds_separate():
+
+    """
+    Tests that every world keeps its particle count, its types and stays
+    inside its own world boundaries after stepping.
+    """
+
+    games = make_games()
+    type_counts = [np.bincount(g.types, minlength=4) for g in games]
+    ensemble = Ensemble(games)
+    for _ in range(3):
+        ensemble.step(dt=0.01)
+
+    ensemble.write_back()
+    for g, counts in zip(games, type_counts):
+        npt.assert_array_equal(np.bincount(g.types, minlength=4), counts)
+        assert np.all(g.pos >= 0.0)
+        assert np.all(g.pos[:, 0] < g.w) and np.all(g.pos[:, 1] < g.h)
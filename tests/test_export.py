@@ -0,0 +1,90 @@
+import io
+import struct
+import zlib
+
+import numpy as np
+import numpy.testing as npt
+
+import p_life.game as game
+from p_life.export import COLORS, PngSequenceWriter, RawVideoWriter, encode_png, export, render_discs
+
+
+def quiet_game(seed):
+
+    """Deterministic game: fixed start, random matrix, no noise."""
+
+    np.random.seed(seed)
+    g = game.Game(n=300, world_width=40.0, world_height=30.0, r_max=5.0)
+    g.matrix[:] = np.random.uniform(-1.0, 1.0, size=(4, 4))
+    g.noise_strength = 0.0
+    return g
+
+
+def test_encode_png_roundtrip():
+
+    """
+    Tests that the PNG has a valid signature, header and the image rows in its
+    IDAT chunk.
+    """
+
+    image = np.random.randint(0, 256, size=(5, 7, 3), dtype=np.uint8)
+    data = encode_png(image)
+
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height, depth, color = struct.unpack(">IIBB", data[16:26])
+    assert (width, height, depth, color) == (7, 5, 8, 2)
+
+    length = struct.unpack(">I", data[33:37])[0]
+    assert data[37:41] == b"IDAT"
+    rows = np.frombuffer(zlib.decompress(data[41:41 + length]), dtype=np.uint8).reshape(5, 1 + 7 * 3)
+    assert np.all(rows[:, 0] == 0)
+    npt.assert_array_equal(rows[:, 1:].reshape(5, 7, 3), image)
+
+
+def test_render_discs_places_particles():
+
+    """
+    Tests that a particle is drawn at its pixel with its type color, y axis
+    pointing up.
+    """
+
+    pos = np.array([[1.0, 9.0]], dtype=np.float32)
+    image = render_discs(pos, np.array([3]), COLORS, 10.0, 10.0, 100, 100, 2.0)
+
+    npt.assert_array_equal(image[10, 10], COLORS[3])
+    npt.assert_array_equal(image[90, 10], [0, 0, 0])
+    assert 9 <= np.count_nonzero(image[:, :, 0]) <= 16
+
+
+def test_export_writes_frames_in_order():
+
+    """
+    Tests that the threaded export gives the same bytes as rendering every
+    frame one after another.
+    """
+
+    stream = io.BytesIO()
+    stats = export(quiet_game(3), 6, RawVideoWriter(stream), steps_per_frame=2, size=(64, 48), workers=3)
+
+    g = quiet_game(3)
+    expected = b""
+    for _ in range(6):
+        g.step(0.01)
+        snap = g.step(0.01)
+        expected += render_discs(snap["pos"], snap["types"], COLORS, g.w, g.h, 64, 48, 1.5).tobytes()
+
+    assert stats["frames"] == 6
+    assert stream.getvalue() == expected
+
+
+def test_export_png_sequence(tmp_path):
+
+    """
+    Tests that the PNG writer creates one numbered file per frame.
+    """
+
+    writer = PngSequenceWriter(str(tmp_path / "frames"))
+    export(quiet_game(4), 3, writer, size=(32, 32), workers=2)
+
+    files = sorted(p.name for p in (tmp_path / "frames").iterdir())
+    assert files == ["frame_000000.png", "frame_000001.png", "frame_000002.png"]
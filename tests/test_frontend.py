@@ -14,7 +14,7 @@ from PySide6 import QtCore
 
 import p_life.gui as gui
 import p_life.game as game
-from p_life.frontend_vispy import types_to_colors, ParticleCanvas
+from p_life.frontend_vispy import COLOR_TYPE, cull_particles, density_image, types_to_colors, ParticleCanvas
 
 # GUI Tests
 
@@ -132,4 +132,59 @@ def test_particle_canvas_step_and_draw():
     assert canvas.game is g
     assert canvas.dt == 1 / 60
 
-    canvas.step_and_draw()
\ No newline at end of file
+    canvas.step_and_draw()
+
+def test_density_image_bins_all_particles():
+    """Ensure every particle inside the rectangle lands in exactly one pixel."""
+    pos = np.array([[0.5, 0.5], [0.6, 0.4], [9.5, 9.5], [20.0, 20.0]], dtype=np.float32)
+    types = np.array([0, 0, 3, 1], dtype=np.int32)
+    image = density_image(pos, types, COLOR_TYPE, 0.0, 0.0, 10.0, 10.0, 10, 10)
+
+    assert image.shape == (10, 10, 4)
+    assert np.count_nonzero(image[:, :, 3]) == 2
+    np.testing.assert_allclose(image[9, 9, :3], COLOR_TYPE[3, :3] * np.log1p(1) / np.log1p(2), rtol=1e-6)
+
+
+def test_particle_canvas_switches_to_density_mode():
+    """Ensure the canvas draws a density image above the particle-per-pixel threshold."""
+    g = game.Game(n=100, world_width=50.0, world_height=50.0, r_max=10.0)
+    canvas = ParticleCanvas(g, world_width=g.w, world_height=g.h, lod_threshold=0.0)
+    canvas.step_and_draw()
+    assert canvas.density.visible
+    assert not canvas.markers.visible
+
+    canvas.lod_threshold = 1.0
+    canvas.step_and_draw()
+    assert not canvas.density.visible
+    assert canvas.markers.visible
+
+
+def test_cull_particles_keeps_cells_in_view_across_the_wrap():
+    """Ensure culling keeps only particles in visible cells and wraps them into the view."""
+    pos = np.array([[5.0, 5.0], [50.0, 50.0], [95.0, 5.0], [5.0, 95.0]], dtype=np.float32)
+    # 10 x 10 cells; the view [-10, 10) x [0, 10) reaches over the left world edge
+    index, shifted = cull_particles(pos, -10.0, 0.0, 10.0, 10.0, 100.0, 100.0, 10)
+
+    assert sorted(index.tolist()) == [0, 2]
+    np.testing.assert_allclose(shifted[index.tolist().index(2)], [-5.0, 5.0])
+    np.testing.assert_allclose(shifted[index.tolist().index(0)], [5.0, 5.0])
+
+    # A view larger than the world keeps every particle once, unshifted
+    index, shifted = cull_particles(pos, -50.0, -50.0, 150.0, 150.0, 100.0, 100.0, 10)
+    assert sorted(index.tolist()) == [0, 1, 2, 3]
+    np.testing.assert_array_equal(shifted, pos[index])
+
+
+def test_particle_canvas_zoom_uploads_only_visible_particles():
+    """Ensure zooming in culls the uploaded markers and restarts the motion shadow."""
+    g = game.Game(n=2000, world_width=100.0, world_height=100.0, r_max=10.0)
+    canvas = ParticleCanvas(g, world_width=g.w, world_height=g.h)
+    canvas.step_and_draw()
+    assert canvas.visible_count == g.n
+
+    canvas.view.camera.rect = (90.0, 90.0, 20.0, 20.0)  # corner view across the wrap
+    assert len(canvas.history) == 1
+    canvas.step_and_draw()
+    visible = canvas.visible_count
+    assert 0 < visible < g.n / 4
+
@@ -312,3 +312,425 @@ def test_game_step_wraps():
         rtol=1e-6, 
         atol=1e-6
     )
+
+def test_calculate_forces_tiled_matches_calculate_forces():
+
+    """
+    Tests that the branch-free tiled kernel reproduces calculate_forces.
+
+    Builds a random scene with all four particle types and a random
+    interaction matrix, then compares the forces of both kernels on the
+    same cell grid.
+    """
+
+    rng = np.random.default_rng(0)
+    pos = (rng.random((500, 2)) * 40.0).astype(np.float32)
+    vel = np.zeros((500, 2), dtype=np.float32)
+    types = rng.integers(0, 4, size=500)
+    matrix = rng.uniform(-1.0, 1.0, size=(4, 4)).astype(np.float32)
+
+    sorted_pos, _, sorted_types, cell_starts, cell_counts, cols, rows = game.regroup_particles_in_cells(
+        pos, vel, types, world_width=40.0, world_height=40.0, r_max=5.0
+    )
+    args = (sorted_pos, sorted_types, cell_starts, cell_counts, cols, rows, matrix, 5.0, 40.0, 40.0)
+
+    expected = game.calculate_forces(*args)
+    forces = game.calculate_forces_tiled(*args)
+
+    npt.assert_allclose(forces, expected, rtol=1e-4, atol=1e-4)
+
+def test_exp_euler_matches_euler_at_reference_dt():
+
+    """
+    Tests that the exponential-friction integrator equals the original
+    semi-implicit Euler step when dt is REFERENCE_DT (no noise).
+    """
+
+    rng = np.random.default_rng(4)
+    pos = (rng.random((300, 2)) * 30.0).astype(np.float32)
+    vel = rng.normal(0.0, 1.0, size=(300, 2)).astype(np.float32)
+    types = rng.integers(0, 4, size=300)
+    matrix = rng.uniform(-1.0, 1.0, size=(4, 4)).astype(np.float32)
+    args = (30.0, 30.0, 5.0, game.REFERENCE_DT, 0.85, 0.0, matrix)
+
+    pos_a, vel_a, _ = game.update_particles(pos, vel, types, *args)
+    pos_b, vel_b, _ = game.update_particles_exp_euler(pos, vel, types, *args)
+
+    npt.assert_allclose(pos_b, pos_a, rtol=1e-6, atol=1e-6)
+    npt.assert_allclose(vel_b, vel_a, rtol=1e-6, atol=1e-6)
+
+def test_friction_decay_is_step_size_independent():
+
+    """
+    Tests that two half steps of exponential friction damp as much as one full step.
+    """
+
+    full = game.friction_decay(0.85, 0.02)
+    half = game.friction_decay(0.85, 0.01)
+
+    npt.assert_allclose(half * half, full)
+    npt.assert_allclose(game.friction_decay(0.85, game.REFERENCE_DT), 0.85)
+
+def test_game_step_verlet_free_particle():
+
+    """
+    Tests that the velocity Verlet integrator moves a force-free particle
+    with constant velocity and keeps the forces for the next step.
+    """
+
+    g = game.Game(n=1, world_width=100.0, world_height=100.0, r_max=5.0)
+    g.integrator = "verlet"
+    g.pos[:] = np.array([[50.0, 50.0]], dtype=np.float32)
+    g.vel[:] = np.array([[1.0, -2.0]], dtype=np.float32)
+    g.noise_strength = 0.0
+    g.friction = 1.0
+
+    for _ in range(10):
+        g.step(dt=0.1)
+
+    npt.assert_allclose(g.pos[0], [51.0, 48.0], rtol=1e-5, atol=1e-5)
+    assert g.acc.shape == (1, 2)
+    npt.assert_allclose(g.time, 1.0)
+
+def test_switching_integrators_drops_stale_verlet_forces():
+
+    """
+    Tests that stepping with another integrator clears the verlet forces,
+    so a switch back to verlet does not reuse forces of old positions in
+    an old particle order.
+    """
+
+    np.random.seed(2)
+    g = game.Game(n=200, world_width=30.0, world_height=30.0, r_max=5.0)
+    g.matrix[:] = np.random.uniform(-1.0, 1.0, size=g.matrix.shape)
+    g.noise_strength = 0.0
+    g.integrator = "verlet"
+    g.step(0.01)
+    assert g.acc is not None
+
+    for integrator in ("euler", "exp_euler", "respa"):
+        g.integrator = integrator
+        g.step(0.01)
+        assert g.acc is None
+        g.integrator = "verlet"
+        g.step(0.01)
+        assert g.acc.shape == (200, 2)
+
+def test_adaptive_timestep_grows_when_calm_and_shrinks_on_fast_motion():
+
+    """
+    Tests that step(None) grows dt for a resting system and that the
+    controller shrinks dt after a large displacement.
+    """
+
+    g = game.Game(n=25, world_width=50.0, world_height=50.0, r_max=5.0)
+    g.noise_strength = 0.0
+    g.matrix[:] = 0.0
+    g.pos[:] = np.stack([np.arange(25) % 5 * 10.0, np.arange(25) // 5 * 10.0], axis=1)
+    g.dt_controller = game.AdaptiveTimestep(dt=0.01, dt_max=0.05)
+
+    for _ in range(30):
+        g.step(None)
+    assert g.dt_controller.dt == 0.05
+
+    g.dt_controller.update(max_displacement=1.0, r_max=5.0)
+    assert g.dt_controller.dt == 0.025
+
+def test_split_forces_sum_to_calculate_forces():
+
+    """
+    Tests that the repulsion and matrix parts of the force law add up to
+    calculate_forces, and that the repulsion part does not depend on
+    whether it is computed on the fine or the full-radius grid.
+    """
+
+    rng = np.random.default_rng(5)
+    pos = (rng.random((400, 2)) * 30.0).astype(np.float32)
+    vel = np.zeros((400, 2), dtype=np.float32)
+    types = rng.integers(0, 4, size=400)
+    matrix = rng.uniform(-1.0, 1.0, size=(4, 4)).astype(np.float32)
+
+    sorted_pos, _, sorted_types, cell_starts, cell_counts, cols, rows = game.regroup_particles_in_cells(
+        pos, vel, types, 30.0, 30.0, 5.0
+    )
+    args = (sorted_pos, sorted_types, cell_starts, cell_counts, cols, rows, matrix, 5.0, 30.0, 30.0)
+
+    total = game.calculate_forces(*args)
+    repulsion = game.calculate_repulsion_forces(*args)
+    split = repulsion + game.calculate_matrix_forces(*args)
+    npt.assert_allclose(split, total, rtol=1e-4, atol=1e-4)
+
+    order, fine_starts, fine_counts, fine_cols, fine_rows = game.sort_into_cells(
+        sorted_pos, 30.0, 30.0, game.RESPA_CUTOFF * 5.0
+    )
+    fine = game.calculate_repulsion_forces(
+        sorted_pos[order], sorted_types[order], fine_starts, fine_counts, fine_cols, fine_rows, matrix, 5.0, 30.0, 30.0
+    )
+    npt.assert_allclose(fine, repulsion[order], rtol=1e-4, atol=1e-4)
+
+def test_game_step_respa_free_particle():
+
+    """
+    Tests that the multiple-timestep integrator moves a force-free particle
+    by v * dt per outer step and wraps it into the world.
+    """
+
+    g = game.Game(n=1, world_width=10.0, world_height=10.0, r_max=5.0)
+    g.integrator = "respa"
+    g.pos[:] = np.array([[9.5, 5.0]], dtype=np.float32)
+    g.vel[:] = np.array([[1.0, 0.0]], dtype=np.float32)
+    g.noise_strength = 0.0
+    g.friction = 1.0
+
+    g.step(dt=1.0)
+
+    npt.assert_allclose(g.pos[0], [0.5, 5.0], rtol=1e-5, atol=1e-5)
+
+def test_add_particles_uses_spare_capacity():
+
+    """
+    Tests that adding particles writes into the spare capacity without
+    reallocating, grows by doubling when full and wraps new positions.
+    """
+
+    g = game.Game(n=100, world_width=20.0, world_height=20.0, r_max=5.0)
+    g.add_particles(np.zeros((1, 2)))
+    capacity = g.capacity
+    buffer = g._pos_buf
+
+    added = g.add_particles([[25.0, -1.0]] * (capacity - g.n), types=2)
+
+    assert g._pos_buf is buffer
+    assert g.n == capacity
+    npt.assert_allclose(g.pos[added[0]], [5.0, 19.0])
+    assert np.all(g.types[added] == 2)
+
+    g.add_particles([[1.0, 1.0]])
+    assert g.capacity == 2 * capacity
+    assert len(g.pos) == len(g.vel) == len(g.types) == capacity + 1
+
+def test_remove_particles_compacts_from_the_tail():
+
+    """
+    Tests that removed particles are gone, all others survive with their
+    velocities and types, and the simulation still steps afterwards.
+    """
+
+    g = game.Game(n=50, world_width=20.0, world_height=20.0, r_max=5.0)
+    g.vel[:] = np.arange(100, dtype=np.float32).reshape(50, 2)
+    before = {tuple(v) for v in g.vel}
+
+    assert g.remove_particles([3, 49, 10, 45, 3]) == 4
+    assert g.n == 46
+    assert {tuple(v) for v in g.vel} == before - {(6.0, 7.0), (98.0, 99.0), (20.0, 21.0), (90.0, 91.0)}
+
+    g.integrator = "verlet"
+    g.step(0.01)
+    assert len(g.pos) == len(g.acc) == 46
+
+def test_brushes_add_and_erase_in_radius():
+
+    """Tests that the spawn brush adds particles in a disc and the erase brush removes them again."""
+
+    g = game.Game(n=0, world_width=40.0, world_height=40.0, r_max=5.0)
+    g.add_particles([[30.0, 30.0]])
+
+    g.spawn_particles((1.0, 1.0), 2.0, 200, particle_type=1)
+
+    assert g.n == 201
+    assert g.erase_particles((1.0, 1.0), 2.0 + 1e-4) == 200
+    npt.assert_allclose(g.pos, [[30.0, 30.0]])
+
+def test_assigning_particles_drops_verlet_forces():
+
+    """
+    Tests that assigning new pos/vel/types arrays (as Ensemble.write_back
+    does) drops the verlet forces of the old particles, so the next step
+    works with a different particle count and does not reuse old forces.
+    """
+
+    np.random.seed(6)
+    g = game.Game(n=50, world_width=30.0, world_height=30.0, r_max=5.0)
+    g.integrator = "verlet"
+    g.step(0.01)
+    assert g.acc.shape == (50, 2)
+
+    g.pos = np.random.uniform(0.0, 30.0, size=(30, 2))
+    g.vel = np.zeros((30, 2))
+    g.types = np.random.randint(0, 4, size=30)
+    assert g.acc is None
+
+    g.step(0.01)
+    assert g.pos.shape == (30, 2) and g.acc.shape == (30, 2)
+
+    g.pos = g.pos + 1.0  # same count, new positions
+    assert g.acc is None
+
+def numpy_telemetry(g):
+
+    """Telemetry of a game computed after the step with NumPy."""
+
+    vel = g.vel.astype(np.float64)
+    speed = np.sqrt(np.sum(vel * vel, axis=1))
+    return {
+        "kinetic_energy": 0.5 * np.sum(speed ** 2),
+        "mean_speed": speed.mean(),
+        "max_speed": speed.max(),
+        "type_counts": np.bincount(g.types, minlength=4),
+    }
+
+def test_step_telemetry_matches_numpy():
+
+    """
+    Tests that the reductions returned by step agree with a NumPy pass over
+    the new state for every integrator (each collects them in its last
+    velocity update).
+    """
+
+    for integrator in ("euler", "exp_euler", "verlet", "respa"):
+        np.random.seed(8)
+        g = game.Game(n=3000, world_width=60.0, world_height=40.0, r_max=6.0)
+        g.matrix[:] = np.random.uniform(-1.0, 1.0, size=(4, 4))
+        g.integrator = integrator
+        g.telemetry = True
+
+        g.step(0.01)
+        telemetry = g.step(0.01)["telemetry"]
+        expected = numpy_telemetry(g)
+
+        for key in ("kinetic_energy", "mean_speed", "max_speed"):
+            npt.assert_allclose(telemetry[key], expected[key], rtol=1e-4)
+        npt.assert_array_equal(telemetry["type_counts"], expected["type_counts"])
+
+    assert "telemetry" not in game.Game(n=10).step(0.01)
+
+def test_telemetry_centroid_wraps_around_edge():
+
+    """Tests that the per-type centroid of a group split by the world edge lies on the edge, not in the middle."""
+
+    g = game.Game(n=4, world_width=10.0, world_height=10.0, r_max=2.0)
+    g.pos[:] = np.array([[9.5, 5.0], [0.5, 5.0], [4.0, 2.0], [6.0, 2.0]], dtype=np.float32)
+    g.vel[:] = 0.0
+    g.types[:] = [1, 1, 2, 2]
+    g.noise_strength = 0.0
+    g.telemetry = True
+
+    centroids = g.step(1e-6)["telemetry"]["type_centroids"]
+
+    assert min(centroids[1, 0], 10.0 - centroids[1, 0]) < 1e-3
+    npt.assert_allclose(centroids[1, 1], 5.0, atol=1e-3)
+    npt.assert_allclose(centroids[2], [5.0, 2.0], atol=1e-3)
+    assert np.all(np.isnan(centroids[0]))
+
+
+def test_cell_layout_space_filling_orders():
+
+    """
+    Tests the Morton and Hilbert cell layouts.
+
+    Every order must number each cell exactly once, keep the same (wrapped)
+    3x3 stencil as the row-major grid, and sort_into_cells must group the
+    particles by curve position. A Game stepped with a curve order keeps all
+    particles.
+    """
+
+    cols, rows = 6, 5
+    _, row_neighbors = game.cell_layout(cols, rows, "row")
+
+    for order in ("morton", "hilbert"):
+        rank, neighbors = game.cell_layout(cols, rows, order)
+        npt.assert_array_equal(np.sort(rank), np.arange(cols * rows))
+        npt.assert_array_equal(neighbors[rank], np.sort(rank[row_neighbors], axis=1))
+
+    rank, _ = game.cell_layout(2, 2, "morton")
+    npt.assert_array_equal(rank, [0, 1, 2, 3])
+
+    pos = np.random.rand(500, 2).astype(np.float32) * [60.0, 50.0]
+    order, cell_starts, cell_counts, _, _ = game.sort_into_cells(pos, 60.0, 50.0, 10.0, "hilbert")
+    rank, _ = game.cell_layout(cols, rows, "hilbert")
+    cell_ids = (pos[order, 0] // 10).astype(int) + (pos[order, 1] // 10).astype(int) * cols
+    assert np.all(np.diff(rank[cell_ids]) >= 0)
+    assert cell_counts.sum() == 500
+
+    g = game.Game(n=300, world_width=60.0, world_height=50.0)
+    g.cell_order = "morton"
+    g.step(0.01)
+    assert len(g.pos) == 300
+
+
+def test_step_returns_immutable_snapshots():
+
+    """
+    Tests the snapshots returned by Game.step.
+
+    A kept snapshot must not change when the game steps on, its arrays must
+    be read-only, frames are numbered, and buffers of dropped snapshots are
+    recycled instead of allocating new ones every step.
+    """
+
+    np.random.seed(21)
+    g = game.Game(n=200, world_width=30.0, world_height=30.0)
+
+    first = g.step(0.01)
+    kept = first["pos"].copy()
+    for _ in range(5):
+        g.step(0.01)
+
+    npt.assert_array_equal(first["pos"], kept)
+    assert not first["pos"].flags.writeable and not first["types"].flags.writeable
+    assert first.frame == 1 and g.step(0.01)["frame"] == 7
+    assert set(first) == {"pos", "types", "frame", "time"}
+
+    allocated = g._snapshots.allocated
+    for _ in range(20):
+        g.step(0.01)
+    assert g._snapshots.allocated == allocated
+
+
+def test_pair_radii_forces_match_reference():
+
+    """
+    Tests calculate_forces_pair_radii against the brute-force reference.
+
+    One long-range type and short-range other types on a grid sized for the
+    largest radius, including narrow two-cell and one-cell worlds. Pairs beyond
+    their radius but within r_max get no force. A Game with radii steps without
+    errors.
+    """
+
+    from p_life.reference import random_scene, reference_forces
+
+    rng = np.random.default_rng(3)
+    radii = np.full((4, 4), 3.0)
+    radii[3, :] = radii[:, 3] = 10.0
+    radii[1, 2] = 6.0
+
+    for n, width, height in ((1500, 50.0, 50.0), (600, 20.0, 40.0), (450, 15.0, 40.0), (450, 40.0, 15.0)):
+        scene = random_scene(rng, n, width, height, 10.0)
+        pos, types, matrix = scene["pos"], scene["types"], scene["matrix"]
+
+        order, cell_starts, cell_counts, cols, rows = game.sort_into_cells(pos, width, height, 10.0)
+        kernel = game.pair_radii_kernel(radii)
+        forces = np.empty((n, 2))
+        forces[order] = kernel(np.ascontiguousarray(pos[order]), types[order], cell_starts, cell_counts,
+                               cols, rows, matrix, 10.0, width, height)
+
+        expected = reference_forces(pos, types, matrix, 10.0, width, height, radii=radii)
+        npt.assert_allclose(forces, expected, atol=1e-3 * max(1.0, np.abs(expected).max()))
+
+    # Pairs between their own radius and r_max feel no force, pairs with the
+    # long-range type at the same distance do
+    pos = np.array([[10.0, 10.0], [15.0, 10.0], [30.0, 30.0], [30.0, 35.0]])
+    types = np.array([0, 1, 0, 3])
+    matrix = np.ones((4, 4))
+    order, cell_starts, cell_counts, cols, rows = game.sort_into_cells(pos, 50.0, 50.0, 10.0)
+    forces = np.empty((4, 2))
+    forces[order] = game.pair_radii_kernel(radii)(np.ascontiguousarray(pos[order]), types[order], cell_starts,
+                                                  cell_counts, cols, rows, matrix, 10.0, 50.0, 50.0)
+    npt.assert_array_equal(forces[:2], 0.0)
+    assert np.all(np.abs(forces[2:, 1]) > 0.0)
+
+    g = game.Game(n=300, world_width=40.0, world_height=40.0)
+    g.radii = radii
+    g.step(0.01)
+    assert len(g.pos) == 300
@@ -0,0 +1,33 @@
+import numpy as np
+
+import p_life.game as game
+from p_life.jit import format_report, warmup
+
+
+def test_warmup_reports_every_kernel():
+
+    """
+    Tests that warmup compiles or loads every kernel with an explicit
+    signature.
+    """
+
+    report = warmup()
+    assert len(report) >= len(game.KERNEL_SIGNATURES)
+    assert all(entry["source"] in ("cache", "compiled", "ready") for entry in report)
+    assert "calculate_forces" in format_report(report)
+
+
+def test_update_particles_reuses_warm_signature():
+
+    """
+    Tests that float64/int inputs are normalized so no new specialization is
+    compiled.
+    """
+
+    warmup()
+    before = len(game.calculate_forces.overloads)
+
+    pos = np.random.rand(50, 2) * 20.0
+    game.update_particles(pos, np.zeros((50, 2)), np.zeros(50, dtype=int), 20, 20, 5, 0.01, 0.9, 0.0, np.zeros((4, 4)))
+
+    assert len(game.calculate_forces.overloads) == before
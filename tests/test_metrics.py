@@ -0,0 +1,99 @@
+import sys
+import urllib.request
+
+import numpy as np
+from numba import njit
+
+import p_life.game as game
+from p_life.metrics import MetricsServer, resource
+
+
+def scrape(server):
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=10) as response:
+        assert response.headers["Content-Type"].startswith("text/plain")
+        text = response.read().decode("utf-8")
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+
+
+def test_step_stats_phases():
+
+    """
+    Tests that every integrator records its phase timings and cell occupancy
+    when collect_stats is set.
+    """
+
+    np.random.seed(11)
+    for integrator in ("euler", "exp_euler", "verlet", "respa"):
+        g = game.Game(n=300, world_width=30.0, world_height=30.0)
+        g.integrator = integrator
+        g.step(0.01)
+        assert g.step_stats is None
+
+        g.collect_stats = True
+        g.step(0.01)
+        stats = g.step_stats
+        for phase in ("binning", "forces", "integrate", "step"):
+            assert stats[phase] >= 0.0
+        assert stats["step"] >= stats["forces"]
+        assert stats["cells"] == 9
+        assert stats["max_cell_occupancy"] >= stats["mean_cell_occupancy"] > 0
+
+
+def test_metrics_endpoint():
+
+    """
+    Tests that a scrape on localhost reports the observed steps, particles and
+    JIT compilations.
+    """
+
+    np.random.seed(12)
+    g = game.Game(n=400, world_width=40.0, world_height=40.0)
+    g.collect_stats = True
+
+    with MetricsServer(port=0) as server:
+        assert "plife_particles" not in scrape(server)
+
+        for _ in range(3):
+            g.step(0.01)
+            server.observe(g)
+
+        @njit
+        def fresh(x):
+            return x + 1
+
+        fresh(1)
+        metrics = scrape(server)
+
+    assert float(metrics["plife_steps_total"]) == 3
+    assert float(metrics["plife_particles"]) == 400
+    assert float(metrics["plife_simulated_time_seconds"]) > 0.0
+    assert float(metrics["plife_steps_per_second"]) > 0.0
+    assert float(metrics['plife_phase_seconds_total{phase="forces"}']) > 0.0
+    assert float(metrics["plife_jit_compilations_total"]) >= 1
+    if sys.platform.startswith("linux"):  # resident memory comes from /proc
+        assert float(metrics["plife_resident_memory_bytes"]) > 0
+    if resource is not None:
+        assert float(metrics["plife_max_resident_memory_bytes"]) > 0
+
+
+def test_observe_leaves_memory_to_the_scrape(monkeypatch):
+
+    """
+    Tests that observe() does not read process memory; render() does, once per
+    scrape.
+    """
+
+    import p_life.metrics as metrics
+
+    calls = []
+    monkeypatch.setattr(metrics, "memory_usage", lambda: calls.append(1) or (1024, 2048))
+    g = game.Game(n=50, world_width=20.0, world_height=20.0)
+    server = MetricsServer(port=0)
+    for _ in range(5):
+        g.step(0.01)
+        server.observe(g)
+    assert calls == []
+
+    text = server.render()
+    assert len(calls) == 1
+    assert "plife_resident_memory_bytes 1024" in text
@@ -0,0 +1,51 @@
+import numba
+import numpy as np
+import pytest
+
+import p_life.game as game
+from p_life.parallel import available_layers, parse_cpus, scaling_report, set_threading_layer
+
+
+def test_game_threads_are_restored():
+
+    """
+    Tests that Game.threads limits only its own step and leaves the caller's
+    thread count unchanged.
+    """
+
+    np.random.seed(13)
+    before = numba.get_num_threads()
+    g = game.Game(n=300, world_width=30.0, world_height=30.0, threads=64)
+    g.step(0.01)
+    g.threads = 1
+    g.step(0.01)
+    assert numba.get_num_threads() == before
+
+
+def test_scaling_report_rows():
+
+    """
+    Tests that the weak scaling report grows the scene with the threads and
+    normalizes to the first row.
+    """
+
+    rows = scaling_report(n=200, thread_counts=[1, 1], mode="weak", steps=2, warmup_steps=1,
+                          world_width=30.0, world_height=30.0)
+    assert [row["n"] for row in rows] == [200, 200]
+    assert rows[0]["speedup"] == 1.0 and rows[0]["efficiency"] == 1.0
+    assert all(row["steps_per_second"] > 0 for row in rows)
+
+    with pytest.raises(ValueError):
+        scaling_report(mode="linear")
+
+
+def test_layer_and_cpu_arguments():
+
+    """
+    Tests that unknown threading layers are rejected and CPU lists are parsed.
+    """
+
+    assert "workqueue" in available_layers()
+    with pytest.raises(ValueError):
+        set_threading_layer("pthreads")
+    assert parse_cpus("0-3,6") == [0, 1, 2, 3, 6]
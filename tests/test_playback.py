@@ -0,0 +1,145 @@
+import time
+
+import numpy as np
+import pytest
+
+from p_life.game import Game
+from p_life.playback import PlaybackSource, Recorder, Recording
+
+
+def record_game(directory, frames=10, n=50):
+    game = Game(n=n, world_width=40.0, world_height=30.0, r_max=5.0)
+    snaps = []
+    with Recorder(directory, game.w, game.h, dt=0.01) as recorder:
+        for _ in range(frames):
+            snap = game.step(0.01)
+            recorder.record(snap)
+            snaps.append(snap)
+    return snaps
+
+
+def test_recording_round_trip_memory_maps_frames(tmp_path):
+
+    """
+    Tests that recorded snapshots come back unchanged as read-only memory-
+    mapped frames.
+    """
+
+    snaps = record_game(tmp_path / "run")
+    recording = Recording(str(tmp_path / "run"))
+
+    assert len(recording) == len(snaps)
+    assert (recording.world_width, recording.world_height, recording.dt) == (40.0, 30.0, 0.01)
+    for snap, played in zip(snaps, recording):
+        np.testing.assert_array_equal(played.pos, snap.pos.astype(np.float32))
+        np.testing.assert_array_equal(played.types, snap.types)
+        assert (played.frame, played.time) == (snap.frame, snap.time)
+    assert isinstance(recording[3].pos, np.memmap)
+    assert not recording[3].pos.flags.writeable
+    with pytest.raises(IndexError):
+        recording[len(snaps)]
+
+
+def test_recording_handles_changing_particle_count_and_partial_writes(tmp_path):
+
+    """
+    Tests that frames with different particle counts play while the recorder is
+    still open.
+    """
+
+    directory = tmp_path / "run"
+    recorder = Recorder(str(directory), 10.0, 10.0)
+    recorder.record({"pos": np.zeros((3, 2)), "types": np.array([0, 1, 2])})
+    recorder.record({"pos": np.ones((5, 2)), "types": np.full(5, 3)})
+    recorder.flush()
+
+    recording = Recording(str(directory))
+    assert [len(snap.pos) for snap in recording] == [3, 5]
+    np.testing.assert_array_equal(recording[1].types, np.full(5, 3))
+
+    # The recorder is still open and its files are flushed at different
+    # times: only the frames that are completely on disk are played
+    for i in range(260):
+        recorder.record({"pos": np.full((100, 2), i), "types": np.full(100, i % 4)})
+        recording = Recording(str(directory))
+        assert len(recording) >= 2
+        last = recording[-1]
+        assert len(last.pos) == len(last.types)
+        np.testing.assert_array_equal(last.pos, last.pos[:1].repeat(len(last.pos), axis=0))
+    recorder.close()
+    assert len(Recording(str(directory))) == 262
+
+    with pytest.raises(ValueError):
+        Recorder(str(tmp_path / "bad"), 10.0, 10.0).record({"pos": np.zeros((1, 2)), "types": [300]})
+
+
+def test_recording_opens_npy_position_stack(tmp_path):
+
+    """
+    Tests that a (frames, n, 2) .npy file opens as a recording of type-0
+    particles.
+    """
+
+    stack = np.random.uniform(0.0, 20.0, size=(4, 30, 2)).astype(np.float32)
+    np.save(tmp_path / "stack.npy", stack)
+
+    recording = Recording(str(tmp_path / "stack.npy"), world_width=20.0, world_height=20.0)
+    assert len(recording) == 4
+    np.testing.assert_array_equal(recording[2].pos, stack[2])
+    assert recording[2].types.shape == (30,) and not recording[2].types.any()
+
+
+def test_playback_source_speed_seek_and_prefetch(tmp_path):
+
+    """
+    Tests that speed, reverse play, seek and end stop move the position, and
+    prefetched frames are hits.
+    """
+
+    record_game(tmp_path / "run", frames=40)
+    source = PlaybackSource(str(tmp_path / "run"), speed=2.0, fps=10.0, prefetch=8)
+    try:
+        assert source.step(0.0).frame == 1
+        assert source.index == 0
+
+        source.step(0.5)  # 2 x 10 frames/s x 0.5 s
+        assert source.index == 10
+
+        source.seek(30)
+        source.speed = -1.0
+        source.step(0.2)
+        assert source.index == 28
+
+        # The prefetch thread loads the frames ahead in the playing direction
+        deadline = time.monotonic() + 5.0
+        while 26 not in source.prefetcher._cache and time.monotonic() < deadline:
+            time.sleep(0.01)
+        hits = source.prefetcher.hits
+        source.step(0.2)
+        assert source.index == 26
+        assert source.prefetcher.hits == hits + 1
+
+        # Without loop the playback stops at the ends
+        source.step(10.0)
+        assert source.index == 0 and source.paused
+    finally:
+        source.close()
+
+
+def test_playback_source_in_particle_canvas(tmp_path):
+
+    """
+    Tests that ParticleCanvas plays a looping recording like a Game.
+    """
+
+    from p_life.frontend_vispy import ParticleCanvas
+
+    record_game(tmp_path / "run", frames=5)
+    source = PlaybackSource(str(tmp_path / "run"), loop=True)
+    try:
+        canvas = ParticleCanvas(source, world_width=source.w, world_height=source.h)
+        for _ in range(6):
+            canvas.step_and_draw()
+        assert 0 <= source.index < 5
+    finally:
+        source.close()
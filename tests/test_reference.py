@@ -0,0 +1,49 @@
+import numpy as np
+import numpy.testing as npt
+
+from p_life.reference import check_kernels, compare, format_report, make_scenes, reference_forces
+
+
+def test_reference_pair_across_edge():
+
+    """
+    Tests that the reference gives the hand-computed matrix force for a pair
+    across the world edge.
+    """
+
+    pos = np.array([[0.5, 5.0], [9.0, 5.0]])  # 1.5 apart through the left edge
+    matrix = np.array([[0.0, 2.0], [0.0, 0.0]])
+
+    forces = reference_forces(pos, np.array([0, 1]), matrix, 2.5, 10.0, 10.0)
+
+    # normalized distance 0.6 -> pct 3/7, shape 6/7, pointing to -x
+    npt.assert_allclose(forces[0], [-2.0 * 6.0 / 7.0, 0.0])
+    npt.assert_allclose(forces[1], [0.0, 0.0])
+
+
+def test_all_kernels_match_reference():
+
+    """
+    Tests that every kernel variant matches the brute-force reference on all
+    harness scenes, including narrow grids.
+    """
+
+    results = check_kernels()
+
+    assert all(r["passed"] for r in results), format_report(results)
+    assert {r["scene"] for r in results} >= {"two_cells", "half_world", "one_by_many"}
+
+
+def test_harness_detects_wrong_kernel():
+
+    """
+    Tests that a kernel that counts a neighbor twice is reported as failing.
+    """
+
+    def double_counting(pos, types, matrix, r_max, world_width, world_height):
+        return 2.0 * reference_forces(pos, types, matrix, r_max, world_width, world_height)
+
+    result = compare(double_counting, make_scenes()[3])
+
+    assert not result["passed"]
+    assert result["max_error"] > 0.1
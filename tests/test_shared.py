@@ -0,0 +1,80 @@
+import subprocess
+import sys
+
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+import p_life.game as game
+from p_life.shared import SnapshotPublisher, SnapshotReader
+
+
+def test_reader_gets_latest_snapshot():
+
+    """
+    Tests that the reader sees the newest of several published snapshots.
+    """
+
+    np.random.seed(5)
+    g = game.Game(n=200, world_width=30.0, world_height=20.0)
+
+    with SnapshotPublisher(capacity=256) as publisher, SnapshotReader(publisher.name) as reader:
+        assert reader.read() is None
+
+        for _ in range(5):
+            publisher.publish(g.step(0.01), g.time, g.w, g.h)
+
+        snap = reader.read()
+        assert snap["frame"] == 4
+        assert (snap["world_width"], snap["world_height"]) == (30.0, 20.0)
+        npt.assert_array_equal(snap["pos"], g.pos)
+        npt.assert_array_equal(snap["types"], g.types)
+
+        with pytest.raises(ValueError):
+            publisher.publish({"pos": np.zeros((300, 2)), "types": np.zeros(300, dtype=int)})
+
+
+def test_zero_copy_view_detects_overwrite():
+
+    """
+    Tests that a zero-copy view stays valid until the publisher comes round the
+    ring to its slot.
+    """
+
+    with SnapshotPublisher(capacity=10, n_slots=3) as publisher, SnapshotReader(publisher.name) as reader:
+        publisher.publish({"pos": np.ones((4, 2)), "types": np.arange(4)})
+        snap = reader.read(copy=False)
+
+        publisher.publish({"pos": np.zeros((4, 2)), "types": np.arange(4)})
+        publisher.publish({"pos": np.zeros((4, 2)), "types": np.arange(4)})
+        assert reader.still_valid(snap)
+        npt.assert_array_equal(snap["pos"], 1.0)
+
+        publisher.publish({"pos": np.zeros((4, 2)), "types": np.arange(4)})
+        assert not reader.still_valid(snap)
+        del snap
+
+
+def test_reader_in_other_process():
+
+    """
+    Tests that another process maps the block, reads the frame and does not
+    remove it on exit.
+    """
+
+    with SnapshotPublisher(capacity=100) as publisher:
+        publisher.publish({"pos": np.full((3, 2), 7.0), "types": np.array([0, 1, 2])}, sim_time=2.5)
+
+        code = (
+            "from p_life.shared import SnapshotReader\n"
+            f"r = SnapshotReader({publisher.name!r})\n"
+            "s = r.read()\n"
+            "print(s['frame'], s['time'], s['pos'].sum(), list(s['types']))\n"
+            "del s\n"
+            "r.close()\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+        assert result.stdout.split()[:3] == ["0", "2.5", "42.0"]
+        assert "leaked" not in result.stderr
+        SnapshotReader(publisher.name).close()  # still there
@@ -0,0 +1,120 @@
+import numpy as np
+import numpy.testing as npt
+
+import p_life.game as game
+
+
+def random_game(n=500, seed=4):
+    np.random.seed(seed)
+    return game.Game(n=n, world_width=60.0, world_height=40.0, r_max=7.0)
+
+
+def torus_distances(g, point):
+
+    """Brute force torus distances of all particles to a point."""
+
+    delta = np.abs(g.pos.astype(np.float64) - np.asarray(point, dtype=np.float64))
+    delta = np.minimum(delta, np.array([g.w, g.h]) - delta)
+    return np.sqrt(np.sum(delta * delta, axis=1))
+
+
+def test_query_radius_matches_brute_force():
+
+    """
+    Tests that radius queries find the same particles as a brute force search,
+    also across the edges.
+    """
+
+    g = random_game()
+
+    for point, radius in [((30.0, 20.0), 5.0), ((1.0, 39.0), 6.0), ((59.5, 0.5), 15.0), ((10.0, 10.0), 100.0)]:
+        found = g.query_radius(point, radius)
+        expected = np.flatnonzero(torus_distances(g, point) <= radius)
+
+        npt.assert_array_equal(np.sort(found), expected)
+
+
+def test_query_rect_wraps_around_edges():
+
+    """
+    Tests that a rectangle crossing the right and top edge finds particles on
+    both sides.
+    """
+
+    g = random_game()
+
+    found = g.query_rect(55.0, 35.0, 10.0, 8.0)
+    in_x = np.mod(g.pos[:, 0] - 55.0, g.w) < 10.0
+    in_y = np.mod(g.pos[:, 1] - 35.0, g.h) < 8.0
+
+    npt.assert_array_equal(np.sort(found), np.flatnonzero(in_x & in_y))
+    assert np.any(g.pos[found, 0] < 5.0) and np.any(g.pos[found, 0] >= 55.0)
+
+
+def test_query_knn_returns_nearest_sorted():
+
+    """
+    Tests that k-nearest queries return the k smallest torus distances in
+    order.
+    """
+
+    g = random_game()
+    point = (0.5, 20.0)
+
+    indices, distances = g.query_knn(point, 12)
+    all_distances = torus_distances(g, point)
+
+    assert len(indices) == 12
+    npt.assert_allclose(distances, np.sort(all_distances)[:12], rtol=1e-5)
+    npt.assert_allclose(all_distances[indices], distances, rtol=1e-5)
+
+    # More neighbors than particles returns all of them
+    indices, _ = random_game(n=5).query_knn(point, 10)
+    assert len(indices) == 5
+
+
+def test_query_radius_batch_matches_single_queries():
+
+    """
+    Tests that the batch query gives the same result per point as single
+    queries.
+    """
+
+    g = random_game()
+    points = np.array([[30.0, 20.0], [0.0, 0.0], [59.0, 39.0]])
+
+    offsets, indices = g.query_radius_batch(points, 4.0)
+
+    assert len(offsets) == len(points) + 1
+    for m, point in enumerate(points):
+        npt.assert_array_equal(np.sort(indices[offsets[m]:offsets[m + 1]]), np.sort(g.query_radius(point, 4.0)))
+
+
+def test_queries_follow_the_particles():
+
+    """
+    Tests that the cached grid is rebuilt after steps, spawns, type assignment
+    and invalidate_cell_index().
+    """
+
+    g = random_game()
+    g.noise_strength = 0.0
+    g.query_radius((0.0, 0.0), 1.0)  # build the cached grid
+
+    g.step(0.01)
+    point = g.pos[0].copy()
+    assert 0 in g.query_radius(point, 1e-3)
+
+    g.spawn_particles((30.0, 20.0), 0.0, 1)
+    assert g.n - 1 in g.query_radius((30.0, 20.0), 1e-3)
+
+    # In-place edits are not noticed until the grid is invalidated
+    g.pos[0] = (12.0, 12.0)
+    assert 0 not in g.query_radius((12.0, 12.0), 0.01)
+    g.invalidate_cell_index()
+    assert 0 in g.query_radius((12.0, 12.0), 0.01)
+
+    # Assigning types is seen by the cached grid
+    g.cell_index()
+    g.types = np.full(g.n, 2)
+    assert np.all(g.cell_index()["types"] == 2)
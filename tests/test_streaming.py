@@ -0,0 +1,109 @@
+import time
+
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+import p_life.game as game
+from p_life.streaming import RemoteGame, StreamServer, decode_frame, encode_frame
+
+
+def wait_for(condition, timeout=10.0):
+    end = time.time() + timeout
+    while not condition():
+        assert time.time() < end, "timed out"
+        time.sleep(0.01)
+
+
+def test_frame_roundtrip_quantization():
+
+    """
+    Tests that positions survive encoding within the uint16 grid and types are
+    restored from the counts.
+    """
+
+    np.random.seed(1)
+    g = game.Game(n=1000, world_width=80.0, world_height=40.0)
+
+    data = encode_frame(g.pos, g.types, g.w, g.h, frame=7, sim_time=1.5)
+    snap = decode_frame(data)
+    order = np.argsort(g.types, kind="stable")
+
+    assert len(data) < 40 + 4 * 4 + 4 * len(g.pos)
+    assert snap["frame"] == 7 and snap["time"] == 1.5
+    npt.assert_array_equal(snap["types"], g.types[order])
+    npt.assert_allclose(snap["pos"], g.pos[order], atol=80.0 / 65536)
+
+
+def test_frame_with_more_than_four_types():
+
+    """
+    Tests that the server sends every type, and encode_frame rejects types it
+    cannot declare.
+    """
+
+    pos = np.random.uniform(0.0, 10.0, size=(60, 2))
+    types = np.arange(60) % 6
+
+    with pytest.raises(ValueError):
+        encode_frame(pos, types, 10.0, 10.0)
+
+    with StreamServer() as server:
+        server.publish({"pos": pos, "types": types}, 10.0, 10.0)
+        remote = RemoteGame("127.0.0.1", server.port)
+        snap = remote.step(0.0)
+        npt.assert_array_equal(np.bincount(snap["types"]), np.full(6, 10))
+        npt.assert_allclose(snap["pos"], pos[np.argsort(types, kind="stable")], atol=10.0 / 65536)
+        remote.close()
+
+
+def test_remote_game_receives_latest_frame():
+
+    """
+    Tests that a client on localhost gets the published snapshots of a running
+    game.
+    """
+
+    np.random.seed(2)
+    g = game.Game(n=500, world_width=50.0, world_height=50.0)
+
+    with StreamServer() as server:
+        server.publish(g.step(0.01), g.w, g.h, g.time)
+        remote = RemoteGame("127.0.0.1", server.port)
+        wait_for(lambda: server.clients == 1)
+
+        for _ in range(5):
+            server.publish(g.step(0.01), g.w, g.h, g.time)
+        wait_for(lambda: remote.client.snapshot["frame"] == 5)
+
+        snap = remote.step(0.0)
+        assert (remote.w, remote.h) == (50.0, 50.0)
+        assert len(snap["pos"]) == 500
+        npt.assert_array_equal(np.bincount(snap["types"], minlength=4), np.bincount(g.types, minlength=4))
+        remote.close()
+
+
+def test_slow_client_drops_frames():
+
+    """
+    Tests that a client that never reads makes the server skip frames instead
+    of blocking publish.
+    """
+
+    import socket
+
+    pos = np.random.rand(200000, 2) * 100.0
+    types = np.random.randint(0, 4, size=200000)
+
+    with StreamServer() as server:
+        sock = socket.create_connection(("127.0.0.1", server.port))
+        wait_for(lambda: server.clients == 1)
+
+        start = time.perf_counter()
+        for _ in range(50):
+            server.publish({"pos": pos, "types": types}, 100.0, 100.0)
+        assert time.perf_counter() - start < 10.0
+
+        wait_for(lambda: server.dropped > 0)
+        assert server.sent < 50
+        sock.close()
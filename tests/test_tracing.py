@@ -0,0 +1,76 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+import p_life.game as game
+from p_life import tracing
+
+
+@pytest.fixture
+def tracer():
+    yield tracing.enable(capacity=1000)
+    tracing.disable()
+
+
+def test_disabled_tracing_records_nothing():
+
+    """
+    Tests that spans are shared no-ops and dump reports nothing while tracing
+    is off.
+    """
+
+    tracing.disable()
+    assert tracing.span("a") is tracing.span("b")
+    with tracing.span("a"):
+        pass
+    assert not tracing.dump("unused.json")
+
+
+def test_step_phases_and_threads_in_trace(tracer, tmp_path):
+
+    """
+    Tests that game steps and work in other threads end up as Chrome trace
+    events with their thread ids.
+    """
+
+    np.random.seed(41)
+    g = game.Game(n=300, world_width=30.0, world_height=30.0)
+    g.step(0.01)
+
+    def worker():
+        with tracing.span("encode", "io"):
+            pass
+
+    thread = threading.Thread(target=worker, name="encoder")
+    thread.start()
+    thread.join()
+
+    path = tmp_path / "trace.json"
+    assert tracing.dump(path)
+    events = json.loads(path.read_text())["traceEvents"]
+
+    spans = {e["name"]: e for e in events if e["ph"] == "X"}
+    assert {"binning", "forces", "integrate", "game.step", "encode"} <= set(spans)
+    assert spans["game.step"]["dur"] >= spans["forces"]["dur"] > 0
+    assert spans["encode"]["tid"] != spans["game.step"]["tid"]
+    names = {e["args"]["name"] for e in events if e["ph"] == "M"}
+    assert "encoder" in names
+
+
+def test_ring_buffer_keeps_newest():
+
+    """
+    Tests that the tracer keeps only the newest events once its capacity is
+    exceeded.
+    """
+
+    tracer = tracing.Tracer(capacity=1000)
+    for i in range(1500):
+        tracer.complete(f"e{i}", "sim", 0.0, 1.0)
+
+    events = [e for e in tracer.events() if e["ph"] == "X"]
+    assert tracer.recorded == 1500
+    assert len(events) == 1000
+    assert events[-1]["name"] == "e1499"